@@ -2,25 +2,274 @@
 # Implementation of Quine McCluskey algorithm for simplifying boolean
 # expressions.
 #
+import approx
 import ast
+import batch
+import bdd
 import codegen
+import compact
+import consensus
+import decision
+import esop
+import factor
 import functools
+import incremental
+import npn
+import packed
+import rules
+import sat
+import stream
 import sys
+import tasks
 
 
-def simplify(expr):
+def simplify(expr, method='qm', costs=None, form='sop', invariants=None,
+             cancel=None, table_cache=None, npn_cache=None):
     """
     Parses and simplifies an arbitrary Python boolean expression string.  The
     `expr` string is parsed using Python's 'ast' module.  The return value is
     an instance of BooleanExpression.  Casting the return value to string will
     yield the simplified expression as a string.  Calling the 'ast' method on
     the return value will return the ast for the simplified expression.
+
+    `method` selects the minimization engine.  The default, 'qm', builds a
+    truth table and applies the Quine-McCluskey algorithm.  'bdd' compiles the
+    expression into a reduced ordered binary decision diagram and extracts the
+    prime implicants and cover from the diagram, which avoids building a truth
+    table for expressions whose diagrams stay small.  'consensus' expands the
+    expression into a sum of products and derives the prime implicants from
+    it by iterated consensus, so the work grows with the size of the cover
+    rather than with the truth table.  The cover is then selected from those
+    prime implicants on a decision diagram of the expression.
+
+    Propositions are normally considered equally expensive to evaluate, and
+    no costs are estimated unless `costs` is given.  Passing `costs`, a
+    dictionary mapping the source code of propositions to the cost of
+    evaluating them, makes minimization favor expressions with the least
+    total cost.  Propositions missing from `costs` are given a cost estimated
+    from their ast, eg function calls are assumed to be much more expensive
+    than attribute lookups, so `costs={}` weights every proposition by its
+    estimated cost.
+
+    `form` is as for `synthesize`: 'sop' for a sum of products, 'pos' for a
+    product of sums or 'best' for whichever of the two is cheaper.  The 'esop'
+    form, an exclusive sum of products, is only available with the 'qm'
+    method.
+
+    `invariants` is a sequence of expressions, over the propositions of
+    `expr`, which are known to always hold, eg `not (is_guest and is_admin)`.
+    Assignments of the propositions which violate an invariant can never
+    occur, so the result may be true or false for them, whichever makes it
+    simpler.
+
+    `cancel` is as for `synthesize`.  The 'bdd' and 'consensus' methods only
+    check it between their phases.
+
+    The 'qm' method computes the truth table of `expr` on tables packed into
+    integers, one per sub-expression.  Passing `table_cache`, a
+    `minbool.packed.TableCache`, keeps those tables between calls, so that
+    simplifying an expression again after editing it only recomputes the
+    tables of the sub-expressions containing the edit.  Propositions are
+    then ordered as the cache first saw them.  `npn_cache` is as for
+    `synthesize` and also only applies to the 'qm' method.
+    """
+    expression = _ASTExpression(expr)
+    invariants = [_as_expression(invariant) for invariant in invariants or ()]
+    if form == 'esop' and method != 'qm':
+        raise ValueError("The 'esop' form requires the 'qm' method")
+    if method == 'qm':
+        propositions = expression.propositions
+        if table_cache is not None:
+            propositions = table_cache.order(propositions)
+        f = _table_function(expression, propositions, table_cache)
+        return synthesize(f, costs=_proposition_costs(
+            propositions, costs), form=form, invariants=invariants,
+            cancel=cancel, npn_cache=npn_cache, *propositions)
+    elif method == 'bdd':
+        manager, node, propositions = bdd.compile_expression(expression)
+        costs = _proposition_costs(propositions, costs)
+        care = _care_node(manager, propositions, invariants)
+        candidates = []
+        for candidate in _forms(form):
+            _check(cancel)
+            if candidate == 'pos':
+                f = manager.negate(node)
+            else:
+                f = node
+            candidates.append((manager.cover(
+                manager.conjoin(f, care), costs=costs,
+                dont_care=manager.negate(care)), candidate))
+    elif method == 'consensus':
+        manager, node, propositions = bdd.compile_expression(expression)
+        costs = _proposition_costs(propositions, costs)
+        care = _care_node(manager, propositions, invariants)
+        candidates = []
+        for candidate in _forms(form):
+            _check(cancel)
+            truth = candidate == 'sop'
+            if truth:
+                f = node
+            else:
+                f = manager.negate(node)
+            cubes = consensus.cube_cover(expression, propositions, truth)
+            for invariant in invariants:
+                cubes.extend(
+                    consensus.cube_cover(invariant, propositions, False))
+            prime_implicants = consensus.prime_implicants(cubes)
+            candidates.append((manager.cover(
+                manager.conjoin(f, care), prime_implicants, costs,
+                manager.negate(care)), candidate))
+    else:
+        raise ValueError("Unknown method: %s" % method)
+    _check(cancel)
+    solution, form = _cheapest(candidates, costs)
+    return ASTBooleanExpression(propositions, solution, form)
+
+
+def simplify_iter(expr, costs=None, form='sop', invariants=None):
+    """
+    Anytime version of `simplify`, using the 'qm' method.  Yields a sequence
+    of increasingly simple BooleanExpression instances equivalent to `expr`.
+    See `synthesize_iter`.
     """
     expression = _ASTExpression(expr)
-    return synthesize(expression, *expression.propositions)
+    propositions = expression.propositions
+    return synthesize_iter(expression, costs=_proposition_costs(
+        propositions, costs), form=form, invariants=[
+            _as_expression(invariant) for invariant in invariants or ()],
+        *propositions)
+
+
+def simplify_async(expr, **options):
+    """
+    Runs `simplify` in a background thread and returns a
+    `minbool.tasks.Task`, a future for its result.  Options are as for
+    `simplify`, plus `timeout`, a number of seconds after which the task is
+    cancelled.  Cancelling the task stops the minimization at its next
+    checkpoint, freeing its thread.
+    """
+    timeout = options.pop('timeout', None)
+    return tasks.Task(simplify, (expr,), options, timeout)
+
+
+def _check(cancel):
+    if cancel is not None:
+        cancel.check()
+
+
+def _care_node(manager, propositions, invariants):
+    """
+    Compiles the conjunction of `invariants` into the diagram of `manager`.
+    """
+    care = bdd.TRUE
+    for invariant in invariants:
+        try:
+            node = bdd.compile_into(manager, invariant, propositions)
+        except KeyError, e:
+            raise ValueError(
+                "Unknown proposition in invariant: %s" % e.args[0])
+        care = manager.conjoin(care, node)
+    return care
+
+
+def _care_table(names, invariants):
+    """
+    Computes the packed truth table of the conjunction of `invariants` over
+    `names`.
+    """
+    N = len(names)
+    variables = {}
+    for i, name in enumerate(names):
+        if not isinstance(name, basestring):
+            name = codegen.to_source(name)
+        variables[name] = i
+    table = packed.full(N)
+    for invariant in invariants:
+        try:
+            table &= packed.evaluate(_as_expression(invariant), variables, N)
+        except KeyError, e:
+            raise ValueError(
+                "Unknown proposition in invariant: %s" % e.args[0])
+    return table
+
+
+def _table_function(expression, propositions, cache=None):
+    """
+    Returns a function of the propositions of an `_ASTExpression` looking up
+    its packed truth table.
+    """
+    N = len(propositions)
+    variables = dict([(codegen.to_source(proposition), i)
+                      for i, proposition in enumerate(propositions)])
+    table = packed.rows(packed.evaluate(expression, variables, N, cache), N)
+
+    def f(*args):
+        i = 0
+        for arg in args:
+            i = (i << 1) | int(bool(arg))
+        return table[i] == '1'
+
+    return f
+
+
+def compile_rules(expressions, names=None):
+    """
+    Compiles many boolean expressions into a single function which evaluates
+    them all against the same arguments, evaluating each distinct proposition
+    at most once.  `expressions` is a dictionary mapping keys to expression
+    strings or to results of `simplify` or `synthesize`, or a sequence of
+    them, in which case their indexes are used as keys.  Expression strings
+    are simplified first.
+
+    The return value is a `minbool.rules.RuleSet`.  Calling it with values for
+    the free names used in the expressions returns the set of keys of the
+    expressions which are true.  Names of builtins are taken to refer to the
+    builtins unless `names`, the names of the arguments, is given.
+    """
+    if not isinstance(expressions, dict):
+        expressions = dict(enumerate(expressions))
+    compiled = {}
+    for key, expression in expressions.items():
+        if isinstance(expression, basestring):
+            expression = simplify(expression)
+        compiled[key] = expression
+    return rules.RuleSet(compiled, names)
+
+
+def _proposition_costs(propositions, costs):
+    if costs is None:
+        return None
+    result = []
+    for proposition in propositions:
+        source = codegen.to_source(proposition)
+        if source in costs:
+            result.append(costs[source])
+        else:
+            result.append(_estimate_cost(proposition))
+    return result
+
 
+def is_tautology(expr):
+    """
+    Returns True if the boolean expression string `expr` is true for every
+    assignment of its propositions.  The check is performed on a binary
+    decision diagram, so no truth table is constructed.
+    """
+    manager, node, _ = bdd.compile_expression(_ASTExpression(expr))
+    return node == bdd.TRUE
+
+
+def is_contradiction(expr):
+    """
+    Returns True if the boolean expression string `expr` is false for every
+    assignment of its propositions.  The check is performed on a binary
+    decision diagram, so no truth table is constructed.
+    """
+    manager, node, _ = bdd.compile_expression(_ASTExpression(expr))
+    return node == bdd.FALSE
 
-def synthesize(f, *names):
+
+def synthesize(f, *names, **options):
     """
     Synthesizes a boolean expression from an arbitrary function.  The names
     passed to this function are the names of the arguments passed to the
@@ -38,15 +287,423 @@ def synthesize(f, *names):
     value to string will yield a Python format boolean expression as a string.
     Calling the return value with boolean arguments will return the boolean
     result of the expression.
+
+    Passing `streaming=True` generates the prime implicants column by column
+    in a compact binary form, only keeping the minterms that need covering in
+    memory.  Columns larger than `memory_limit` bytes (64MB by default) are
+    spilled to temporary files.  This allows larger functions to be minimized
+    at some cost in speed.  Only prime implicant generation spills: the two
+    groups of a column being merged, the prime implicants and the chart used
+    to choose the cover are all held in memory.
+
+    Passing `costs`, a sequence with the cost of evaluating each of the named
+    arguments, minimizes the total cost of the terms in the expression rather
+    than their number, avoiding expensive arguments where possible.  As
+    arguments are only known by name, their costs are never estimated, so
+    without `costs` all arguments are equally expensive.
+
+    By default the result is a sum of products, a disjunction of conjunctions,
+    covering the inputs for which the function is true.  Passing `form='pos'`
+    instead minimizes the inputs for which the function is false, giving a
+    product of sums, a conjunction of disjunctions, which is much smaller for
+    functions which are false for few inputs.  Passing `form='best'`
+    minimizes both and returns whichever has the fewest literals, or the
+    least cost if `costs` is given.
+
+    Passing `cancel`, an object with a `check` method such as a
+    `minbool.tasks.CancelToken`, has `check` called at regular checkpoints
+    while the truth table is built, columns are merged and the cover is
+    chosen.  Whatever it raises aborts the synthesis.
+
+    Passing `form='esop'` gives an exclusive sum of products, terms combined
+    with `^`, which is exponentially smaller than either of the other forms
+    for parity like functions such as checksums.  Don't cares are taken to be
+    False in this form, and `costs` and `memory_limit` are ignored.
+
+    Passing `invariants`, a sequence of expressions over `names` which are
+    known to always hold, treats inputs violating any of them as don't cares.
+    The function is not called for those inputs.  Invariants are evaluated
+    for all inputs at once on truth tables packed into integers.
+
+    Passing `library`, a `minbool.library.Library`, looks up functions of few
+    enough arguments in a library of precomputed results instead of
+    minimizing them, unless `costs` is given or the function returns None
+    for some inputs.
+
+    Passing `npn_cache`, a `minbool.cache.LRUCache`, shares minimization
+    between functions which are the same up to negating and reordering
+    arguments, under the same conditions.  Functions are minimized in the
+    canonical form of their class, `minbool.npn.canonical`, with results
+    cached by canonical truth table and mapped back onto `names`.  Functions
+    whose canonical form is too costly to find are minimized directly.
+
+    Passing `error_budget` makes the result approximate: it may be wrong for
+    inputs whose total weight is at most `error_budget`, if that makes it
+    cheaper.  `weights`, a function with the same arguments as `f`, gives
+    the weight of each input, by default 1, so `error_budget` is then the
+    number of inputs for which the result may be wrong.  Terms are dropped,
+    leaving the inputs only they cover uncovered, and literals removed,
+    covering more inputs, until no change fits in the budget, see
+    `minbool.approx`.  The `error` attribute of the result is the total
+    weight of the inputs for which it is wrong.  Approximation is not
+    available in 'esop' form or with `streaming`.
     """
+    streaming = options.pop('streaming', False)
+    memory_limit = options.pop('memory_limit', 2**26)
+    costs = options.pop('costs', None)
+    form = options.pop('form', 'sop')
+    invariants = options.pop('invariants', None)
+    cancel = options.pop('cancel', None)
+    library = options.pop('library', None)
+    npn_cache = options.pop('npn_cache', None)
+    error_budget = options.pop('error_budget', None)
+    weights = options.pop('weights', None)
+    if options:
+        raise TypeError("Unexpected keyword arguments: %s" %
+                        ', '.join(options))
+    if error_budget is not None and (form == 'esop' or streaming):
+        raise ValueError("An error budget is not available in 'esop' form "
+                         "or with streaming")
+
     N = len(names)
+    forms = _forms(form)
+    candidates = []
+
+    def outputs():
+        return _outputs(f, names, invariants, cancel)
+
+    if form == 'esop':
+        values = [bool(value) for _, _, value in outputs()]
+        candidates.append((esop.minimize(values, N), form))
+
+    elif streaming:
+        for form in forms:
+            truth = form == 'sop'
+            onset = {}
+
+            def minterms():
+                for i, minterm, value in outputs():
+                    if value is None:
+                        yield i
+                    elif bool(value) == truth:
+                        onset[minterm] = True
+                        yield i
+
+            prime_implicants = set()
+            for value, mask in stream.prime_implicants(
+                minterms(), N, memory_limit):
+                _check(cancel)
+                prime_implicants.add(stream.to_implicant(value, mask, N))
+            candidates.append(
+                (_find_cover(prime_implicants, onset, costs, cancel), form))
+
+    else:
+        # Construct truth table
+        truthtable = {}
+        table = 0
+        for i, minterm, value in outputs():
+            truthtable[minterm] = value
+            if value:
+                table |= 1 << i
+
+        exact = (costs is None and error_budget is None and
+                 None not in truthtable.values())
+        everything = packed.full(N)
+        if (exact and library is not None and
+            library.lookup(table, N) is not None):
+            for form in forms:
+                if form == 'pos':
+                    cubes = library.lookup(everything ^ table, N)
+                else:
+                    cubes = library.lookup(table, N)
+                candidates.append(([stream.to_implicant(value, mask, N)
+                                    for value, mask in cubes], form))
+            forms = ()
+        elif exact and npn_cache is not None:
+            solutions = []
+            for form in forms:
+                if form == 'pos':
+                    solution = _npn_solution(
+                        everything ^ table, N, npn_cache, cancel)
+                else:
+                    solution = _npn_solution(table, N, npn_cache, cancel)
+                solutions.append((solution, form))
+            # Functions too costly to canonicalize are minimized directly
+            if None not in [solution for solution, _ in solutions]:
+                candidates.extend(solutions)
+                forms = ()
+
+        errors = {}
+        if error_budget is not None and weights is not None:
+            weights = dict([(i, weights(*minterm)) for i, minterm in
+                            enumerate(_range_minterms(N))])
+        for form in forms:
+            if form == 'pos':
+                table = _complement(truthtable)
+            else:
+                table = truthtable
+            prime_implicants = _find_prime_implicants(table, N, cancel)
+            solution = _find_cover(prime_implicants, table, costs, cancel)
+            if error_budget is not None:
+                solution, errors[form] = _approximate(
+                    solution, table, N, error_budget, weights, costs)
+            candidates.append((solution, form))
+
+    solution, form = _cheapest(candidates, costs)
+    result = _make_expression(names, solution, form)
+    if error_budget is not None:
+        result.error = errors[form]
+    return result
+
+
+def _approximate(solution, truthtable, N, budget, weights=None, costs=None):
+    """
+    Reduces a cover of a truth table with `minbool.approx`, returning the
+    new cover and its error.
+    """
+    onset = set()
+    offset = set()
+    for minterm, value in truthtable.items():
+        row = incremental.from_implicant(minterm)[0]
+        if value:
+            onset.add(row)
+        elif value is not None:
+            offset.add(row)
+    cover, error = approx.reduce(
+        [incremental.from_implicant(implicant) for implicant in solution],
+        onset, offset, N, budget, weights, costs)
+    return [stream.to_implicant(value, mask, N)
+            for value, mask in cover], error
+
+
+class Minimizer(incremental.IncrementalCover):
+    """
+    Minimizes a function whose truth table changes a few rows at a time.  The
+    prime implicants and chosen cover are kept between changes, and
+    `add_minterm`, `remove_minterm` and `set_dont_care` only update the
+    implicants and terms around the row they change.  Rows are given either
+    as tuples of argument values or as integer row indexes, with the first
+    name as the most significant bit.
+
+    `names` are as for `synthesize`.  If `f` is given, the function starts as
+    `f`, minimized with `synthesize`, otherwise as always False.  The
+    `expression` attribute holds the current minimized BooleanExpression.
+    """
+
+    def __init__(self, names, f=None):
+        self.names = names
+        N = len(names)
+        minterms, dont_cares, primes, solution = (), (), None, None
+        if f is not None:
+            truthtable = {}
+            minterms, dont_cares = [], []
+            for i, minterm, value in _outputs(f, names):
+                truthtable[minterm] = value
+                if value is None:
+                    dont_cares.append(i)
+                elif value:
+                    minterms.append(i)
+            prime_implicants = _find_prime_implicants(truthtable, N)
+            primes = [incremental.from_implicant(implicant)
+                      for implicant in prime_implicants]
+            solution = [incremental.from_implicant(implicant) for implicant
+                        in _find_cover(prime_implicants, truthtable)]
+        incremental.IncrementalCover.__init__(
+            self, N, minterms, dont_cares, primes, solution)
+
+    @property
+    def expression(self):
+        N = self.N
+        return _make_expression(self.names, [
+            stream.to_implicant(value, mask, N)
+            for value, mask in sorted(self.solution)])
+
+
+def synthesize_async(f, *names, **options):
+    """
+    Runs `synthesize` in a background thread and returns a
+    `minbool.tasks.Task`.  See `simplify_async`.
+    """
+    timeout = options.pop('timeout', None)
+    return tasks.Task(synthesize, (f,) + names, options, timeout)
+
+
+def synthesize_iter(f, *names, **options):
+    """
+    Anytime version of `synthesize`.  Yields a sequence of BooleanExpression
+    instances, each equivalent to the function and cheaper than the one
+    before, so that the caller can stop whenever it runs out of time and use
+    the last expression yielded.
+
+    The first expression has one term per input for which the function is
+    true.  Then, after each column of the Quine-McCluskey merge loop, a cover
+    is chosen from the implicants found so far, the last one from the prime
+    implicants, as by `synthesize`.  As covers are chosen greedily, one
+    chosen from more implicants can be cheaper, so the last expression is
+    the one `synthesize` would return, or one which is cheaper still, rather
+    than always the same.  The `costs`, `form` and `invariants`
+    options are as for `synthesize`, except that the 'esop' form is not
+    available.  With `form='best'` sums of products are yielded before
+    products of sums.
+    """
+    costs = options.pop('costs', None)
+    form = options.pop('form', 'sop')
+    invariants = options.pop('invariants', None)
+    if options:
+        raise TypeError("Unexpected keyword arguments: %s" %
+                        ', '.join(options))
+    if form == 'esop':
+        raise ValueError("The 'esop' form is not available")
+    forms = _forms(form)
 
-    # Construct truth table
+    N = len(names)
     truthtable = {}
-    for minterm in _range_minterms(N):
-        truthtable[minterm] = f(*minterm)
+    for _, minterm, value in _outputs(f, names, invariants):
+        truthtable[minterm] = value
+
+    best = None
+    for form in forms:
+        if form == 'pos':
+            table = _complement(truthtable)
+        else:
+            table = truthtable
+        for solution in _iter_covers(table, N, costs):
+            candidate = (solution, form)
+            if best is None or _cheapest([best, candidate], costs) is not best:
+                best = candidate
+                yield _make_expression(names, solution, form)
+
 
-    # Find prime implicants
+def _iter_covers(truthtable, N, costs=None):
+    """
+    Generates progressively smaller covers of the minterms that are True in
+    `truthtable`.
+    """
+    # Trivially valid--one term per minterm
+    yield sorted([minterm for minterm, truth in truthtable.items() if truth])
+
+    # The last column is empty, giving the cover of the prime implicants,
+    # chosen from the same set as in `synthesize`
+    for prime_implicants, column in _prime_implicant_columns(truthtable, N):
+        implicants = prime_implicants
+        if [group for group in column if group]:
+            implicants = set(prime_implicants)
+            for group in column:
+                implicants.update(group)
+        yield _find_cover(implicants, truthtable, costs)
+
+
+def _outputs(f, names, invariants=None, cancel=None):
+    """
+    Generates `(i, minterm, value)` triples for every row of the truth table
+    of `f`, with None values for rows which violate `invariants`.
+    """
+    N = len(names)
+    allowed = None
+    if invariants:
+        allowed = packed.rows(_care_table(names, invariants), N)
+
+    for i, minterm in enumerate(_range_minterms(N)):
+        if not i & 0xff:
+            _check(cancel)
+        if allowed is not None and allowed[i] == '0':
+            yield i, minterm, None  # Never happens, so don't care
+        else:
+            yield i, minterm, f(*minterm)
+
+
+def _npn_solution(table, N, cache, cancel=None):
+    """
+    Minimizes the function of N variables with the packed truth table
+    `table` through the canonical form of its NPN class, looking it up in or
+    storing it to `cache`.  Returns None for functions whose canonical form
+    takes more than `npn.MAX_TRANSFORMS` transforms to find.
+    """
+    result = npn.canonical(table, N, npn.MAX_TRANSFORMS)
+    if result is None:
+        return None
+    canonical, (perm, flips, negate) = result
+
+    # The transform of the function without negating the output, whose
+    # cubes map back onto those of the function
+    key = (N, negate and packed.full(N) ^ canonical or canonical)
+    cubes = cache.get(key)
+    if cubes is None:
+        truthtable = dict([(minterm, bool(key[1] & (1 << i)))
+                           for i, minterm in enumerate(_range_minterms(N))])
+        prime_implicants = _find_prime_implicants(truthtable, N, cancel)
+        cubes = [incremental.from_implicant(implicant) for implicant in
+                 _find_cover(prime_implicants, truthtable, cancel=cancel)]
+        cache.put(key, cubes)
+    return [stream.to_implicant(*npn.inverse_cube(cube, N, perm, flips) +
+                                (N,)) for cube in cubes]
+
+
+def _make_expression(names, solution, form='sop'):
+    if isinstance(names[0], basestring):
+        return BooleanExpression(names, solution, form)
+    return ASTBooleanExpression(names, solution, form)
+
+
+def _forms(form):
+    if form == 'best':
+        return ('sop', 'pos')
+    elif form in ('sop', 'pos', 'esop'):
+        return (form,)
+    raise ValueError("Unknown form: %s" % form)
+
+
+def _complement(truthtable):
+    """
+    Returns the truth table of the complement of a function, keeping don't
+    cares.
+    """
+    complement = {}
+    for minterm, truth in truthtable.items():
+        if truth is not None:
+            truth = not truth
+        complement[minterm] = truth
+    return complement
+
+
+def _cheapest(candidates, costs=None):
+    """
+    Picks the cheapest of a list of `(solution, form)` pairs, by number of
+    literals or by `costs`, then by number of terms.  The first candidate wins
+    ties.
+    """
+    def cost(candidate):
+        solution = candidate[0]
+        if costs is None:
+            literals = sum([len(implicant) - implicant.count(None)
+                            for implicant in solution])
+        else:
+            literals = sum([_implicant_cost(implicant, costs)
+                            for implicant in solution])
+        return literals, len(solution)
+
+    return min(candidates, key=cost)
+
+
+def _find_prime_implicants(truthtable, N, cancel=None):
+    """
+    Finds the prime implicants of the function described by `truthtable`, a
+    dictionary mapping minterms to True, False or None for don't care, by
+    iteratively merging adjacent implicants.
+    """
+    prime_implicants = set()
+    for prime_implicants, _ in _prime_implicant_columns(
+        truthtable, N, cancel):
+        pass
+    return prime_implicants
+
+
+def _prime_implicant_columns(truthtable, N, cancel=None):
+    """
+    Runs the merge loop of `_find_prime_implicants`, yielding the set of prime
+    implicants found so far and the next column, as a list of groups of
+    implicants, after each column is processed.
+    """
     prime_implicants = set()
 
     # Construct the first column
@@ -69,6 +726,7 @@ def synthesize(f, *names):
             this_group = column[n]
             next_group = column[n+1]
             for i, implicant in enumerate(this_group):
+                _check(cancel)
                 for j, candidate in enumerate(next_group):
                     match = _adjacent(implicant, candidate)
                     if match:
@@ -86,7 +744,22 @@ def synthesize(f, *names):
                     prime_implicants.add(tuple(column[i][j]))
 
         column = [list(group) for group in next_column]
+        yield prime_implicants, column
 
+
+def _find_cover(prime_implicants, truthtable, costs=None, cancel=None):
+    """
+    Selects a subset of `prime_implicants` which covers every minterm that is
+    True in `truthtable`.  Essential prime implicants are selected first, then
+    prime implicants are chosen greedily by the number of uncovered minterms
+    they cover.  Minterms missing from `truthtable` need not be covered.
+
+    If `costs`, a sequence of the cost of evaluating each variable, is given,
+    prime implicants are also chosen by the number of uncovered minterms they
+    cover per unit of cost, implicants made redundant by later choices are
+    dropped from both covers, most expensive first, and the cheaper cover is
+    returned.
+    """
     # construct coverage chart
     minterm_coverage = {}
     implicant_coverage = dict(
@@ -95,6 +768,7 @@ def synthesize(f, *names):
     for minterm, truth in truthtable.items():
         if not truth:
             continue # Don't care about coverage for don't cares
+        _check(cancel)
         uncovered_minterms.add(minterm)
         minterm_coverage[minterm] = covering_implicants = []
         for implicant in prime_implicants:
@@ -120,7 +794,44 @@ def synthesize(f, *names):
 
     # Add enough non-essential implicants to cover the remaining uncovered
     # minterms
+    if costs is None:
+        return _greedy_cover(solution, cand_implicants, implicant_coverage,
+                             uncovered_minterms, cancel=cancel)
+
+    # Greedy choices by cost can still lose to those by coverage alone, so
+    # keep whichever of the two costs least
+    covers = []
+    for weights in (costs, None):
+        cover = _greedy_cover(solution, cand_implicants, implicant_coverage,
+                              uncovered_minterms, weights, cancel)
+        by_cost = sorted(cover, key=lambda implicant: -_implicant_cost(
+            implicant, costs))
+        for implicant in by_cost:
+            others = [other for other in cover if other != implicant]
+            for minterm in implicant_coverage[implicant]:
+                if not [other for other in others
+                        if minterm in implicant_coverage[other]]:
+                    break
+            else:
+                cover = others
+        covers.append((cover, None))
+
+    return _cheapest(covers, costs)[0]
+
+
+def _greedy_cover(solution, cand_implicants, implicant_coverage,
+                  uncovered_minterms, costs=None, cancel=None):
+    """
+    Extends `solution` with implicants from `cand_implicants`, chosen greedily
+    by the number of `uncovered_minterms` they cover, per unit of cost if
+    `costs` is given, until every minterm is covered.  None of the arguments
+    are modified.
+    """
+    solution = list(solution)
+    cand_implicants = set(cand_implicants)
+    uncovered_minterms = set(uncovered_minterms)
     while uncovered_minterms:
+        _check(cancel)
         max_covered = 0
         leading_implicant = None
         for implicant in cand_implicants:
@@ -129,6 +840,8 @@ def synthesize(f, *names):
             for minterm in covered_minterms:
                 if minterm in uncovered_minterms:
                     covered += 1
+            if costs is not None and covered:
+                covered /= _implicant_cost(implicant, costs) or 1e-9
 
             if covered > max_covered:
                 max_covered = covered
@@ -139,17 +852,322 @@ def synthesize(f, *names):
         covered_minterms = implicant_coverage[leading_implicant]
         uncovered_minterms -= covered_minterms
 
-    if isinstance(names[0], basestring):
-        return BooleanExpression(names, solution)
-    return ASTBooleanExpression(names, solution)
+    return solution
+
+
+def _implicant_cost(implicant, costs):
+    cost = 0.0
+    for truth, variable_cost in zip(implicant, costs):
+        if truth is not None:
+            cost += variable_cost
+    return cost
+
+
+# Relative cost of evaluating each type of node, used to estimate the cost of
+# evaluating propositions.
+_NODE_COSTS = {
+    ast.Name: 1,
+    ast.Attribute: 1,
+    ast.Subscript: 2,
+    ast.Compare: 2,
+    ast.BinOp: 2,
+    ast.Call: 10,
+}
+
+
+def _estimate_cost(node):
+    """
+    Estimates the cost of evaluating a proposition from the types of the nodes
+    in its ast.
+    """
+    cost = 0
+    for child in ast.walk(node):
+        cost += _NODE_COSTS.get(type(child), 0)
+    return cost or 1
+
+
+def synthesize_multiple(f, *names):
+    """
+    Synthesizes several boolean expressions at once from a function returning
+    a tuple of outputs, one per expression.  As with `synthesize`, each output
+    may be None to indicate that we don't care about it for a particular input.
+
+    Prime implicants are tagged with the set of outputs they are implicants
+    of, so a single product term can be chosen to cover minterms of several
+    outputs.  The cover minimizes the number of distinct terms across all
+    outputs, rather than per output, and the returned expressions share the
+    terms they have in common.  The return value is a tuple of
+    BooleanExpression instances, one per output.
+    """
+    N = len(names)
+
+    # Construct truth tables
+    truthtables = None
+    for minterm in _range_minterms(N):
+        outputs = f(*minterm)
+        if truthtables is None:
+            truthtables = [{} for _ in outputs]
+        for truthtable, truth in zip(truthtables, outputs):
+            truthtable[minterm] = truth
+
+    prime_implicants = _find_multiple_prime_implicants(truthtables, N)
+    solutions = _find_multiple_cover(prime_implicants, truthtables)
+    return tuple([_make_expression(names, solution)
+                  for solution in solutions])
+
+
+def _find_multiple_prime_implicants(truthtables, N):
+    """
+    Finds multiple output prime implicants.  Implicants are merged along with
+    tags, bit masks of the outputs they imply, and an implicant is only
+    considered matched if it merges without losing any outputs.  Returns a
+    dictionary mapping prime implicants to the union of their tags.
+    """
+    prime_implicants = {}
+
+    # Construct the first column
+    column = [[] for _ in xrange(N+1)]
+    for minterm in truthtables[0]:
+        tag = 0
+        for i, truthtable in enumerate(truthtables):
+            if truthtable[minterm] in (True, None):  # include don't cares
+                tag |= 1 << i
+        if tag:
+            column[sum(minterm)].append((minterm, tag))
+
+    # Iteratively find matches/prime implicants in successive columns
+    done = False
+    while not done:
+        done = True
+        next_column  = [set() for _ in xrange(N+1)]
+        matches = [[False for _ in xrange(len(column[n]))] for n in xrange(N+1)]
+        for n in xrange(N):
+            this_group = column[n]
+            next_group = column[n+1]
+            for i, (implicant, tag) in enumerate(this_group):
+                for j, (candidate, candidate_tag) in enumerate(next_group):
+                    shared_tag = tag & candidate_tag
+                    if not shared_tag:
+                        continue
+                    match = _adjacent(implicant, candidate)
+                    if match:
+                        if shared_tag == tag:
+                            matches[n][i] = True
+                        if shared_tag == candidate_tag:
+                            matches[n+1][j] = True
+                        group = 0
+                        for member in match:
+                            if member:
+                                group += 1
+                        next_column[group].add((match, shared_tag))
+                        done = False
+
+        for i in xrange(N+1):
+            for j in xrange(len(matches[i])):
+                if not matches[i][j]:
+                    implicant, tag = column[i][j]
+                    prime_implicants[implicant] = (
+                        prime_implicants.get(implicant, 0) | tag)
+
+        column = [list(group) for group in next_column]
+
+    return prime_implicants
+
+
+def _find_multiple_cover(prime_implicants, truthtables):
+    """
+    Selects the multiple output prime implicants which cover every minterm
+    that is True for each output, counting a term shared between outputs only
+    once.  Returns a list of solutions, one per output.
+    """
+    # construct coverage chart, rows are (output, minterm) pairs
+    row_coverage = {}
+    implicant_coverage = dict(
+        [(implicant, set()) for implicant in prime_implicants])
+    uncovered_rows = set()
+    for i, truthtable in enumerate(truthtables):
+        for minterm, truth in truthtable.items():
+            if not truth:
+                continue # Don't care about coverage for don't cares
+            row = (i, minterm)
+            uncovered_rows.add(row)
+            row_coverage[row] = covering_implicants = []
+            for implicant, tag in prime_implicants.items():
+                if tag & (1 << i) and _covers(implicant, minterm):
+                    covering_implicants.append(implicant)
+                    implicant_coverage[implicant].add(row)
+
+    # find essential implicants
+    cand_implicants = set(prime_implicants)
+    chosen = []
+    for row, covering_implicants in row_coverage.items():
+        if row not in uncovered_rows:
+            continue
+
+        if len(covering_implicants) == 1:
+            implicant = covering_implicants[0]
+            chosen.append(implicant)
+            cand_implicants.remove(implicant)
+            uncovered_rows -= implicant_coverage[implicant]
+
+    # Add enough non-essential implicants to cover the remaining rows
+    while uncovered_rows:
+        max_covered = 0
+        leading_implicant = None
+        for implicant in cand_implicants:
+            covered = len(implicant_coverage[implicant] & uncovered_rows)
+            if covered > max_covered:
+                max_covered = covered
+                leading_implicant = implicant
+
+        chosen.append(leading_implicant)
+        cand_implicants.remove(leading_implicant)
+        uncovered_rows -= implicant_coverage[leading_implicant]
+
+    # Distribute the chosen terms among the outputs, dropping terms from an
+    # output when its other terms already cover them, least shared first.
+    def shared(implicant):
+        return bin(prime_implicants[implicant]).count('1')
+
+    solutions = []
+    for i in xrange(len(truthtables)):
+        solution = [implicant for implicant in chosen
+                    if [row for row in implicant_coverage[implicant]
+                        if row[0] == i]]
+        for implicant in sorted(solution, key=shared):
+            rows = [row for row in implicant_coverage[implicant]
+                    if row[0] == i]
+            others = [other for other in solution if other != implicant]
+            for row in rows:
+                if not [other for other in others
+                        if row in implicant_coverage[other]]:
+                    break
+            else:
+                solution = others
+        solutions.append(solution)
+
+    return solutions
+
+
+def verify(expression, spec):
+    """
+    Checks a `BooleanExpression` against `spec`, either a function as for
+    `synthesize`, a dictionary mapping tuples of arguments to outputs or a
+    sequence of outputs indexed by truth table row, the first argument being
+    the most significant bit of the index.  Outputs of None, and arguments
+    missing from a dictionary, are don't cares.  Returns the arguments of
+    the first row for which the expression is wrong, as a tuple of 0s and
+    1s, or None if it is right for every row.
+
+    The expression is evaluated for all rows at once on truth tables packed
+    into integers, so that checking is much faster than calling it for each
+    row.
+    """
+    N = len(expression.names)
+    if callable(spec):
+        rows = [(i, spec(*minterm))
+                for i, minterm in enumerate(_range_minterms(N))]
+    elif isinstance(spec, dict):
+        rows = [(incremental.from_implicant(minterm)[0], value)
+                for minterm, value in spec.items()]
+    else:
+        if len(spec) != 2**N:
+            raise ValueError("Expected %d rows, got %d" % (2**N, len(spec)))
+        rows = enumerate(spec)
+
+    onset = care = 0
+    for i, value in rows:
+        if value is not None:
+            care |= 1 << i
+            if value:
+                onset |= 1 << i
+
+    wrong = (packed.cover(expression.solution, N, expression.form) ^
+             onset) & care
+    if not wrong:
+        return None
+    return _make_minterm((wrong & -wrong).bit_length() - 1, N)
+
+
+def equivalent(a, b):
+    """
+    Checks whether two boolean expressions are true for exactly the same
+    assignments of their propositions.  Each argument may be an expression
+    string or the result of `simplify` or `synthesize`.  Propositions are
+    matched by their source code.
+
+    The check is performed by a SAT solver on a Tseitin encoding of the two
+    expressions, so no truth table is constructed.  The return value is a
+    `CheckResult`, which is true if the expressions are equivalent and
+    otherwise carries an assignment for which they differ.
+    """
+    solver = sat.Solver()
+    encoder = sat.TseitinEncoder(solver)
+    a = encoder.encode(_as_expression(a))
+    b = encoder.encode(_as_expression(b))
+    solver.add_clause([a, b])
+    solver.add_clause([-a, -b])
+    return CheckResult(encoder, solver.solve())
+
+
+def implies(a, b):
+    """
+    Checks whether boolean expression `a` implies boolean expression `b`, ie
+    whether `b` is true for every assignment for which `a` is true.  Arguments
+    are handled as for `equivalent`.  The return value is a `CheckResult`,
+    which is true if the implication holds and otherwise carries an assignment
+    for which `a` is true and `b` is false.
+    """
+    solver = sat.Solver()
+    encoder = sat.TseitinEncoder(solver)
+    solver.add_clause([encoder.encode(_as_expression(a))])
+    solver.add_clause([-encoder.encode(_as_expression(b))])
+    return CheckResult(encoder, solver.solve())
+
+
+def _as_expression(expr):
+    if isinstance(expr, _ASTExpression):
+        return expr
+    elif isinstance(expr, ASTBooleanExpression):
+        return _ASTExpression(expr.ast())
+    return _ASTExpression(str(expr))
+
+
+class CheckResult(object):
+    """
+    The result of `equivalent` or `implies`.  Evaluates as true if the check
+    holds.  Otherwise `counterexample` is a dictionary mapping the source code
+    of each proposition to the boolean value it takes in an assignment for
+    which the check fails.
+    """
+    counterexample = None
+
+    def __init__(self, encoder, model):
+        if model is not None:
+            self.counterexample = encoder.assignment(model)
+
+    def __nonzero__(self):
+        return self.counterexample is None
 
 
 class BooleanExpression(object):
+    """
+    A minimized boolean expression over `names`.  If `form` is 'sop',
+    `solution` is a list of implicants whose disjunction is the expression.
+    If `form` is 'pos', `solution` covers the complement of the expression
+    instead, and the expression is the conjunction of the implicants'
+    negations, ie a product of sums.  If `form` is 'esop', the expression is
+    the exclusive or of the implicants.  `error` is the total weight of the
+    inputs for which an approximate expression is wrong, see `synthesize`.
+    """
     _string = None
+    order = None
+    error = 0
 
-    def __init__(self, names, solution):
+    def __init__(self, names, solution, form='sop'):
         self.names = names
         self.solution = solution
+        self.form = form
 
     def __str__(self):
         if self._string is None:
@@ -158,84 +1176,246 @@ class BooleanExpression(object):
 
     def _makestring(self):
         solution = self.solution
+        pos = self.form == 'pos'
 
-        # Special case--empty solution, always False
+        # Special case--empty solution, always False (or True for pos)
         if not solution:
-            return 'False'
+            return str(pos)
+
+        if self.form == 'esop' and len(solution) > 1:
+            return self._makestring_esop()
 
         names = self.names
         terms = []
-        for implicant in self.solution:
+        for implicant, order in self._terms():
             term = []
-            for name, truth in zip(names, implicant):
-                name = str(name)
+            for i in order:
+                name, truth = str(names[i]), implicant[i]
                 if truth is None:
                     continue
-                elif truth:
+                elif truth != pos:
                     term.append(name)
                 else:
                     term.append('not(%s)' % name)
 
-            # Special case--term is all don't cares, always True
+            # Special case--term is all don't cares, always True (or False)
             if not term:
-                return 'True'
+                return str(not pos)
 
-            terms.append('(%s)' % ' and '.join(term))
+            terms.append('(%s)' % (pos and ' or ' or ' and ').join(term))
 
-        return ' or '.join(terms)
+        return (pos and ' and ' or ' or ').join(terms)
+
+    def _makestring_esop(self):
+        names = self.names
+        terms = []
+        for implicant, order in self._terms():
+            literals = [(str(names[i]), implicant[i]) for i in order
+                        if implicant[i] is not None]
+            if not literals:
+                terms.append('True')
+            elif len(literals) == 1 and not literals[0][1]:
+                terms.append('(not(%s))' % literals[0][0])
+            else:
+                # Operands of ^ must be booleans
+                terms.append('bool(%s)' % ' and '.join([
+                    truth and name or 'not(%s)' % name
+                    for name, truth in literals]))
+
+        return ' ^ '.join(terms)
+
+    def _terms(self):
+        """
+        Pairs each implicant with the order in which its literals are
+        evaluated, as a sequence of indexes into `names`.
+        """
+        if self.order is None:
+            order = range(len(self.names))
+            return [(implicant, order) for implicant in self.solution]
+        return zip(self.solution, self.order)
 
     def __call__(self, *args):
         if len(args) != len(self.names):
             raise ValueError("Wrong number of arguments")
 
-        for implicant in self.solution:
-            for arg, truth in zip(args, implicant):
+        pos = self.form == 'pos'
+        esop = self.form == 'esop'
+        parity = False
+        for implicant, order in self._terms():
+            for i in order:
+                truth = implicant[i]
                 if truth is None:
                     continue
-                elif bool(arg) != truth:
+                elif bool(args[i]) != truth:
                     break
             else:
-                # This term is true so expression is true
-                return True
+                if esop:
+                    parity = not parity
+                    continue
+
+                # This term is true so expression is true (or for pos, this
+                # sum is false so expression is false)
+                return not pos
 
         # No true terms found
-        return False
+        return pos or parity
+
+    def ordered(self, probabilities=None, samples=None, costs=None):
+        """
+        Returns a copy of this expression with its terms, and the literals in
+        each term, reordered to minimize the expected cost of evaluating it,
+        taking advantage of `and` and `or` short circuiting.
+
+        `probabilities` gives the probability of each name being true, either
+        as a sequence in the same order as `names` or as a dictionary keyed by
+        the source code of the names.  Alternatively `samples`, a sequence of
+        typical argument tuples, may be given to estimate the probabilities
+        from.  Missing probabilities default to 0.5.  `costs` gives the cost of
+        evaluating each name, in the same form, and defaults to 1 for all.
+
+        Names are assumed to be independent.  Within a term, literals are
+        ordered by cost per probability of being false, so the term fails as
+        cheaply as possible.  Terms are ordered by expected cost per
+        probability of being true.  The sums of a product of sums are ordered
+        the same way, as their negations are the terms of the complement.
+        """
+        names = self.names
+        probabilities = _probabilities(names, probabilities, samples)
+        costs = _per_name(names, costs, 1.0)
+
+        def probability(i, truth):
+            if truth:
+                return probabilities[i]
+            return 1.0 - probabilities[i]
+
+        def ratio(cost, p):
+            if p <= 0:
+                return float('inf')
+            return cost / p
+
+        terms = []
+        for implicant in self.solution:
+            order = [i for i, truth in enumerate(implicant)
+                     if truth is not None]
+            order.sort(key=lambda i: ratio(
+                costs[i], 1.0 - probability(i, implicant[i])))
+            order += [i for i, truth in enumerate(implicant) if truth is None]
+
+            # Expected cost of evaluating the term and probability it's true
+            expected, p = 0.0, 1.0
+            for i in order:
+                if implicant[i] is not None:
+                    expected += costs[i] * p
+                    p *= probability(i, implicant[i])
+            terms.append((ratio(expected, p), implicant, order))
+
+        terms.sort(key=lambda term: term[0])
+        result = type(self)(
+            names, [implicant for _, implicant, _ in terms], self.form)
+        result.order = [order for _, _, order in terms]
+        result.error = self.error
+        return result
+
+    def bitwise(self):
+        """
+        Returns the expression as a string using the bitwise operators `&`, `|`
+        and `~` instead of `and`, `or` and `not`, eg `(A & B) | (~C)`.  The
+        result can be evaluated elementwise over numpy arrays or used with
+        pandas' `DataFrame.eval` and `DataFrame.query`.
+        """
+        return codegen.to_bitwise_source(
+            ast.parse(str(self), mode='eval').body)
+
+    def decision_tree(self, probabilities=None, samples=None):
+        """
+        Returns a `minbool.decision.DecisionTree` equivalent to this
+        expression.  The tree tests each argument at most once on any path,
+        choosing which argument to test next by information gain.  It can be
+        called with the same arguments as the expression, and its `source`
+        attribute holds the source of an equivalent function using nested
+        `if` statements.  `probabilities` and `samples` are as for
+        `ordered`.
+        """
+        return decision.build(
+            self, _probabilities(self.names, probabilities, samples))
+
+    def compact(self):
+        """
+        Returns a `minbool.compact.CompactExpression` holding this expression
+        in a fraction of the memory.  `minbool.compact.dumps` serializes
+        either to a string which `minbool.compact.loads` reads back.
+        """
+        return compact.compact(self)
 
 
 class ASTBooleanExpression(BooleanExpression):
     _ast = None
+    factored = False
 
     def ast(self):
         if self._ast is None:
             self._ast = self._make_ast()
         return self._ast
 
+    def factor(self):
+        """
+        Returns a copy of this expression which is rendered in factored,
+        multi-level form, eg `A and (B or C)` rather than `(A and B) or (A and
+        C)`, so that fewer literals are evaluated.  Factoring is algebraic:
+        common cubes and kernels of the sum of products are divided out
+        recursively.  Expressions in 'esop' form are not factored.
+        """
+        result = type(self)(self.names, self.solution, self.form)
+        result.order = self.order
+        result.error = self.error
+        result.factored = True
+        return result
+
     def _make_ast(self):
         solution = self.solution
+        pos = self.form == 'pos'
 
-        # Special case--empty solution, always False
+        # Special case--empty solution, always False (or True for pos)
         if not solution:
-            return ast.Name('False', ast.Load())
+            return ast.Name(str(pos), ast.Load())
 
         propositions = self.names
+        esop = self.form == 'esop' and len(solution) > 1
         terms = []
-        for implicant in self.solution:
+        for implicant, order in self._terms():
             term = []
-            for proposition, truth in zip(propositions, implicant):
+            for i in order:
+                proposition, truth = propositions[i], implicant[i]
                 if truth is None:
                     continue
-                elif truth:
+                elif truth != pos:
                     term.append(proposition)
                 else:
                     term.append(ast.UnaryOp(ast.Not(), proposition))
 
-            # Special case--term is all don't cares, always True
+            if esop:
+                terms.append(_xor_operand(term))
+                continue
+
+            # Special case--term is all don't cares, always True (or False)
             if not term:
-                return ast.Name('True', ast.Load())
+                return ast.Name(str(not pos), ast.Load())
+
+            terms.append(ast.BoolOp(pos and ast.Or() or ast.And(), term))
 
-            terms.append(ast.BoolOp(ast.And(), term))
+        if esop:
+            expr = terms[0]
+            for term in terms[1:]:
+                expr = ast.BinOp(expr, ast.BitXor(), term)
+            return expr
 
-        expr = ast.BoolOp(ast.Or(), terms)
+        if self.factored and self.form != 'esop':
+            tree = factor.factor(factor.from_solution(solution))
+            if pos:
+                tree = factor.complement(tree)
+            return factor.to_ast(tree, propositions)
+
+        expr = ast.BoolOp(pos and ast.And() or ast.Or(), terms)
 
         def simplify(node):
             if isinstance(node, ast.BoolOp):
@@ -251,6 +1431,48 @@ class ASTBooleanExpression(BooleanExpression):
     def _makestring(self):
         return codegen.to_source(self.ast())
 
+    def bitwise(self):
+        return codegen.to_bitwise_source(self.ast())
+
+
+def _xor_operand(term):
+    # Operands of ^ must be booleans
+    if not term:
+        return ast.Name('True', ast.Load())
+    elif len(term) == 1 and isinstance(term[0], ast.UnaryOp):
+        return term[0]
+    elif len(term) == 1:
+        value = term[0]
+    else:
+        value = ast.BoolOp(ast.And(), term)
+    return ast.Call(ast.Name('bool', ast.Load()), [value], [], None, None)
+
+
+def _probabilities(names, probabilities, samples):
+    if samples is not None:
+        samples = list(samples)
+        probabilities = [
+            sum([bool(sample[i]) for sample in samples]) /
+            float(len(samples) or 1) for i in xrange(len(names))]
+    return _per_name(names, probabilities, 0.5)
+
+
+def _per_name(names, values, default):
+    """
+    Converts a sequence or dictionary keyed by the source code of names to a
+    list of values in the same order as `names`.
+    """
+    if values is None:
+        return [default] * len(names)
+    elif isinstance(values, dict):
+        result = []
+        for name in names:
+            if not isinstance(name, basestring):
+                name = codegen.to_source(name)
+            result.append(values.get(name, default))
+        return result
+    return list(values)
+
 
 def _range_minterms(N):
     for i in xrange(2**N):
@@ -293,32 +1515,51 @@ def _covers(implicant, minterm):
 class _ASTExpression(object):
 
     def __init__(self, expr):
-        tree = ast.parse(expr)
-        if len(tree.body) != 1:
-            raise SyntaxError("Expression may only contain a single expression.")
-        expr_node = tree.body[0]
-        if not isinstance(expr_node, ast.Expr):
-            raise SyntaxError("Not an expression.")
-        self.node = expr_node.value
+        if isinstance(expr, ast.AST):
+            self.node = expr
+        else:
+            tree = ast.parse(expr)
+            if len(tree.body) != 1:
+                raise SyntaxError(
+                    "Expression may only contain a single expression.")
+            expr_node = tree.body[0]
+            if not isinstance(expr_node, ast.Expr):
+                raise SyntaxError("Not an expression.")
+            self.node = expr_node.value
         self.propositions = {}
         self.propositions_mapping = {}
-        self.crawl_expression(self.node)
+        self.node = self.crawl_expression(self.node)
         self.propositions = self.propositions.values()
 
     def crawl_expression(self, node):
+        """
+        Maps the propositions in `node` and returns it normalized.  `^` is
+        taken as the exclusive or of the truth of its operands, and calls to
+        `bool` are dropped, so that expressions in 'esop' form can be read
+        back in.
+        """
         if isinstance(node, ast.BoolOp):
-            for subtree in node.values:
-                self.crawl_expression(subtree)
+            return ast.BoolOp(node.op, [self.crawl_expression(subtree)
+                                        for subtree in node.values])
         elif isinstance(node, ast.UnaryOp):
             assert isinstance(node.op, ast.Not)
-            self.crawl_expression(node.operand)
+            return ast.UnaryOp(node.op, self.crawl_expression(node.operand))
+        elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitXor):
+            return ast.BinOp(self.crawl_expression(node.left), node.op,
+                             self.crawl_expression(node.right))
+        elif (isinstance(node, ast.Call) and
+              isinstance(node.func, ast.Name) and node.func.id == 'bool' and
+              len(node.args) == 1 and not node.keywords and
+              node.starargs is None and node.kwargs is None):
+            return self.crawl_expression(node.args[0])
+
+        s = codegen.to_source(node)
+        if s not in self.propositions:
+            self.propositions_mapping[node] = node
+            self.propositions[s] = node
         else:
-            s = codegen.to_source(node)
-            if s not in self.propositions:
-                self.propositions_mapping[node] = node
-                self.propositions[s] = node
-            else:
-                self.propositions_mapping[node] = self.propositions[s]
+            self.propositions_mapping[node] = self.propositions[s]
+        return node
 
     def __call__(self, *args):
         assert len(args) == len(self.propositions), "Wronng number of arguments"
@@ -334,15 +1575,35 @@ class _ASTExpression(object):
                 return functools.reduce(boolops[type(node.op)], values)
             elif isinstance(node, ast.UnaryOp):
                 return not evaluate_node(node.operand)
+            elif (isinstance(node, ast.BinOp) and
+                  isinstance(node.op, ast.BitXor)):
+                return (bool(evaluate_node(node.left)) !=
+                        bool(evaluate_node(node.right)))
             else:
                 return truthtable[self.propositions_mapping[node]]
 
         return evaluate_node(self.node)
 
 
-def main(argv=sys.argv, out=sys.stdout):
-    expr = ' '.join(argv[1:])
-    print >> out, str(simplify(expr))
+def main(argv=sys.argv, out=sys.stdout, inp=sys.stdin, err=sys.stderr):
+    options, args = batch.option_parser().parse_args(argv[1:])
+    if options.serve:
+        import server
+        host, _, port = options.serve.rpartition(':')
+        server.serve((host or '127.0.0.1', int(port)), options.jobs,
+                     options.cache_size)
+        return
+    elif options.file:
+        inp = open(options.file)
+        try:
+            return batch.run(options, inp, out, err) and 1 or 0
+        finally:
+            inp.close()
+    elif options.batch:
+        return batch.run(options, inp, out, err) and 1 or 0
+
+    expr = ' '.join(args)
+    print >> out, str(simplify(expr, method=options.method, form=options.form))
 
 
 if __name__ == '__main__': #pragma NO COVERAGE
@@ -0,0 +1,111 @@
+#
+# Approximate minimization within a bounded error.
+#
+
+# Cubes are `(value, mask)` pairs of integers and rows are truth table row
+# indexes, as in `minbool.incremental`.
+
+
+def reduce(cover, onset, offset, N, budget, weights=None, costs=None):
+    """
+    Makes a cover of the rows in `onset` cheaper by letting it be wrong for
+    rows whose total weight is at most `budget`: dropping terms, which leaves
+    the rows only they cover uncovered, and removing literals from terms,
+    which covers more rows, some of which may be in `offset`.  Rows in
+    neither set are don't cares.  `weights` maps rows to weights, by default
+    1, and `costs` is a sequence with the cost of each variable, by default
+    1.
+
+    Changes are made greedily, each time choosing the one saving the most
+    cost per unit of error, until none fit in what is left of the budget.
+    Changes which fix errors or are free are made first.  Returns the new
+    cover and its error, the total weight of the rows it gets wrong.
+    """
+    cover = list(cover)
+    weight = lambda row: weights is None and 1 or weights.get(row, 1)
+    cost = lambda k: costs is None and 1 or costs[k]
+
+    # Number of terms covering each row which isn't a don't care
+    counts = {}
+    for row in onset:
+        counts[row] = 0
+    for row in offset:
+        counts[row] = 0
+    for cube in cover:
+        for row in _rows(cube, counts):
+            counts[row] += 1
+    error = sum([weight(row) for row in onset if not counts[row]])
+    error += sum([weight(row) for row in offset if counts[row]])
+
+    while True:
+        best = None
+        for index, cube in enumerate(cover):
+            value, mask = cube
+
+            # Drop the term
+            delta = 0
+            for row in _rows(cube, counts):
+                if counts[row] == 1:
+                    delta += row in onset and weight(row) or -weight(row)
+            saving = sum([cost(k) for k in xrange(N)
+                          if not mask & (1 << (N - 1 - k))])
+            best = _better(best, (saving, delta, index, None), error, budget)
+
+            # Remove a literal, covering the other half of the larger cube
+            for k in xrange(N):
+                bit = 1 << (N - 1 - k)
+                if mask & bit:
+                    continue
+                delta = 0
+                for row in _rows((value ^ bit, mask), counts):
+                    if not counts[row]:
+                        delta += row in offset and weight(row) or -weight(row)
+                best = _better(best, (cost(k), delta, index, bit), error,
+                               budget)
+
+        if best is None:
+            break
+        saving, delta, index, bit = best
+        value, mask = cover[index]
+        if bit is None:
+            for row in _rows(cover.pop(index), counts):
+                counts[row] -= 1
+        else:
+            for row in _rows((value ^ bit, mask), counts):
+                counts[row] += 1
+            cover[index] = (value & ~bit, mask | bit)
+        error += delta
+
+    return cover, error
+
+
+def _better(best, move, error, budget):
+    # The better of two moves `(saving, delta, index, bit)`: moves which
+    # reduce the error first, then moves saving most per unit of error.
+    # Moves exceeding the budget or saving nothing don't count.
+    saving, delta = move[:2]
+    if error + delta > budget or (saving <= 0 and delta >= 0):
+        return best
+    if best is None:
+        return move
+    return max(best, move, key=_rank)
+
+
+def _rank(move):
+    saving, delta = move[:2]
+    if delta <= 0:
+        return (1, -delta, saving)
+    return (0, float(saving) / delta, 0)
+
+
+def _rows(cube, counts):
+    # The rows of a cube which aren't don't cares
+    value, mask = cube
+    bits = mask
+    while True:
+        row = value | bits
+        if row in counts:
+            yield row
+        if not bits:
+            break
+        bits = (bits - 1) & mask
@@ -0,0 +1,222 @@
+#
+# Streaming batch mode for the 'simplify' console script.
+#
+import itertools
+import json
+import multiprocessing
+import optparse
+import time
+
+import cache
+
+# Number of input lines read at a time per worker
+_CHUNK = 64
+
+
+def option_parser():
+    parser = optparse.OptionParser(
+        usage="%prog [options] [expression]",
+        description="Simplifies a boolean expression given on the command "
+        "line or, in batch mode, one expression per line of input.")
+    parser.disable_interspersed_args()
+    parser.add_option(
+        '-b', '--batch', action='store_true', default=False,
+        help="Read newline delimited expressions from standard input.")
+    parser.add_option(
+        '-f', '--file', metavar='FILE',
+        help="Read newline delimited expressions from FILE. Implies --batch.")
+    parser.add_option(
+        '--json', action='store_true', default=False,
+        help="Read and write JSON lines. Input lines are strings or objects "
+        "with an 'expr' key.")
+    parser.add_option(
+        '-j', '--jobs', type='int', default=1, metavar='N',
+        help="Minimize in a pool of N worker processes.")
+    parser.add_option(
+        '--cache-size', type='int', default=4096, metavar='N',
+        help="Keep up to N results in memory for repeated expressions.")
+    parser.add_option(
+        '--unordered', action='store_true', default=False,
+        help="Write results as they are ready rather than in input order. "
+        "Each result is prefixed with its line number.")
+    parser.add_option(
+        '--serve', metavar='[HOST:]PORT',
+        help="Serve minimization over HTTP on PORT. See minbool.server.")
+    parser.add_option(
+        '--method', default='qm', choices=['qm', 'bdd', 'consensus'],
+        help="Minimization method: qm, bdd or consensus.")
+    parser.add_option(
+        '--form', default='sop', choices=['sop', 'pos', 'best', 'esop'],
+        help="Form of the results: sop, pos, best or esop.")
+    return parser
+
+
+def run(options, inp, out, err):
+    """
+    Minimizes each line of `inp`, writing results to `out` as they are ready,
+    then a summary of throughput and latency to `err`.  Returns the number of
+    lines which could not be minimized.
+    """
+    started = time.time()
+    results = cache.LRUCache(options.cache_size)
+    stats = Stats()
+    pool = None
+    if options.jobs > 1:
+        pool = multiprocessing.Pool(options.jobs)
+        imap = options.unordered and pool.imap_unordered or pool.imap
+    else:
+        imap = itertools.imap
+
+    lines = enumerate(inp, 1)
+    try:
+        while True:
+            chunk = []
+            for lineno, line in itertools.islice(
+                lines, _CHUNK * max(options.jobs, 1)):
+                line = Line.parse(lineno, line, options.json)
+                if line is not None:
+                    chunk.append(line)
+            if not chunk:
+                break
+
+            # Minimize each distinct expression missing from the cache once,
+            # counting repeats within the chunk as cache hits
+            waiting = {}
+            for line in chunk:
+                if line.result is None:
+                    line.result = results.get(line.expr)
+                if line.result is None:
+                    if line.expr in waiting:
+                        stats.hits += 1
+                    waiting.setdefault(line.expr, []).append(line)
+                elif options.unordered:
+                    line.write(out, options, stats)
+            tasks = [(expr, options.method, options.form)
+                     for expr in waiting]
+            for expr, result, elapsed in imap(minimize, tasks):
+                results.put(expr, result)
+                stats.add(elapsed)
+                for line in waiting[expr]:
+                    line.result = result
+                    if options.unordered:
+                        line.write(out, options, stats)
+            if not options.unordered:
+                for line in chunk:
+                    line.write(out, options, stats)
+            out.flush()
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    stats.hits += results.hits
+    stats.report(err, time.time() - started)
+    return stats.errors
+
+
+def minimize(task):
+    """
+    Minimizes one expression, returning it with its result and the time
+    taken.  The result is a pair of the simplified expression and an error
+    message, one of which is None.  Runs in worker processes.
+    """
+    from minbool import simplify
+    expr, method, form = task
+    started = time.time()
+    try:
+        result = (str(simplify(expr, method=method, form=form)), None)
+    except Exception, e:
+        result = (None, '%s: %s' % (type(e).__name__, e))
+    return expr, result, time.time() - started
+
+
+class Line(object):
+    """
+    A line of input: its number, the expression on it, for JSON lines any
+    other keys of the input object, to be echoed in the output, and once
+    known, the result.
+    """
+    result = None
+
+    def __init__(self, lineno, expr, extra=None):
+        self.lineno = lineno
+        self.expr = expr
+        self.extra = extra
+
+    @classmethod
+    def parse(cls, lineno, text, use_json):
+        text = text.strip()
+        if not text:
+            return None
+        if not use_json:
+            return cls(lineno, text)
+        try:
+            value = json.loads(text)
+        except ValueError:
+            line = cls(lineno, text, {})
+            line.result = (None, 'Invalid JSON')
+            return line
+        if isinstance(value, dict):
+            extra = dict(value)
+            line = cls(lineno, extra.pop('expr', ''), extra)
+        else:
+            line = cls(lineno, value, {})
+        if not isinstance(line.expr, basestring):
+            line.result = (None, 'Expression must be a string')
+        return line
+
+    def write(self, out, options, stats):
+        result, error = self.result
+        if error is not None:
+            stats.errors += 1
+        stats.lines += 1
+
+        if options.json:
+            record = dict(self.extra)
+            record['line'] = self.lineno
+            record['expr'] = self.expr
+            if error is None:
+                record['result'] = result
+            else:
+                record['error'] = error
+            print >> out, json.dumps(record, sort_keys=True)
+            return
+
+        if error is not None:
+            result = '!error %s' % error
+        if options.unordered:
+            print >> out, '%d\t%s' % (self.lineno, result)
+        else:
+            print >> out, result
+
+
+class Stats(object):
+    """
+    Counts lines, errors and cache hits, and keeps the time taken to minimize
+    each expression.
+    """
+
+    def __init__(self):
+        self.lines = self.errors = self.hits = 0
+        self.latencies = []
+
+    def add(self, elapsed):
+        self.latencies.append(elapsed)
+
+    def report(self, err, elapsed):
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1,
+                                 int(p * len(latencies)))] * 1000
+
+        print >> err, (
+            "%d lines, %d errors, %d cache hits in %.3fs (%.1f lines/s)" % (
+                self.lines, self.errors, self.hits, elapsed,
+                self.lines / (elapsed or 1e-9)))
+        print >> err, (
+            "latency ms: p50 %.3f p90 %.3f p99 %.3f max %.3f" % (
+                percentile(0.5), percentile(0.9), percentile(0.99),
+                percentile(1.0)))
@@ -0,0 +1,419 @@
+#
+# Reduced ordered binary decision diagrams.
+#
+import ast
+import codegen
+
+FALSE = 0
+TRUE = 1
+
+
+class BDD(object):
+    """
+    Manager for a set of reduced ordered binary decision diagrams sharing the
+    same variable order.  Nodes are represented by integers, `FALSE` (0) and
+    `TRUE` (1) being the terminals.  Variables are identified by their level,
+    an integer from 0 to `nvars` - 1, with level 0 at the top of the diagram.
+
+    Every node is unique: a unique table maps `(level, low, high)` triples to
+    existing nodes so that equivalent functions are always represented by the
+    same integer.  Results of `ite` are memoized in a fixed size computed table
+    which evicts older entries as it fills up.
+    """
+
+    def __init__(self, nvars, cache_size=2**16):
+        self.nvars = nvars
+        self._level = [nvars, nvars]
+        self._low = [FALSE, TRUE]
+        self._high = [FALSE, TRUE]
+        self._unique = {}
+        self._cache = _ComputedTable(cache_size)
+
+    def __len__(self):
+        return len(self._level)
+
+    def level(self, node):
+        return self._level[node]
+
+    def low(self, node):
+        return self._low[node]
+
+    def high(self, node):
+        return self._high[node]
+
+    def var(self, level):
+        """
+        Returns the node for the function that is true iff the variable at
+        `level` is true.
+        """
+        return self._make(level, FALSE, TRUE)
+
+    def _make(self, level, low, high):
+        if low == high:
+            return low
+        key = (level, low, high)
+        node = self._unique.get(key)
+        if node is None:
+            node = len(self._level)
+            self._level.append(level)
+            self._low.append(low)
+            self._high.append(high)
+            self._unique[key] = node
+        return node
+
+    def _cofactors(self, node, level):
+        if self._level[node] != level:
+            return node, node
+        return self._low[node], self._high[node]
+
+    def ite(self, f, g, h):
+        """
+        If-then-else: returns the node for `(f and g) or (not f and h)`.  All
+        other boolean operations are expressed in terms of this one.
+        """
+        if f == TRUE:
+            return g
+        if f == FALSE:
+            return h
+        if g == h:
+            return g
+        if g == TRUE and h == FALSE:
+            return f
+
+        key = (f, g, h)
+        result = self._cache.get(key)
+        if result is not None:
+            return result
+
+        levels = self._level
+        top = min(levels[f], levels[g], levels[h])
+        f0, f1 = self._cofactors(f, top)
+        g0, g1 = self._cofactors(g, top)
+        h0, h1 = self._cofactors(h, top)
+        result = self._make(
+            top, self.ite(f0, g0, h0), self.ite(f1, g1, h1))
+        self._cache.put(key, result)
+        return result
+
+    def negate(self, f):
+        return self.ite(f, FALSE, TRUE)
+
+    def xor(self, f, g):
+        return self.ite(f, self.negate(g), g)
+
+    def conjoin(self, f, g):
+        return self.ite(f, g, FALSE)
+
+    def disjoin(self, f, g):
+        return self.ite(f, TRUE, g)
+
+    def cube(self, cube):
+        """
+        Returns the node for a cube, given as a tuple of 1, 0 or None values
+        indexed by level.
+        """
+        node = TRUE
+        for level in xrange(len(cube) - 1, -1, -1):
+            truth = cube[level]
+            if truth is None:
+                continue
+            elif truth:
+                node = self._make(level, FALSE, node)
+            else:
+                node = self._make(level, node, FALSE)
+        return node
+
+    def restrict(self, f, level, value):
+        """
+        Returns the cofactor of `f` with the variable at `level` fixed to
+        `value`.
+        """
+        memo = {}
+
+        def restrict(node):
+            node_level = self._level[node]
+            if node_level > level:
+                return node
+            elif node_level == level:
+                if value:
+                    return self._high[node]
+                return self._low[node]
+            result = memo.get(node)
+            if result is None:
+                result = memo[node] = self._make(
+                    node_level, restrict(self._low[node]),
+                    restrict(self._high[node]))
+            return result
+
+        return restrict(f)
+
+    def support(self, f):
+        """
+        Returns the set of levels of the variables `f` depends on.
+        """
+        levels = set()
+        seen = set()
+        todo = [f]
+        while todo:
+            node = todo.pop()
+            if node in seen or node in (FALSE, TRUE):
+                continue
+            seen.add(node)
+            levels.add(self._level[node])
+            todo.append(self._low[node])
+            todo.append(self._high[node])
+        return levels
+
+    def probability(self, f, probabilities):
+        """
+        Returns the probability of `f` being true, given the probability of
+        each variable being true, by level, assuming they are independent.
+        """
+        memo = {FALSE: 0.0, TRUE: 1.0}
+
+        def probability(node):
+            result = memo.get(node)
+            if result is None:
+                p = probabilities[self._level[node]]
+                result = memo[node] = (
+                    (1.0 - p) * probability(self._low[node]) +
+                    p * probability(self._high[node]))
+            return result
+
+        return probability(f)
+
+    def count(self, f):
+        """
+        Returns the number of satisfying assignments of `f` over all `nvars`
+        variables.
+        """
+        levels = self._level
+        memo = {FALSE: 0, TRUE: 1}
+
+        def count(node):
+            result = memo.get(node)
+            if result is None:
+                level = levels[node]
+                low, high = self._low[node], self._high[node]
+                result = ((count(low) << (levels[low] - level - 1)) +
+                          (count(high) << (levels[high] - level - 1)))
+                memo[node] = result
+            return result
+
+        return count(f) << levels[f]
+
+    def prime_implicants(self, f):
+        """
+        Returns the prime implicants of `f` as a list of cubes, computed
+        recursively on the diagram: the primes of a node are the primes of the
+        conjunction of its cofactors plus the primes of each cofactor which are
+        not also primes of that conjunction, extended with the node's literal.
+        """
+        nvars = self.nvars
+        memo = {}
+
+        def primes(node):
+            result = memo.get(node)
+            if result is not None:
+                return result
+            if node == FALSE:
+                result = []
+            elif node == TRUE:
+                result = [(None,) * nvars]
+            else:
+                level = self._level[node]
+                low, high = self._low[node], self._high[node]
+                shared = primes(self.conjoin(low, high))
+                result = list(shared)
+                shared = set(shared)
+                for truth, cofactor in ((0, low), (1, high)):
+                    for prime in primes(cofactor):
+                        if prime not in shared:
+                            prime = list(prime)
+                            prime[level] = truth
+                            result.append(tuple(prime))
+            memo[node] = result
+            return result
+
+        return primes(f)
+
+    def cover(self, f, prime_implicants=None, costs=None, dont_care=FALSE):
+        """
+        Returns a minimized cover of `f` as a list of cubes.  Essential prime
+        implicants are selected first, then prime implicants are added greedily
+        by the number of uncovered minterms they cover until `f` is covered.
+        Minterm counts are taken from the diagram, so the on-set is never
+        enumerated.  The prime implicants are computed from the diagram unless
+        they are passed in.
+
+        `dont_care` is a function whose minterms may be covered or not, as
+        convenient.  Prime implicants are then those of the disjunction of `f`
+        and `dont_care`.
+
+        If `costs`, a sequence of the cost of evaluating each variable by
+        level, is given, implicants are chosen by the number of uncovered
+        minterms they cover per unit of cost instead.
+        """
+        if prime_implicants is None:
+            prime_implicants = self.prime_implicants(
+                self.disjoin(f, dont_care))
+        primes = [(prime, self.cube(prime)) for prime in prime_implicants]
+
+        # find essential implicants, ie those covering part of f not covered
+        # by all the others
+        n = len(primes)
+        before = [FALSE] * (n + 1)
+        after = [FALSE] * (n + 1)
+        for i in xrange(n):
+            before[i + 1] = self.disjoin(before[i], primes[i][1])
+            after[n - i - 1] = self.disjoin(after[n - i], primes[n - i - 1][1])
+
+        solution = []
+        candidates = []
+        for i, (prime, node) in enumerate(primes):
+            others = self.disjoin(before[i], after[i + 1])
+            if self.conjoin(self.conjoin(node, f),
+                            self.negate(others)) != FALSE:
+                solution.append((prime, node))
+            else:
+                candidates.append((prime, node))
+
+        uncovered = f
+        for _, node in solution:
+            uncovered = self.conjoin(uncovered, self.negate(node))
+
+        # Add enough non-essential implicants to cover the rest of f
+        while uncovered != FALSE:
+            max_covered = 0
+            leading = None
+            for candidate in candidates:
+                covered = self.count(self.conjoin(candidate[1], uncovered))
+                if costs is not None and covered:
+                    cost = sum([cost for truth, cost
+                                in zip(candidate[0], costs)
+                                if truth is not None])
+                    covered /= float(cost) or 1e-9
+                if covered > max_covered:
+                    max_covered = covered
+                    leading = candidate
+            solution.append(leading)
+            candidates.remove(leading)
+            uncovered = self.conjoin(uncovered, self.negate(leading[1]))
+
+        return [prime for prime, _ in solution]
+
+
+class _ComputedTable(object):
+    """
+    Direct mapped cache for the results of `BDD.ite`.  Each key hashes to a
+    single slot, so storing a new result evicts whatever the slot held before.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.keys = [None] * size
+        self.values = [None] * size
+
+    def get(self, key):
+        slot = hash(key) % self.size
+        if self.keys[slot] == key:
+            return self.values[slot]
+
+    def put(self, key, value):
+        slot = hash(key) % self.size
+        self.keys[slot] = key
+        self.values[slot] = value
+
+
+def order_propositions(expression, heuristic='appearance'):
+    """
+    Returns the propositions of an `_ASTExpression` in the order in which they
+    should be assigned to levels of a diagram.  The 'appearance' heuristic
+    orders propositions by their first occurrence in a depth first traversal
+    of the expression, which keeps related propositions close together.  The
+    'frequency' heuristic puts the most often referenced propositions at the
+    top of the diagram, breaking ties by appearance.
+    """
+    mapping = expression.propositions_mapping
+    appearance = []
+    frequency = {}
+
+    def crawl(node):
+        if isinstance(node, ast.BoolOp):
+            for value in node.values:
+                crawl(value)
+        elif isinstance(node, ast.UnaryOp):
+            crawl(node.operand)
+        elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitXor):
+            crawl(node.left)
+            crawl(node.right)
+        else:
+            proposition = mapping[node]
+            if proposition not in frequency:
+                appearance.append(proposition)
+                frequency[proposition] = 0
+            frequency[proposition] += 1
+
+    crawl(expression.node)
+    if heuristic == 'appearance':
+        return appearance
+    elif heuristic == 'frequency':
+        return sorted(appearance, key=lambda p: -frequency[p])
+    raise ValueError("Unknown ordering heuristic: %s" % heuristic)
+
+
+def compile_expression(expression, order='appearance'):
+    """
+    Compiles an `_ASTExpression` into a diagram.  `order` is either the name
+    of an ordering heuristic accepted by `order_propositions` or a sequence of
+    the expression's propositions.  Returns a tuple of the manager, the root
+    node and the propositions in level order.
+    """
+    if isinstance(order, basestring):
+        order = order_propositions(expression, order)
+    levels = dict([(proposition, level)
+                   for level, proposition in enumerate(order)])
+    bdd = BDD(len(order))
+    mapping = expression.propositions_mapping
+    node = _compile(bdd, expression, lambda node: levels[mapping[node]])
+    return bdd, node, list(order)
+
+
+def compile_into(manager, expression, propositions):
+    """
+    Compiles an `_ASTExpression` into an existing diagram, given the
+    propositions of the diagram's levels, as returned by
+    `compile_expression`.  Propositions are matched by their source code.
+    Raises `KeyError` for propositions which have no level.
+    """
+    levels = dict([(codegen.to_source(proposition), level)
+                   for level, proposition in enumerate(propositions)])
+    mapping = expression.propositions_mapping
+    return _compile(manager, expression, lambda node: levels[
+        codegen.to_source(mapping[node])])
+
+
+def _compile(bdd, expression, level):
+    mapping = expression.propositions_mapping
+
+    def compile_node(node):
+        if isinstance(node, ast.BoolOp):
+            if isinstance(node.op, ast.And):
+                result, combine = TRUE, bdd.conjoin
+            else:
+                result, combine = FALSE, bdd.disjoin
+            for value in node.values:
+                result = combine(result, compile_node(value))
+            return result
+        elif isinstance(node, ast.UnaryOp):
+            return bdd.negate(compile_node(node.operand))
+        elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitXor):
+            return bdd.xor(compile_node(node.left), compile_node(node.right))
+        source = codegen.to_source(mapping[node])
+        if source == 'True':
+            return TRUE
+        elif source == 'False':
+            return FALSE
+        return bdd.var(level(node))
+
+    return compile_node(expression.node)
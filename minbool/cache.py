@@ -0,0 +1,52 @@
+#
+# Bounded caches for minimization results.
+#
+import collections
+
+
+class LRUCache(object):
+    """
+    A dictionary like cache holding at most `maxsize` entries.  When full,
+    storing a new entry evicts the least recently used ones.  `hits` and
+    `misses` count the outcomes of `get`.
+
+    If `weigh` is given, it is called with each value to find its size, and
+    `maxsize` bounds the total size of the values instead of their number.
+    """
+
+    def __init__(self, maxsize=1024, weigh=None):
+        self.maxsize = maxsize
+        self.weigh = weigh
+        self.entries = collections.OrderedDict()
+        self.size = 0
+        self.hits = self.misses = 0
+
+    def get(self, key, default=None):
+        try:
+            value = self.entries.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        self.entries[key] = value  # Now the most recently used
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if key in self.entries:
+            self.size -= self._weight(self.entries.pop(key))
+        self.entries[key] = value
+        self.size += self._weight(value)
+        while self.size > self.maxsize:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= self._weight(evicted)
+
+    def _weight(self, value):
+        if self.weigh is None:
+            return 1
+        return self.weigh(value)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
@@ -197,9 +197,10 @@ class SourceGenerator(NodeVisitor):
                 self.write(':')
                 self.body(node.body)
             else:
-                self.newline()
-                self.write('else:')
-                self.body(else_)
+                if else_:
+                    self.newline()
+                    self.write('else:')
+                    self.body(else_)
                 break
 
     def visit_For(self, node):
@@ -304,6 +305,7 @@ class SourceGenerator(NodeVisitor):
                 self.write(' from ')
                 self.visit(node.cause)
         elif hasattr(node, 'type') and node.type is not None:
+            self.write(' ')
             self.visit(node.type)
             if node.inst is not None:
                 self.write(', ')
@@ -405,9 +407,9 @@ class SourceGenerator(NodeVisitor):
 
     def visit_Compare(self, node):
         self.write('(')
-        self.write(node.left)
+        self.visit(node.left)
         for op, right in zip(node.ops, node.comparators):
-            self.write(' %s %%' % CMPOP_SYMBOLS[type(op)])
+            self.write(' %s ' % CMPOP_SYMBOLS[type(op)])
             self.visit(right)
         self.write(')')
 
@@ -524,3 +526,68 @@ class SourceGenerator(NodeVisitor):
                 self.visit(node.name)
         self.write(':')
         self.body(node.body)
+
+
+def to_bitwise_source(node):
+    """Converts a boolean expression tree to source code using the bitwise
+    operators `&`, `|` and `~` in place of `and`, `or` and `not`.  Unlike the
+    boolean operators these can be overloaded, so the result can be evaluated
+    elementwise over numpy arrays or passed to pandas' `DataFrame.eval` and
+    `DataFrame.query`.  Operands are parenthesized where the higher precedence
+    of the bitwise operators would otherwise change their meaning.
+    """
+    generator = BitwiseSourceGenerator(' ' * 4)
+    generator.visit(node)
+    return ''.join(generator.result)
+
+
+class BitwiseSourceGenerator(SourceGenerator):
+    """Source generator for boolean expressions written with bitwise
+    operators.  See `to_bitwise_source`.
+    """
+
+    def operand(self, node):
+        if isinstance(node, (BinOp, IfExp, Lambda)):
+            self.write('(')
+            self.visit(node)
+            self.write(')')
+        else:
+            self.visit(node)
+
+    def visit_BoolOp(self, node):
+        symbol = isinstance(node.op, And) and '&' or '|'
+        self.write('(')
+        for idx, value in enumerate(node.values):
+            if idx:
+                self.write(' %s ' % symbol)
+            self.operand(value)
+        self.write(')')
+
+    def visit_BinOp(self, node):
+        if not isinstance(node.op, BitXor):
+            return SourceGenerator.visit_BinOp(self, node)
+        operands = []
+        while isinstance(node, BinOp) and isinstance(node.op, BitXor):
+            operands.insert(0, node.right)
+            node = node.left
+        operands.insert(0, node)
+        self.write('(')
+        for idx, value in enumerate(operands):
+            if idx:
+                self.write(' ^ ')
+            self.operand(value)
+        self.write(')')
+
+    def visit_Call(self, node):
+        # Elementwise operands are already boolean
+        if (isinstance(node.func, Name) and node.func.id == 'bool' and
+            len(node.args) == 1 and not node.keywords):
+            return self.operand(node.args[0])
+        return SourceGenerator.visit_Call(self, node)
+
+    def visit_UnaryOp(self, node):
+        if not isinstance(node.op, Not):
+            return SourceGenerator.visit_UnaryOp(self, node)
+        self.write('(~')
+        self.operand(node.operand)
+        self.write(')')
@@ -0,0 +1,282 @@
+#
+# Compact storage and binary serialization of minimized expressions.
+#
+import array
+import ast
+import struct
+import sys
+
+import codegen
+
+# Serialized form: a header, if the expression is approximate its error as a
+# little endian double, the names, padded to a multiple of four bytes,
+# the cubes as little endian 32 bit words, `width` words of value then
+# `width` words of mask per cube, and if present the order of the literals
+# of each cube as 16 bit indexes.
+MAGIC = 'MBX'
+VERSION = 1
+_HEADER = struct.Struct('<3sBBBII')  # magic, version, form, flags, N, count
+
+_FORMS = ('sop', 'pos', 'esop')
+
+# Flags
+_AST = 1
+_FACTORED = 2
+_ORDERED = 4
+_ERROR = 8
+
+_DOUBLE = struct.Struct('<d')
+
+
+class CompactExpression(object):
+    """
+    A minimized expression stored compactly, for caching many results in
+    memory or sending them between processes.  `names` is a tuple of strings,
+    for an `ASTBooleanExpression` the source code of its propositions, and
+    `cubes` a `Cubes` holding the implicants of the solution as `(value,
+    mask)` pairs of integers.  `error` is the error of an approximate
+    expression, as for `synthesize`.  Calling `expand` gives back the full
+    expression.
+    """
+    __slots__ = ('names', 'form', 'flags', 'cubes', 'order', 'error')
+
+    def __init__(self, names, form, flags, cubes, order=None, error=0):
+        self.names = names
+        self.form = form
+        self.flags = flags
+        self.cubes = cubes
+        self.order = order
+        self.error = error
+
+    def __len__(self):
+        return len(self.cubes)
+
+    def __call__(self, *args):
+        if len(args) != len(self.names):
+            raise ValueError("Wrong number of arguments")
+        i = 0
+        for arg in args:
+            i = (i << 1) | int(bool(arg))
+        matches = [True for value, mask in self.cubes
+                   if i & ~mask == value]
+        if self.form == 'esop':
+            return len(matches) % 2 == 1
+        return bool(matches) != (self.form == 'pos')
+
+    def __str__(self):
+        return str(self.expand())
+
+    def __reduce__(self):
+        return loads, (dumps(self),)
+
+    def expand(self):
+        """
+        Returns the full `BooleanExpression` or `ASTBooleanExpression`.
+        """
+        from minbool import ASTBooleanExpression
+        from minbool import BooleanExpression
+        N = len(self.names)
+        solution = [_implicant(cube, N) for cube in self.cubes]
+        if self.flags & _AST:
+            names = tuple([ast.parse(name, mode='eval').body
+                           for name in self.names])
+            result = ASTBooleanExpression(names, solution, self.form)
+            result.factored = bool(self.flags & _FACTORED)
+        else:
+            result = BooleanExpression(self.names, solution, self.form)
+        if self.order is not None:
+            result.order = [list(self.order[k * N:(k + 1) * N])
+                            for k in xrange(len(solution))]
+        if self.error:
+            result.error = self.error
+        return result
+
+
+class Cubes(object):
+    """
+    A sequence of `(value, mask)` pairs read from `width` 32 bit words each
+    of `data`, an `array` or any object supporting the buffer interface, eg
+    a string, `buffer` or `mmap`, starting at `offset`.  Nothing is copied,
+    cubes are decoded as they are accessed.
+    """
+    __slots__ = ('data', 'offset', 'count', 'width')
+
+    def __init__(self, data, offset, count, width):
+        self.data = data
+        self.offset = offset
+        self.count = count
+        self.width = width
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, k):
+        if k < 0:
+            k += self.count
+        if not 0 <= k < self.count:
+            raise IndexError(k)
+        width = self.width
+        words = struct.unpack_from('<%dI' % (2 * width), self.data,
+                                   self.offset + k * 8 * width)
+        return _join(words[:width]), _join(words[width:])
+
+    def __iter__(self):
+        for k in xrange(self.count):
+            yield self[k]
+
+    @property
+    def nbytes(self):
+        return self.count * 8 * self.width
+
+
+def compact(expression):
+    """
+    Converts a `BooleanExpression` or `ASTBooleanExpression` to a
+    `CompactExpression`.
+    """
+    if isinstance(expression, CompactExpression):
+        return expression
+    N = len(expression.names)
+    width = _width(N)
+    words = array.array('I')
+    for implicant in expression.solution:
+        value = mask = 0
+        for truth in implicant:
+            value <<= 1
+            mask <<= 1
+            if truth is None:
+                mask |= 1
+            elif truth:
+                value |= 1
+        words.extend(_split(value, width))
+        words.extend(_split(mask, width))
+    if sys.byteorder == 'big':
+        words.byteswap()
+
+    flags = 0
+    names = expression.names
+    if names and not isinstance(names[0], basestring):
+        flags |= _AST
+        names = [codegen.to_source(name) for name in names]
+    if getattr(expression, 'factored', False):
+        flags |= _FACTORED
+    order = None
+    if expression.order is not None:
+        flags |= _ORDERED
+        order = array.array('H')
+        for term in expression.order:
+            order.extend(term)
+    error = getattr(expression, 'error', 0)
+    if error:
+        flags |= _ERROR
+
+    return CompactExpression(
+        tuple(names), expression.form, flags,
+        Cubes(words, 0, len(expression.solution), width), order, error)
+
+
+def dumps(expression):
+    """
+    Serializes a full or compact expression to a string.
+    """
+    expression = compact(expression)
+    names = [isinstance(name, unicode) and name.encode('utf-8') or name
+             for name in expression.names]
+    chunks = [_HEADER.pack(MAGIC, VERSION, _FORMS.index(expression.form),
+                           expression.flags, len(names),
+                           len(expression.cubes))]
+    if expression.flags & _ERROR:
+        chunks.append(_DOUBLE.pack(expression.error))
+    for name in names:
+        chunks.append(struct.pack('<H', len(name)))
+        chunks.append(name)
+    size = sum([len(chunk) for chunk in chunks])
+    chunks.append('\0' * (-size % 4))
+
+    cubes = expression.cubes
+    if isinstance(cubes.data, array.array) and not cubes.offset:
+        chunks.append(cubes.data.tostring())
+    else:
+        chunks.append(_read(cubes.data, cubes.offset, cubes.nbytes))
+    if expression.order is not None:
+        order = array.array('H', expression.order)
+        if sys.byteorder == 'big':
+            order.byteswap()
+        chunks.append(order.tostring())
+    return ''.join(chunks)
+
+
+def loads(data, offset=0):
+    """
+    Reads an expression serialized by `dumps` from `data`, a string or any
+    object supporting the buffer interface, eg an `mmap`, at `offset`.  The
+    cubes of the result refer to `data` rather than a copy of it.  Raises
+    `ValueError` for data which isn't in a known version of the format.
+    """
+    try:
+        magic, version, form, flags, N, count = _HEADER.unpack_from(
+            data, offset)
+        if magic != MAGIC:
+            raise ValueError("Not a serialized expression")
+        if version != VERSION:
+            raise ValueError("Unsupported version: %d" % version)
+
+        position = offset + _HEADER.size
+        error = 0
+        if flags & _ERROR:
+            error, = _DOUBLE.unpack_from(data, position)
+            position += _DOUBLE.size
+        names = []
+        for _ in xrange(N):
+            length, = struct.unpack_from('<H', data, position)
+            names.append(_read(data, position + 2, length))
+            position += 2 + length
+        position += -(position - offset) % 4
+
+        cubes = Cubes(data, position, count, _width(N))
+        position += cubes.nbytes
+        order = None
+        if flags & _ORDERED:
+            order = array.array('H', _read(data, position, 2 * N * count))
+            if sys.byteorder == 'big':
+                order.byteswap()
+        elif len(data) < position:
+            raise struct.error()
+    except struct.error:
+        raise ValueError("Truncated data")
+
+    return CompactExpression(
+        tuple(names), _FORMS[form], flags, cubes, order, error)
+
+
+def _read(data, position, length):
+    # Copies `length` bytes of a buffer to a string
+    return struct.unpack_from('%ds' % length, data, position)[0]
+
+
+def _width(N):
+    # Number of 32 bit words per value or mask
+    return max((N + 31) // 32, 1)
+
+
+def _split(n, width):
+    return [(n >> (32 * j)) & 0xffffffff for j in xrange(width)]
+
+
+def _join(words):
+    n = 0
+    for j, word in enumerate(words):
+        n |= word << (32 * j)
+    return n
+
+
+def _implicant(cube, N):
+    value, mask = cube
+    implicant = []
+    for k in xrange(N):
+        bit = 1 << (N - 1 - k)
+        if mask & bit:
+            implicant.append(None)
+        else:
+            implicant.append(int(bool(value & bit)))
+    return tuple(implicant)
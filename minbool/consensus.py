@@ -0,0 +1,147 @@
+#
+# Prime implicant generation by iterated consensus on a cube cover.
+#
+import ast
+import codegen
+
+
+def cube_cover(expression, propositions, truth=True):
+    """
+    Converts an `_ASTExpression`, or its complement if `truth` is False, into
+    a sum of products, returned as a list of cubes.  Each cube is a tuple of
+    1, 0 or None values indexed like `propositions`, which are matched by
+    their source code.  Negations are pushed down to the propositions,
+    products are expanded and cubes contained in other cubes are absorbed as
+    the cover is built up.
+    """
+    mapping = expression.propositions_mapping
+    positions = dict([(codegen.to_source(proposition), i)
+                      for i, proposition in enumerate(propositions)])
+    sources = dict([(proposition, codegen.to_source(proposition))
+                    for proposition in set(mapping.values())])
+    N = len(propositions)
+
+    def cover(node, truth):
+        if isinstance(node, ast.UnaryOp):
+            return cover(node.operand, not truth)
+        elif isinstance(node, ast.BoolOp):
+            # De Morgan: a negated conjunction is a disjunction and vice versa
+            if isinstance(node.op, ast.And) == truth:
+                result = [(None,) * N]
+                for value in node.values:
+                    result = _product(result, cover(value, truth))
+            else:
+                result = []
+                for value in node.values:
+                    result.extend(cover(value, truth))
+            return _absorb(result)
+        elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitXor):
+            # Exclusive or: a and not b or not a and b, or when negated
+            # a and b or not a and not b
+            return _absorb(
+                _product(cover(node.left, True),
+                         cover(node.right, not truth)) +
+                _product(cover(node.left, False), cover(node.right, truth)))
+        source = sources[mapping[node]]
+        if source in ('True', 'False'):
+            # A constant is the empty cube where it holds, else no cube
+            if (source == 'True') == truth:
+                return [(None,) * N]
+            return []
+        cube = [None] * N
+        cube[positions[source]] = int(truth)
+        return [tuple(cube)]
+
+    return cover(expression.node, truth)
+
+
+def prime_implicants(cubes):
+    """
+    Derives all prime implicants of the function covered by `cubes` by
+    iterated consensus: the consensus of every pair of cubes which conflict in
+    exactly one variable is added to the cover, absorbing any cubes it
+    contains, until no new cubes can be produced.
+    """
+    cubes = _absorb(cubes)
+    pending = [(i, j) for i in xrange(len(cubes)) for j in xrange(i)]
+    while pending:
+        i, j = pending.pop()
+        if cubes[i] is None or cubes[j] is None:
+            continue
+        cube = _consensus(cubes[i], cubes[j])
+        if cube is None:
+            continue
+        if [other for other in cubes
+            if other is not None and _contains(other, cube)]:
+            continue
+        for k, other in enumerate(cubes):
+            if other is not None and _contains(cube, other):
+                cubes[k] = None
+        cubes.append(cube)
+        k = len(cubes) - 1
+        pending.extend([(k, i) for i in xrange(k) if cubes[i] is not None])
+
+    return [cube for cube in cubes if cube is not None]
+
+
+def _product(cubes1, cubes2):
+    result = []
+    for cube1 in cubes1:
+        for cube2 in cubes2:
+            cube = _intersect(cube1, cube2)
+            if cube is not None:
+                result.append(cube)
+    return result
+
+
+def _intersect(cube1, cube2):
+    cube = []
+    for t1, t2 in zip(cube1, cube2):
+        if t1 is None:
+            cube.append(t2)
+        elif t2 is None or t1 == t2:
+            cube.append(t1)
+        else:
+            return None
+    return tuple(cube)
+
+
+def _consensus(cube1, cube2):
+    cube = []
+    conflicts = 0
+    for t1, t2 in zip(cube1, cube2):
+        if t1 is None:
+            cube.append(t2)
+        elif t2 is None or t1 == t2:
+            cube.append(t1)
+        elif conflicts:
+            return None
+        else:
+            conflicts += 1
+            cube.append(None)
+    if conflicts:
+        return tuple(cube)
+
+
+def _contains(cube1, cube2):
+    # True if every minterm of cube2 is also in cube1
+    for t1, t2 in zip(cube1, cube2):
+        if t1 is not None and t1 != t2:
+            return False
+    return True
+
+
+def _absorb(cubes):
+    result = []
+    for cube in sorted(set(cubes), key=_size, reverse=True):
+        for other in result:
+            if _contains(other, cube):
+                break
+        else:
+            result.append(cube)
+    return result
+
+
+def _size(cube):
+    # The number of don't cares, larger cubes have more
+    return cube.count(None)
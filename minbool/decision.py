@@ -0,0 +1,178 @@
+#
+# Decision tree code generation for minimized boolean expressions.
+#
+import ast
+import keyword
+import math
+import re
+
+import bdd
+import codegen
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+class DecisionTree(object):
+    """
+    A decision tree equivalent to a boolean expression, which tests each of
+    the expression's arguments at most once along any path.  Calling the tree
+    evaluates it like the expression it was built from.  The `source`
+    attribute holds Python source for a function implementing the tree with
+    nested `if` statements.
+
+    Sub-trees for identical sub-functions are shared, so `size`, the number of
+    distinct tests, counts the nodes of a decision DAG.  In `source`, shared
+    sub-trees are nested functions called wherever they are reached.
+    """
+    _function = None
+
+    def __init__(self, names, root, size):
+        self.names = names
+        self.root = root
+        self.size = size
+        self.source = codegen.to_source(self._make_ast())
+
+    def __call__(self, *args):
+        if self._function is None:
+            namespace = {}
+            exec compile(self.source, '<decision tree>', 'exec') in namespace
+            self._function = namespace['decide']
+        return self._function(*args)
+
+    def _make_ast(self):
+        names = _local_names(self.names)
+
+        def load(name):
+            return ast.Name(name, ast.Load())
+
+        # Sub-trees reached from more than one test are emitted once, as
+        # nested functions, so the source grows with the size of the DAG
+        # rather than of the tree
+        references = {}
+
+        def count(node):
+            if node[0] == 'leaf':
+                return
+            references[id(node)] = references.get(id(node), 0) + 1
+            if references[id(node)] == 1:
+                count(node[2])
+                count(node[3])
+
+        count(self.root)
+        helpers = []
+        shared = {}
+
+        def emit(node, inline=False):
+            if node[0] == 'leaf':
+                return [ast.Return(load(str(node[1])))]
+            if references[id(node)] > 1 and not inline:
+                name = shared.get(id(node))
+                if name is None:
+                    name = shared[id(node)] = '_node%d' % len(shared)
+                    helpers.append(ast.FunctionDef(
+                        name, ast.arguments([], None, None, []),
+                        emit(node, True), []))
+                return [ast.Return(ast.Call(load(name), [], [], None, None))]
+            _, i, high, low = node
+            return [ast.If(load(names[i]), emit(high), emit(low))]
+
+        check = ast.If(
+            ast.Compare(ast.Call(load('len'), [load('args')], [], None, None),
+                        [ast.NotEq()], [ast.Num(len(names))]),
+            [ast.Raise(ast.Call(load('ValueError'),
+                                [ast.Str("Wrong number of arguments")],
+                                [], None, None), None, None)],
+            [])
+        unpack = ast.Assign(
+            [ast.Tuple([ast.Name(name, ast.Store()) for name in names],
+                       ast.Store())],
+            load('args'))
+        body = emit(self.root)
+        return ast.FunctionDef(
+            'decide', ast.arguments([], 'args', None, []),
+            [check, unpack] + helpers + body, [])
+
+
+def build(expression, probabilities=None):
+    """
+    Builds a `DecisionTree` from a minimized `BooleanExpression`.  At each
+    node the argument tested is the one with the highest information gain
+    about the value of the expression, given `probabilities`, a list of the
+    probability of each argument being true.  Arguments are assumed to be
+    independent and true half of the time by default.
+    """
+    N = len(expression.names)
+    if probabilities is None:
+        probabilities = [0.5] * N
+    manager = bdd.BDD(N)
+    root = to_bdd(manager, expression)
+    nodes = {}
+
+    def tree(f):
+        if f == bdd.FALSE:
+            return ('leaf', False)
+        elif f == bdd.TRUE:
+            return ('leaf', True)
+        result = nodes.get(f)
+        if result is not None:
+            return result
+
+        entropy = _entropy(manager.probability(f, probabilities))
+        best = None
+        best_gain = -1.0
+        for level in sorted(manager.support(f)):
+            p = probabilities[level]
+            high = manager.restrict(f, level, True)
+            low = manager.restrict(f, level, False)
+            gain = entropy - (
+                p * _entropy(manager.probability(high, probabilities)) +
+                (1.0 - p) * _entropy(manager.probability(low, probabilities)))
+            if gain > best_gain + 1e-12:
+                best, best_gain = (level, high, low), gain
+
+        level, high, low = best
+        result = nodes[f] = ('test', level, tree(high), tree(low))
+        return result
+
+    return DecisionTree(expression.names, tree(root), len(nodes))
+
+
+def to_bdd(manager, expression):
+    """
+    Compiles the solution of a `BooleanExpression` into a diagram of
+    `manager`, with levels following the order of the expression's names.
+    """
+    f = bdd.FALSE
+    combine = manager.disjoin
+    if expression.form == 'esop':
+        combine = manager.xor
+    for implicant in expression.solution:
+        f = combine(f, manager.cube(implicant))
+    if expression.form == 'pos':
+        f = manager.negate(f)
+    return f
+
+
+def _entropy(p):
+    if p <= 0.0 or p >= 1.0:
+        return 0.0
+    return -(p * math.log(p, 2) + (1.0 - p) * math.log(1.0 - p, 2))
+
+
+def _local_names(names):
+    """
+    Chooses names for the local variables holding the arguments: the
+    expression's own names if they are distinct identifiers, otherwise
+    generated ones.
+    """
+    names = [isinstance(name, basestring) and name or codegen.to_source(name)
+             for name in names]
+    reserved = set(['args', 'len', 'ValueError', 'True', 'False', 'None'])
+    for name in names:
+        if (not _IDENTIFIER.match(name) or keyword.iskeyword(name) or
+            name in reserved or name.startswith('_node')):
+            break
+    else:
+        if len(set(names)) == len(names):
+            return names
+    return ['_%d' % i for i in xrange(len(names))]
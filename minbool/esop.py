@@ -0,0 +1,149 @@
+#
+# Exclusive sum of products minimization.
+#
+
+# Number of variables up to which every polarity is tried
+_EXHAUSTIVE = 8
+
+
+def minimize(values, N):
+    """
+    Finds an exclusive sum of products, a list of cubes whose exclusive or is
+    the function, given `values`, a sequence of the function's truth values
+    indexed like the rows of a truth table.  Each cube is a tuple of 1, 0 or
+    None values.
+
+    The fixed polarity Reed-Muller form with the fewest terms is found first:
+    every polarity is tried for up to `_EXHAUSTIVE` variables, beyond which
+    polarities are improved one variable at a time.  Pairs of terms which
+    differ in a single variable are then merged into one until no more merges
+    are possible.  Parity like functions, which have exponentially many terms
+    as a sum of products, have as many terms as variables in this form.
+    """
+    spectrum = bytearray(values)
+    for k in xrange(N):
+        _davio(spectrum, 1 << k)
+
+    best = (_weight(spectrum), 0)
+    polarity = 0
+    if N <= _EXHAUSTIVE:
+        # Visit every polarity in Gray code order, so each step flips one
+        # variable
+        for step in xrange(1, 2**N):
+            bit = step & -step
+            _flip(spectrum, bit)
+            polarity ^= bit
+            best = min(best, (_weight(spectrum), polarity))
+    else:
+        improved = True
+        while improved:
+            improved = False
+            for k in xrange(N):
+                bit = 1 << k
+                _flip(spectrum, bit)
+                weight = _weight(spectrum)
+                if weight < best[0]:
+                    polarity ^= bit
+                    best = (weight, polarity)
+                    improved = True
+                else:
+                    _flip(spectrum, bit)
+
+    # Recompute spectrum for the best polarity
+    _, best_polarity = best
+    for k in xrange(N):
+        bit = 1 << k
+        if (polarity ^ best_polarity) & bit:
+            _flip(spectrum, bit)
+
+    cubes = []
+    for index, coefficient in enumerate(spectrum):
+        if coefficient:
+            cubes.append(_cube(index, best_polarity, N))
+    return merge(cubes)
+
+
+def merge(cubes):
+    """
+    Reduces an exclusive sum of products by cancelling pairs of identical
+    cubes and merging pairs of cubes which differ in one variable, eg
+    `A and B ^ not A and B` is `B` and `A and B ^ B` is `not A and B`.
+    """
+    cubes = list(cubes)
+    merged = True
+    while merged:
+        merged = False
+        for i in xrange(len(cubes)):
+            for j in xrange(i):
+                cube = _merge(cubes[i], cubes[j])
+                if cube is None:
+                    continue
+                del cubes[i]
+                del cubes[j]
+                if cube is not _CANCELLED:
+                    cubes.append(cube)
+                merged = True
+                break
+            if merged:
+                break
+    return sorted(cubes, key=_key)
+
+
+_CANCELLED = object()
+
+
+def _merge(cube1, cube2):
+    position = None
+    for i, (t1, t2) in enumerate(zip(cube1, cube2)):
+        if t1 != t2:
+            if position is not None:
+                return None
+            position = i
+    if position is None:
+        return _CANCELLED
+
+    t1, t2 = cube1[position], cube2[position]
+    if t1 is None:
+        truth = int(not t2)
+    elif t2 is None:
+        truth = int(not t1)
+    else:
+        truth = None  # x ^ not x is always true
+    cube = list(cube1)
+    cube[position] = truth
+    return tuple(cube)
+
+
+def _key(cube):
+    # Orders cubes by their literals, in the order of the variables
+    return [(truth is None, truth) for truth in cube]
+
+
+def _davio(spectrum, bit):
+    # Positive Davio expansion in the variable for `bit`: f = f0 ^ x (f0 ^ f1)
+    for i in xrange(len(spectrum)):
+        if i & bit:
+            spectrum[i] ^= spectrum[i ^ bit]
+
+
+def _flip(spectrum, bit):
+    # Switches the polarity of the variable for `bit`, as
+    # c0 ^ x c1 == (c0 ^ c1) ^ not(x) c1
+    for i in xrange(len(spectrum)):
+        if not i & bit:
+            spectrum[i] ^= spectrum[i | bit]
+
+
+def _weight(spectrum):
+    return len(spectrum) - spectrum.count('\x00')
+
+
+def _cube(index, polarity, N):
+    cube = []
+    for k in xrange(N - 1, -1, -1):
+        bit = 1 << k
+        if not index & bit:
+            cube.append(None)
+        else:
+            cube.append(int(not polarity & bit))
+    return tuple(cube)
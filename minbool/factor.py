@@ -0,0 +1,197 @@
+#
+# Multi-level algebraic factoring of sums of products.
+#
+import ast
+
+# A sum of products is represented as a list of cubes, each cube being a
+# frozenset of literals.  A literal is an `(index, truth)` pair referring to a
+# position in an implicant.  Factored forms are trees of tuples:
+# ('or', children), ('and', children) or ('literal', index, truth).
+
+
+def from_solution(solution):
+    """
+    Converts a list of implicants to a sum of products.
+    """
+    cubes = []
+    for implicant in solution:
+        cubes.append(frozenset([(i, truth) for i, truth in enumerate(implicant)
+                                if truth is not None]))
+    return cubes
+
+
+def divide(cubes, divisor):
+    """
+    Algebraic division.  Returns the quotient and remainder of dividing the sum
+    of products `cubes` by the sum of products `divisor`, such that `cubes` is
+    the sum of the remainder and the product of quotient and divisor, with no
+    literal shared between quotient and divisor.
+    """
+    quotient = None
+    for d in divisor:
+        q = set([cube - d for cube in cubes if d <= cube])
+        if quotient is None:
+            quotient = q
+        else:
+            quotient &= q
+        if not quotient:
+            return [], list(cubes)
+    quotient = sorted(quotient, key=_key)
+    product = set([q | d for q in quotient for d in divisor])
+    remainder = [cube for cube in cubes if cube not in product]
+    return quotient, remainder
+
+
+def kernels(cubes):
+    """
+    Returns the kernels of a sum of products: the cube free quotients of
+    dividing it by a cube.  The sum of products itself is included if it is
+    cube free.
+    """
+    found = {}
+
+    def find(cubes, start):
+        literals = _literals(cubes)
+        for literal in literals:
+            if start is not None and literal <= start:
+                continue
+            if len([cube for cube in cubes if literal in cube]) < 2:
+                continue
+            quotient = [cube - frozenset([literal]) for cube in cubes
+                        if literal in cube]
+            common = _common_cube(quotient)
+            # Skip kernels already found through an earlier literal
+            if [l for l in common if l < literal]:
+                continue
+            find([cube - common for cube in quotient], literal)
+        key = frozenset(cubes)
+        if len(cubes) > 1 and not _common_cube(cubes) and key not in found:
+            found[key] = sorted(cubes, key=_key)
+
+    find(cubes, None)
+    return found.values()
+
+
+def factor(cubes):
+    """
+    Factors a sum of products into a multi-level form.  The sum of products is
+    divided by whichever of its kernels saves the most literals, then the
+    quotient, divisor and remainder are factored recursively.  When no kernel
+    helps, the most frequent literal is factored out instead.
+    """
+    if not cubes:
+        return ('or', [])
+    if len(cubes) == 1:
+        return _cube(cubes[0])
+
+    common = _common_cube(cubes)
+    if common:
+        rest = [cube - common for cube in cubes]
+        if frozenset() in rest:
+            # Absorption: common alone is one of the cubes
+            return _cube(common)
+        return ('and', _cube(common)[1] + [factor(rest)])
+
+    size = _size(cubes)
+    best = None
+    best_savings = 0
+    for kernel in kernels(cubes):
+        if len(kernel) == len(cubes):
+            continue
+        quotient, remainder = divide(cubes, kernel)
+        savings = size - _size(quotient) - _size(kernel) - _size(remainder)
+        if savings > best_savings:
+            best, best_savings = (quotient, kernel, remainder), savings
+
+    if best is None:
+        counts = {}
+        for cube in cubes:
+            for literal in cube:
+                counts[literal] = counts.get(literal, 0) + 1
+        literal = min(counts, key=lambda l: (-counts[l], l))
+        if counts[literal] < 2:
+            return ('or', [_cube(cube) for cube in cubes])
+        divisor = [frozenset([literal])]
+        quotient, remainder = divide(cubes, divisor)
+        best = (quotient, divisor, remainder)
+
+    quotient, divisor, remainder = best
+    product = ('and', [factor(quotient), factor(divisor)])
+    if not remainder:
+        return product
+    return ('or', [product, factor(remainder)])
+
+
+def count_literals(tree):
+    """
+    Counts the literals in a factored form.
+    """
+    if tree[0] == 'literal':
+        return 1
+    return sum([count_literals(child) for child in tree[1]])
+
+
+def complement(tree):
+    """
+    Returns the complement of a factored form, by De Morgan's laws.
+    """
+    if tree[0] == 'literal':
+        _, i, truth = tree
+        return ('literal', i, int(not truth))
+    op = tree[0] == 'and' and 'or' or 'and'
+    return (op, [complement(child) for child in tree[1]])
+
+
+def to_ast(tree, propositions):
+    """
+    Converts a factored form to an ast, given the propositions that the
+    literal indexes refer to.
+    """
+    if tree[0] == 'literal':
+        _, i, truth = tree
+        if truth:
+            return propositions[i]
+        return ast.UnaryOp(ast.Not(), propositions[i])
+
+    values = []
+    op = tree[0]
+    for child in tree[1]:
+        child = to_ast(child, propositions)
+        # Flatten nested operations of the same kind
+        if isinstance(child, ast.BoolOp) and (
+            isinstance(child.op, ast.And) == (op == 'and')):
+            values.extend(child.values)
+        else:
+            values.append(child)
+    if len(values) == 1:
+        return values[0]
+    return ast.BoolOp(op == 'and' and ast.And() or ast.Or(), values)
+
+
+def _cube(cube):
+    return ('and', [('literal', i, truth) for i, truth in sorted(cube)])
+
+
+def _literals(cubes):
+    literals = set()
+    for cube in cubes:
+        literals |= cube
+    return sorted(literals)
+
+
+def _common_cube(cubes):
+    common = None
+    for cube in cubes:
+        if common is None:
+            common = cube
+        else:
+            common = common & cube
+    return common or frozenset()
+
+
+def _size(cubes):
+    return sum([len(cube) for cube in cubes])
+
+
+def _key(cube):
+    return sorted(cube)
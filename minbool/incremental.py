@@ -0,0 +1,278 @@
+#
+# Incremental maintenance of prime implicants and covers.
+#
+
+# Cubes are `(value, mask)` pairs of integers as in `minbool.stream`: a bit
+# set in `mask` marks a don't care position and `value` holds the remaining
+# bits.  Minterms are truth table row indexes, with the first variable as
+# the most significant bit.
+
+
+class IncrementalCover(object):
+    """
+    Keeps the prime implicants of a function of `N` variables and a cover of
+    its minterms up to date as rows of its truth table change.  `primes` is
+    the set of prime implicants of the minterms and don't cares, `solution`
+    the set of primes chosen to cover the minterms, and `coverage` maps each
+    minterm to the number of chosen primes covering it.
+
+    Changing a row only revisits the primes and chosen terms around it.  The
+    cover stays irredundant, but after many changes may have more terms than
+    covering from scratch would give, which `resolve` does from the current
+    primes.
+    """
+
+    def __init__(self, N, minterms=(), dont_cares=(), primes=None,
+                 solution=None):
+        self.N = N
+        self.on = set(minterms)
+        self.dont_cares = set(dont_cares) - self.on
+        if primes is None:
+            primes = set()
+            for i in self.on | self.dont_cares:
+                primes.update(self._primes_containing(i))
+        self.primes = set(primes)
+        if solution is None:
+            self.resolve()
+        else:
+            self.solution = set()
+            self.coverage = dict([(i, 0) for i in self.on])
+            for cube in solution:
+                self._choose(cube)
+
+    def add_minterm(self, i):
+        """
+        Makes the function true for row `i`.
+        """
+        self._set(i, True)
+
+    def remove_minterm(self, i):
+        """
+        Makes the function false for row `i`.
+        """
+        self._set(i, False)
+
+    def set_dont_care(self, i):
+        """
+        Makes row `i` a don't care.
+        """
+        self._set(i, None)
+
+    def resolve(self):
+        """
+        Chooses a new cover from the current prime implicants: essential
+        primes first, then greedily by the number of minterms covered.
+        """
+        self.solution = set()
+        self.coverage = dict([(i, 0) for i in self.on])
+        for i in self.on:
+            if self.coverage[i]:
+                continue
+            covering = [p for p in self.primes if _contains(p, (i, 0))]
+            if len(covering) == 1:
+                self._choose(covering[0])
+        self._cover([i for i in self.on if not self.coverage[i]])
+
+    def _set(self, i, truth):
+        i = self._index(i)
+        was_on = i in self.on
+        was_in = was_on or i in self.dont_cares
+        self.on.discard(i)
+        self.dont_cares.discard(i)
+        if truth:
+            self.on.add(i)
+        elif truth is None:
+            self.dont_cares.add(i)
+
+        if was_on and not truth:
+            del self.coverage[i]
+        elif truth and not was_on:
+            self.coverage[i] = len([cube for cube in self.solution
+                                    if _contains(cube, (i, 0))])
+
+        if truth is not False and not was_in:
+            self._grow(i)
+        elif truth is False and was_in:
+            self._shrink(i)
+
+        if truth and not was_on:
+            self._cover([i])
+        elif was_on and truth is None:
+            self._prune([cube for cube in self.solution
+                         if _contains(cube, (i, 0))])
+
+    def _grow(self, i):
+        # Row i joins the minterms and don't cares.  Every new prime contains
+        # i, and old primes contained in new ones are no longer prime.
+        new = self._primes_containing(i)
+        stale = [p for p in self.primes
+                 if [q for q in new if _contains(q, p)]]
+        self.primes.difference_update(stale)
+        self.primes.update(new)
+
+        replaced = []
+        for p in stale:
+            if p in self.solution:
+                self._unchoose(p)
+                q = [q for q in new if _contains(q, p)][0]
+                if q not in self.solution:
+                    self._choose(q)
+                    replaced.append(q)
+        self._prune(self._overlapping(replaced))
+
+    def _shrink(self, i):
+        # Row i leaves the minterms and don't cares.  Primes containing it
+        # are no longer implicants.  Every new prime is a half of one of
+        # those, split on a variable which excludes i, not contained in any
+        # other prime.
+        removed = [p for p in self.primes if _contains(p, (i, 0))]
+        self.primes.difference_update(removed)
+        halves = set()
+        for value, mask in removed:
+            bits = mask
+            while bits:
+                bit = bits & -bits
+                bits ^= bit
+                halves.add(((value | (~i & bit)), mask ^ bit))
+        for half in halves:
+            if not [q for q in self.primes | halves
+                    if q != half and _contains(q, half)]:
+                self.primes.add(half)
+
+        uncovered = []
+        for p in removed:
+            if p in self.solution:
+                self._unchoose(p)
+                uncovered.extend([m for m in _minterms(p)
+                                  if m in self.on and not self.coverage[m]])
+        self._cover(uncovered)
+
+    def _primes_containing(self, i):
+        # The maximal cubes of minterms and don't cares containing i
+        memo = {}
+
+        def implicant(value, mask):
+            result = memo.get((value, mask))
+            if result is None:
+                if not mask:
+                    result = value in self.on or value in self.dont_cares
+                else:
+                    bit = mask & -mask
+                    result = (implicant(value, mask ^ bit) and
+                              implicant(value | bit, mask ^ bit))
+                memo[(value, mask)] = result
+            return result
+
+        primes = []
+        seen = set([0])
+        stack = [0]
+        while stack:
+            mask = stack.pop()
+            extended = False
+            for k in xrange(self.N):
+                bit = 1 << k
+                if mask & bit:
+                    continue
+                bigger = mask | bit
+                if implicant(i & ~bigger, bigger):
+                    extended = True
+                    if bigger not in seen:
+                        seen.add(bigger)
+                        stack.append(bigger)
+            if not extended:
+                primes.append((i & ~mask, mask))
+        return primes
+
+    def _cover(self, uncovered):
+        # Greedily chooses primes covering the most uncovered minterms
+        uncovered = set([i for i in uncovered if not self.coverage[i]])
+        chosen = []
+        while uncovered:
+            best, best_covered = None, ()
+            for p in self.primes:
+                covered = [i for i in uncovered if _contains(p, (i, 0))]
+                if (len(covered), _size(p)) > (len(best_covered),
+                                               _size(best or (0, 0))):
+                    best, best_covered = p, covered
+            self._choose(best)
+            chosen.append(best)
+            uncovered.difference_update(best_covered)
+        self._prune(self._overlapping(chosen))
+
+    def _overlapping(self, cubes):
+        return [cube for cube in self.solution
+                if [other for other in cubes if _intersect(cube, other)]]
+
+    def _prune(self, cubes):
+        # Drops chosen primes whose minterms are all covered by other terms,
+        # smallest first
+        for cube in sorted(cubes, key=_size):
+            if cube not in self.solution:
+                continue
+            for i in _minterms(cube):
+                if i in self.on and self.coverage[i] < 2:
+                    break
+            else:
+                self._unchoose(cube)
+
+    def _choose(self, cube):
+        self.solution.add(cube)
+        for i in _minterms(cube):
+            if i in self.on:
+                self.coverage[i] += 1
+
+    def _unchoose(self, cube):
+        self.solution.remove(cube)
+        for i in _minterms(cube):
+            if i in self.on:
+                self.coverage[i] -= 1
+
+    def _index(self, minterm):
+        if isinstance(minterm, (int, long)):
+            return minterm
+        i = 0
+        for truth in minterm:
+            i = (i << 1) | int(bool(truth))
+        return i
+
+
+def from_implicant(implicant):
+    """
+    Converts a tuple of 1, 0 or None values to a `(value, mask)` pair.
+    """
+    value = mask = 0
+    for truth in implicant:
+        value <<= 1
+        mask <<= 1
+        if truth is None:
+            mask |= 1
+        elif truth:
+            value |= 1
+    return value, mask
+
+
+def _contains(cube1, cube2):
+    # True if every minterm of cube2 is also in cube1
+    value1, mask1 = cube1
+    value2, mask2 = cube2
+    return not mask2 & ~mask1 and value2 & ~mask1 == value1
+
+
+def _intersect(cube1, cube2):
+    value1, mask1 = cube1
+    value2, mask2 = cube2
+    return not (value1 ^ value2) & ~(mask1 | mask2)
+
+
+def _minterms(cube):
+    value, mask = cube
+    bits = mask
+    while True:
+        yield value | bits
+        if not bits:
+            break
+        bits = (bits - 1) & mask
+
+
+def _size(cube):
+    return bin(cube[1]).count('1')
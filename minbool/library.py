@@ -0,0 +1,190 @@
+#
+# Memory mapped library of minimized functions of few variables.
+#
+import mmap
+import struct
+import sys
+
+import incremental
+import npn
+
+# A library file holds, for each number of variables N from 1 to `max_N`, a
+# section made of:
+#
+# - an entry for every function, indexed by its packed truth table, as a
+#   little endian 32 bit integer: the index of the function's NPN class
+#   shifted left by 16 bits, the index of the permutation of its transform
+#   shifted left by 5 bits, its input negations shifted left by 1 bit and its
+#   output negation in the lowest bit.  Each function is the transform of
+#   its class's representative, the function with the smallest truth table
+#   in the class.
+#
+# - a record for every class holding the minimized sums of products of the
+#   representative and of its complement, each as a count of cubes followed
+#   by `2**(N - 1)` `(value, mask)` pairs of bytes.
+MAGIC = 'MBL'
+VERSION = 1
+_HEADER = struct.Struct('<3sBB')  # magic, version, max_N
+_SECTION = struct.Struct('<I')  # number of classes
+_ENTRY = struct.Struct('<I')
+
+# Functions of up to four variables fit in a byte per cube
+MAX_N = 4
+
+
+def generate(path, max_N=MAX_N):
+    """
+    Minimizes every function of up to `max_N` variables and writes the
+    library to `path`.  Only one function per NPN class is minimized, exactly
+    rather than greedily, so the library's results are never larger than
+    those of `minbool.synthesize`.
+    """
+    if not 0 < max_N <= MAX_N:
+        raise ValueError("max_N must be between 1 and %d" % MAX_N)
+    with open(path, 'wb') as out:
+        out.write(_HEADER.pack(MAGIC, VERSION, max_N))
+        for N in xrange(1, max_N + 1):
+            entries, representatives = classify(N)
+            out.write(_SECTION.pack(len(representatives)))
+            out.write(''.join([_ENTRY.pack(entry) for entry in entries]))
+            for table in representatives:
+                everything = 2**2**N - 1
+                for f in (table, everything ^ table):
+                    out.write(_record(_minimize(f, N), N))
+
+
+def classify(N):
+    """
+    Returns the library entries of the functions of N variables, as
+    described above, and the truth tables of the representatives of their
+    classes.
+    """
+    transforms = [(p, perm, flips, negate)
+                  for p, perm in enumerate(npn.permutations(N))
+                  for flips in xrange(2**N)
+                  for negate in (0, 1)]
+    entries = [None] * 2**2**N
+    representatives = []
+    for table in xrange(2**2**N):
+        if entries[table] is not None:
+            continue
+        c = len(representatives)
+        representatives.append(table)
+        for p, perm, flips, negate in transforms:
+            transformed = npn.transform_table(table, N, perm, flips, negate)
+            if entries[transformed] is None:
+                entries[transformed] = (c << 16) | (p << 5) | (
+                    flips << 1) | negate
+    return entries, representatives
+
+
+def _minimize(table, N):
+    # An exact minimum cover, by number of terms then of literals, of the
+    # minterms of `table` by its prime implicants, found by branching on the
+    # primes covering the minterm covered by fewest primes
+    from minbool import _find_prime_implicants
+    from minbool import _range_minterms
+    truthtable = dict([(minterm, bool(table & (1 << i)))
+                       for i, minterm in enumerate(_range_minterms(N))])
+    primes = sorted([incremental.from_implicant(implicant)
+                     for implicant in _find_prime_implicants(truthtable, N)])
+    covers = dict([(i, [p for p in primes if i & ~p[1] == p[0]])
+                   for i in xrange(2**N) if table & (1 << i)])
+
+    def cost(cubes):
+        return len(cubes), sum([N - bin(mask).count('1')
+                                for _, mask in cubes])
+
+    best = [None]
+
+    def search(chosen, uncovered):
+        if best[0] is not None and cost(chosen) >= cost(best[0]):
+            return
+        if not uncovered:
+            best[0] = list(chosen)
+            return
+        i = min(uncovered, key=lambda i: len(covers[i]))
+        for p in covers[i]:
+            chosen.append(p)
+            search(chosen, [j for j in uncovered
+                            if j & ~p[1] != p[0]])
+            chosen.pop()
+
+    search([], sorted(covers))
+    return best[0]
+
+
+def _record(cubes, N):
+    size = 2**(N - 1)
+    padding = [(0, 0)] * (size - len(cubes))
+    return struct.pack('<B%dB' % (2 * size), len(cubes),
+                       *[byte for cube in cubes + padding for byte in cube])
+
+
+class Library(object):
+    """
+    Looks up minimized sums of products of functions of up to `max_N`
+    variables in a library file written by `generate`, which is memory mapped
+    rather than read, so that processes share a single copy.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, self.max_N = _HEADER.unpack_from(self.data)
+        except struct.error:
+            raise ValueError("Not a library file: %s" % path)
+        if magic != MAGIC:
+            raise ValueError("Not a library file: %s" % path)
+        if version != VERSION:
+            raise ValueError("Unsupported library version: %d" % version)
+
+        # Offsets of the entries and class records of each section
+        self.sections = {}
+        offset = _HEADER.size
+        for N in xrange(1, self.max_N + 1):
+            classes, = _SECTION.unpack_from(self.data, offset)
+            entries = offset + _SECTION.size
+            records = entries + _ENTRY.size * 2**2**N
+            self.sections[N] = (entries, records)
+            offset = records + classes * 2 * _record_size(N)
+        self.permutations = dict([(N, npn.permutations(N))
+                                  for N in xrange(1, self.max_N + 1)])
+
+    def close(self):
+        self.data.close()
+
+    def lookup(self, table, N):
+        """
+        Returns the minimized sum of products of the function of N variables
+        with the packed truth table `table`, as a list of `(value, mask)`
+        cubes, or None if N is outside the library.
+        """
+        if N not in self.sections:
+            return None
+        entries, records = self.sections[N]
+        entry, = _ENTRY.unpack_from(self.data, entries + _ENTRY.size * table)
+        c, p = entry >> 16, (entry >> 5) & 0x1f
+        flips, negate = (entry >> 1) & 0xf, entry & 1
+
+        # The sum of products of the complement of the representative is
+        # the one to transform for negated functions.
+        size = _record_size(N)
+        offset = records + (2 * c + negate) * size
+        count, = struct.unpack_from('<B', self.data, offset)
+        data = struct.unpack_from('<%dB' % (2 * count), self.data, offset + 1)
+        perm = self.permutations[N][p]
+        return [npn.transform_cube(cube, N, perm, flips)
+                for cube in zip(data[::2], data[1::2])]
+
+
+def _record_size(N):
+    return 1 + 2 * 2**(N - 1)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print >> sys.stderr, "Usage: python -m minbool.library PATH"
+        sys.exit(2)
+    generate(sys.argv[1])
@@ -0,0 +1,180 @@
+#
+# Negation-permutation-negation (NPN) transforms of boolean functions.
+#
+import itertools
+import math
+
+# Functions of N variables are truth tables packed into integers, bit i
+# holding the value for row i, whose first variable is the most significant
+# bit of i.  A transform is a triple `(perm, flips, negate)`: the transform
+# of `f` is the function `g` for which `g(y) = negate ^ f(x)`, where
+# `x[k] = y[perm[k]] ^ flips[k]`.  `flips` is packed like a row index.
+
+# Beyond this many transforms, finding the canonical form of a function
+# takes longer than minimizing it
+MAX_TRANSFORMS = 64
+
+
+def permutations(N):
+    """
+    Returns the permutations of N variables, indexed as in transforms stored
+    by `minbool.library`.
+    """
+    return list(itertools.permutations(range(N)))
+
+
+def transform_table(table, N, perm, flips, negate):
+    """
+    Applies a transform to a packed truth table.
+    """
+    result = 0
+    for y in xrange(2**N):
+        x = 0
+        for k in xrange(N):
+            x = (x << 1) | ((y >> (N - 1 - perm[k])) & 1)
+        if ((table >> (x ^ flips)) & 1) != negate:
+            result |= 1 << y
+    return result
+
+
+def transform_cube(cube, N, perm, flips):
+    """
+    Applies the permutation and input negations of a transform to a `(value,
+    mask)` cube of `f`, giving the corresponding cube of its transform.
+    Output negation complements the function, which has different cubes.
+    """
+    value, mask = cube
+    value ^= flips & ~mask
+    new_value = new_mask = 0
+    for k in xrange(N):
+        bit = 1 << (N - 1 - k)
+        new_bit = 1 << (N - 1 - perm[k])
+        if mask & bit:
+            new_mask |= new_bit
+        elif value & bit:
+            new_value |= new_bit
+    return new_value, new_mask
+
+
+def inverse_cube(cube, N, perm, flips):
+    """
+    Maps a `(value, mask)` cube of the transform of `f` back to the
+    corresponding cube of `f`, undoing `transform_cube`.
+    """
+    value, mask = cube
+    new_value = new_mask = 0
+    for k in xrange(N):
+        bit = 1 << (N - 1 - perm[k])
+        new_bit = 1 << (N - 1 - k)
+        if mask & bit:
+            new_mask |= new_bit
+        elif bool(value & bit) != bool(flips & new_bit):
+            new_value |= new_bit
+    return new_value, new_mask
+
+
+def canonical(table, N, limit=None):
+    """
+    Returns the canonical form of a packed truth table of N variables, the
+    same for all functions equivalent to it under negation of inputs,
+    permutation of inputs and negation of the output, with a transform
+    which takes the function to it.  If `limit` is given and more than
+    `limit` transforms would have to be tried, returns None instead.
+
+    Rather than trying all `N! * 2**(N + 1)` transforms, only those are
+    tried which leave the function with at most half of its rows true, each
+    input with no more true rows when set than when not, and inputs in
+    increasing order of the number of true rows when set.  These counts are
+    the same for all equivalent functions, so the smallest table reached
+    from any of them is the same.  Only inputs with equal counts are tried
+    in every order and polarity, and of those, inputs which the function is
+    symmetric in are only tried in one order.
+    """
+    everything = 2**2**N - 1
+    rows = 2**N
+    ones = bin(table).count('1')
+    negations = [negate for negate in (0, 1)
+                 if (ones, rows - ones)[negate] * 2 <= rows]
+
+    # Input polarities keeping the fewest true rows with the input set,
+    # then groups of inputs with equal counts, in increasing order
+    choices = []
+    count = 0
+    for negate in negations:
+        f = negate and everything ^ table or table
+        weights = []
+        for k in xrange(N):
+            weight = bin(f & _cofactor_mask(k, N)).count('1')
+            weights.append((weight, bin(f).count('1') - weight))
+        polarities = [[flip for flip in (0, 1)
+                       if weights[k][flip] <= weights[k][1 - flip]]
+                      for k in xrange(N)]
+        groups = {}
+        for k in xrange(N):
+            groups.setdefault(min(weights[k]), []).append(k)
+        groups = [groups[weight] for weight in sorted(groups)]
+        choices.append((negate, polarities, groups))
+
+        transforms = 1
+        for group in groups:
+            transforms *= math.factorial(len(group))
+        for flips in polarities:
+            transforms *= len(flips)
+        count += transforms
+    if limit is not None and count > limit:
+        return None
+
+    best = None
+    for negate, polarities, groups in choices:
+        symmetries = _symmetries(table, N, groups)
+
+        for flips in itertools.product(*polarities):
+            flips = sum([flip << (N - 1 - k) for k, flip in enumerate(flips)])
+            for orders in itertools.product(
+                *[itertools.permutations(group) for group in groups]):
+                perm = [None] * N
+                position = 0
+                for order in orders:
+                    for k in order:
+                        perm[k] = position
+                        position += 1
+
+                # Exchanging the polarities and positions of two symmetric
+                # inputs gives the same table, so only one is tried
+                for i, j in symmetries:
+                    if (flips >> (N - 1 - i) & 1, perm[i]) > (
+                        flips >> (N - 1 - j) & 1, perm[j]):
+                        break
+                else:
+                    transformed = transform_table(
+                        table, N, perm, flips, negate)
+                    if best is None or transformed < best[0]:
+                        best = (transformed, (tuple(perm), flips, negate))
+    return best
+
+
+def _symmetries(table, N, groups):
+    # Pairs of inputs of the same group which the function is symmetric in,
+    # chaining each set of symmetric inputs in increasing order
+    pairs = []
+    for group in groups:
+        remaining = list(group)
+        while remaining:
+            i = remaining.pop(0)
+            for j in list(remaining):
+                perm = range(N)
+                perm[i], perm[j] = j, i
+                if transform_table(table, N, perm, 0, 0) == table:
+                    pairs.append((i, j))
+                    remaining.remove(j)
+                    i = j
+    return pairs
+
+
+def _cofactor_mask(k, N):
+    # The packed table of the rows for which variable k is set
+    mask = 0
+    for i in xrange(2**N):
+        if i & (1 << (N - 1 - k)):
+            mask |= 1 << i
+    return mask
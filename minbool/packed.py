@@ -0,0 +1,267 @@
+#
+# Truth tables packed into the bits of integers.
+#
+import ast
+import cache
+import codegen
+
+# A packed truth table of a function of N variables is an integer with 2**N
+# bits, bit i being the value of the function for row i of the truth table.
+# As for minterms, the first variable is the most significant bit of the row
+# index.  Python's long integers make whole table operations a handful of
+# machine level bitwise operations per word.
+
+
+def full(N):
+    """
+    The packed truth table of the constant True function.
+    """
+    return (1 << 2**N) - 1
+
+
+def variable(k, N):
+    """
+    The packed truth table of the `k`th of `N` variables.
+    """
+    bit = 1 << (N - 1 - k)
+    # Blocks of `bit` rows where the variable is false, then true
+    mask = ((1 << bit) - 1) << bit
+    width = 2 * bit
+    size = 2**N
+    while width < size:
+        mask |= mask << width
+        width *= 2
+    return mask
+
+
+def cover(solution, N, form='sop'):
+    """
+    Computes the packed truth table of the expression with the given
+    `solution`, a sequence of implicants, and `form`, as for
+    `minbool.BooleanExpression`.
+    """
+    everything = full(N)
+    variables = [variable(k, N) for k in xrange(N)]
+    result = 0
+    for implicant in solution:
+        term = everything
+        for k, truth in enumerate(implicant):
+            if truth is None:
+                continue
+            elif truth:
+                term &= variables[k]
+            else:
+                term &= everything ^ variables[k]
+        if form == 'esop':
+            result ^= term
+        else:
+            result |= term
+    if form == 'pos':
+        result ^= everything
+    return result
+
+
+def insert(table, N, k):
+    """
+    Adds a variable, on which the function doesn't depend, to the packed
+    truth table of a function of N variables, as the `k`th of the N + 1
+    variables of the result.
+    """
+    # The rows of `table` come in blocks of `size` rows sharing the values
+    # of the variables before the new one.  Each block is moved to twice its
+    # offset, by halving moves on the bits of the block index, and repeated.
+    size = 2**(N - k)
+    total = 2**(N + 1)
+    for j in reversed(xrange(k)):
+        shift = size << j
+        mask = (1 << shift) - 1
+        width = 2 * shift
+        while width < total:
+            mask |= mask << width
+            width *= 2
+        table = (table | (table << shift)) & mask
+    return table | (table << size)
+
+
+def expand(table, positions, N):
+    """
+    Converts the packed truth table of a function of the variables at the
+    increasing `positions` of N variables to a table of all N variables.
+    """
+    n = len(positions)
+    positions = set(positions)
+    for k in xrange(N):
+        if k not in positions:
+            table = insert(table, n, k)
+            n += 1
+    return table
+
+
+class TableCache(cache.LRUCache):
+    """
+    Caches the packed truth tables of sub-expressions for `evaluate`, keeping
+    at most `max_bytes` of tables.
+
+    Propositions are numbered in the order the cache first sees them, and
+    `order` sorts propositions by those numbers.  Evaluating expressions with
+    their propositions in that order lets sub-expressions share tables even
+    when propositions are added or removed elsewhere in the expression.
+    """
+
+    def __init__(self, max_bytes=2**24):
+        cache.LRUCache.__init__(self, max_bytes, _sizeof)
+        self.numbers = {}
+
+    def order(self, propositions):
+        """
+        Returns the ast nodes `propositions` sorted in the order their source
+        code was first seen by the cache.
+        """
+        for proposition in propositions:
+            self.numbers.setdefault(codegen.to_source(proposition),
+                                    len(self.numbers))
+        return sorted(propositions, key=lambda proposition: self.numbers[
+            codegen.to_source(proposition)])
+
+
+def _sizeof(table):
+    # Approximate memory used by an entry
+    return table.bit_length() // 8 + 64
+
+
+def evaluate(expression, variables, N, cache=None):
+    """
+    Computes the packed truth table of an `_ASTExpression` over `N`
+    variables.  `variables` maps the source code of each proposition to the
+    index of its variable.  Raises `KeyError` for propositions missing from
+    `variables`.
+
+    If a `TableCache` is given, the tables of sub-expressions are looked up
+    in and stored to it.  Sub-expressions are keyed by their structure and
+    the source code of their propositions, their tables covering only those
+    propositions, in the order of `variables`.  When an edited expression is
+    evaluated again with its propositions in the order given by
+    `TableCache.order`, only the tables of sub-expressions containing the
+    edit are computed.
+    """
+    mapping = expression.propositions_mapping
+    everything = full(N)
+    tables = {}
+
+    def table(node):
+        if _is_operator(node):
+            return compute(node)
+        return leaf(node)
+
+    def compute(node):
+        if isinstance(node, ast.BoolOp):
+            values = [table(value) for value in node.values]
+            result = values[0]
+            if isinstance(node.op, ast.And):
+                for value in values[1:]:
+                    result &= value
+            else:
+                for value in values[1:]:
+                    result |= value
+            return result
+        elif isinstance(node, ast.UnaryOp):
+            return everything ^ table(node.operand)
+        return table(node.left) ^ table(node.right)
+
+    def leaf(node):
+        proposition = mapping[node]
+        result = tables.get(proposition)
+        if result is None:
+            source = codegen.to_source(proposition)
+            if source == 'True':
+                result = everything
+            elif source == 'False':
+                result = 0
+            else:
+                result = variable(variables[source], N)
+            tables[proposition] = result
+        return result
+
+    if cache is None:
+        return table(expression.node)
+
+    # Each sub-expression's table covers the variables of its propositions,
+    # in increasing order, listed by `supports`
+    keys = {}
+    supports = {}
+
+    def describe(node):
+        if isinstance(node, ast.BoolOp):
+            children = node.values
+            key = (type(node.op).__name__,)
+        elif isinstance(node, ast.UnaryOp):
+            children = [node.operand]
+            key = ('Not',)
+        elif _is_operator(node):
+            children = [node.left, node.right]
+            key = ('BitXor',)
+        else:
+            source = codegen.to_source(mapping[node])
+            keys[node] = source
+            if source in ('True', 'False'):
+                supports[node] = []
+            else:
+                supports[node] = [variables[source]]
+            return
+        for child in children:
+            describe(child)
+        keys[node] = key + tuple([keys[child] for child in children])
+        supports[node] = sorted(set(
+            [k for child in children for k in supports[child]]))
+
+    def local(node):
+        support = supports[node]
+        if not _is_operator(node):
+            if not support:
+                return int(keys[node] == 'True')
+            return 2  # The table of the only variable
+        cache_key = (keys[node], tuple([sources[k] for k in support]))
+        result = cache.get(cache_key)
+        if result is not None:
+            return result
+
+        n = len(support)
+
+        def widen(child):
+            return expand(local(child), [support.index(k)
+                                         for k in supports[child]], n)
+
+        if isinstance(node, ast.BoolOp):
+            values = [widen(child) for child in node.values]
+            result = values[0]
+            if isinstance(node.op, ast.And):
+                for value in values[1:]:
+                    result &= value
+            else:
+                for value in values[1:]:
+                    result |= value
+        elif isinstance(node, ast.UnaryOp):
+            result = full(n) ^ widen(node.operand)
+        else:
+            result = widen(node.left) ^ widen(node.right)
+        cache.put(cache_key, result)
+        return result
+
+    sources = dict([(k, source) for source, k in variables.items()])
+    describe(expression.node)
+    return expand(local(expression.node), supports[expression.node], N)
+
+
+def _is_operator(node):
+    # Whether a node of an `_ASTExpression` combines others, `^` being the
+    # only binary operator which isn't part of a proposition
+    return isinstance(node, (ast.BoolOp, ast.UnaryOp)) or (
+        isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitXor))
+
+
+def rows(table, N):
+    """
+    Unpacks a packed truth table into a string of '0' and '1' characters
+    indexed by row.
+    """
+    return bin(table)[2:].zfill(2**N)[::-1]
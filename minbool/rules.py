@@ -0,0 +1,155 @@
+#
+# Compilation of many boolean expressions into a single evaluation function.
+#
+import ast
+import __builtin__
+
+import codegen
+
+_BUILTINS = set(dir(__builtin__))
+
+
+class RuleSet(object):
+    """
+    Evaluates many boolean expressions, or rules, against the same arguments
+    in one go.  Propositions are interned by their source code, as in
+    `_ASTExpression`, so a proposition shared by several rules is evaluated
+    at most once per call, and only when a rule actually needs its value.
+
+    `rules` maps keys to the results of `simplify` or `synthesize`.  Calling
+    the rule set with values for the free names used in the rules' propositions
+    returns the set of keys of the rules which are true.  The `names`
+    attribute lists those free names in the order of the positional
+    arguments, and `source` holds the source code of the generated function.
+
+    Names bound within a proposition, eg by a generator expression, aren't
+    free, and names of builtins are taken to refer to the builtins.  Passing
+    `names` gives the arguments explicitly instead, so that they may shadow
+    builtins.  Raises `ValueError` if a free name other than a builtin is
+    missing from `names`.
+    """
+    _function = None
+
+    def __init__(self, rules, names=None):
+        self.rules = rules
+        self.propositions = []
+        interned = {}
+        compiled = []
+        for key, expression in rules.items():
+            indexes = []
+            for name in expression.names:
+                if isinstance(name, basestring):
+                    name = ast.parse(name).body[0].value
+                source = codegen.to_source(name)
+                if source not in interned:
+                    interned[source] = len(self.propositions)
+                    self.propositions.append(name)
+                indexes.append(interned[source])
+            compiled.append((key, expression, indexes))
+
+        free = set()
+        for proposition in self.propositions:
+            free |= _free_names(proposition)
+        if names is None:
+            self.names = sorted(free - _BUILTINS)
+        else:
+            self.names = list(names)
+            missing = free - _BUILTINS - set(self.names)
+            if missing:
+                raise ValueError(
+                    "Names missing from arguments: %s" %
+                    ', '.join(sorted(missing)))
+        self.keys = [key for key, _, _ in compiled]
+        self.source = codegen.to_source(self._make_ast(compiled))
+
+    def __call__(self, *args, **kw):
+        if self._function is None:
+            namespace = {'_UNSET': object(), '_keys': self.keys}
+            exec compile(self.source, '<rule set>', 'exec') in namespace
+            self._function = namespace['evaluate']
+        return self._function(*args, **kw)
+
+    def _make_ast(self, compiled):
+        def load(name):
+            return ast.Name(name, ast.Load())
+
+        def store(name):
+            return ast.Name(name, ast.Store())
+
+        def variable(i):
+            return '_p%d' % i
+
+        body = []
+        for i in xrange(len(self.propositions)):
+            body.append(ast.Assign([store(variable(i))], load('_UNSET')))
+        body.append(ast.Assign([store('_matched')],
+                               ast.Call(load('set'), [], [], None, None)))
+
+        for n, (key, expression, indexes) in enumerate(compiled):
+            pos = expression.form == 'pos'
+            esop = expression.form == 'esop'
+            if not expression.solution and not pos:
+                continue  # Never true
+
+            rule = [ast.Assign([store('_m')], load('False'))]
+            for implicant, order in expression._terms():
+                # Nested tests for each literal of the term, evaluating each
+                # proposition on first use.  For a product of sums the terms
+                # are those of the complement.  For an exclusive sum of
+                # products every term is tested and each true one flips _m.
+                if esop:
+                    statements = [ast.Assign(
+                        [store('_m')], ast.UnaryOp(ast.Not(), load('_m')))]
+                else:
+                    statements = [ast.Assign([store('_m')], load('True'))]
+                for i in reversed(order):
+                    truth = implicant[i]
+                    if truth is None:
+                        continue
+                    name = variable(indexes[i])
+                    test = load(name)
+                    if not truth:
+                        test = ast.UnaryOp(ast.Not(), test)
+                    statements = [
+                        ast.If(ast.Compare(load(name), [ast.Is()],
+                                           [load('_UNSET')]),
+                               [ast.Assign([store(name)],
+                                           self.propositions[indexes[i]])],
+                               []),
+                        ast.If(test, statements, [])]
+                if len(rule) > 1 and not esop:
+                    statements = [ast.If(ast.UnaryOp(ast.Not(), load('_m')),
+                                         statements, [])]
+                rule.extend(statements)
+
+            add = ast.Expr(ast.Call(
+                ast.Attribute(load('_matched'), 'add', ast.Load()),
+                [ast.Subscript(load('_keys'), ast.Index(ast.Num(n)),
+                               ast.Load())], [], None, None))
+            test = load('_m')
+            if pos:
+                test = ast.UnaryOp(ast.Not(), test)
+            rule.append(ast.If(test, [add], []))
+            body.extend(rule)
+
+        body.append(ast.Return(load('_matched')))
+        arguments = ast.arguments([store(name) for name in self.names],
+                                  None, None, [])
+        return ast.FunctionDef('evaluate', arguments, body, [])
+
+
+def _free_names(node):
+    # Names loaded in `node` which aren't bound within it, as the targets of
+    # comprehensions or arguments of lambdas
+    loaded = set()
+    bound = set()
+    for child in ast.walk(node):
+        if isinstance(child, ast.Name):
+            if isinstance(child.ctx, ast.Load):
+                loaded.add(child.id)
+            else:
+                bound.add(child.id)
+        elif isinstance(child, ast.arguments):
+            bound.update([name for name in (child.vararg, child.kwarg)
+                          if name is not None])
+    return loaded - bound
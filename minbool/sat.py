@@ -0,0 +1,306 @@
+#
+# Conflict driven clause learning SAT solver and Tseitin encoding of boolean
+# expressions.
+#
+import ast
+import codegen
+
+
+class Solver(object):
+    """
+    A small conflict driven clause learning SAT solver.  Variables are
+    positive integers allocated by `new_var` and literals are non-zero
+    integers, negative for negated variables, as in the DIMACS format.
+
+    Clauses are watched by two literals each.  Conflicts are analyzed to the
+    first unique implication point, the learnt clause is added to the clause
+    database and the solver backjumps non-chronologically to the second
+    highest decision level in the learnt clause.  Decisions follow variable
+    activity, bumped for every variable involved in a conflict, with saved
+    phases and geometrically growing restart intervals.
+    """
+
+    def __init__(self):
+        self.nvars = 0
+        self.ok = True
+        self.watches = {}
+        self.assigns = [None]
+        self.levels = [0]
+        self.reasons = [None]
+        self.phases = [False]
+        self.activity = [0.0]
+        self.var_inc = 1.0
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+
+    def new_var(self):
+        self.nvars += 1
+        var = self.nvars
+        self.watches[var] = []
+        self.watches[-var] = []
+        self.assigns.append(None)
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.phases.append(False)
+        self.activity.append(0.0)
+        return var
+
+    def value(self, lit):
+        value = self.assigns[abs(lit)]
+        if value is None or lit > 0:
+            return value
+        return not value
+
+    def add_clause(self, lits):
+        """
+        Adds a clause to the problem.  Must be called before `solve`.  Returns
+        False if the problem is already known to be unsatisfiable.
+        """
+        if not self.ok:
+            return False
+        clause = []
+        for lit in lits:
+            value = self.value(lit)
+            if value or -lit in clause:
+                return True  # already satisfied
+            if value is None and lit not in clause:
+                clause.append(lit)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self._enqueue(clause[0], None)
+            self.ok = self._propagate() is None
+        else:
+            self._watch(clause)
+        return self.ok
+
+    def _watch(self, clause):
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def _enqueue(self, lit, reason):
+        var = abs(lit)
+        self.assigns[var] = lit > 0
+        self.levels[var] = len(self.trail_lim)
+        self.reasons[var] = reason
+        self.trail.append(lit)
+
+    def _propagate(self):
+        """
+        Propagates all enqueued assignments.  Returns a conflicting clause or
+        None.
+        """
+        value = self.value
+        watches = self.watches
+        while self.qhead < len(self.trail):
+            false_lit = -self.trail[self.qhead]
+            self.qhead += 1
+            watching = watches[false_lit]
+            kept = []
+            i = 0
+            while i < len(watching):
+                clause = watching[i]
+                i += 1
+                # Make sure the false literal is the second watch
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if value(clause[0]) is True:
+                    kept.append(clause)
+                    continue
+
+                for k in xrange(2, len(clause)):
+                    if value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        watches[clause[1]].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if value(clause[0]) is False:
+                        kept.extend(watching[i:])
+                        watches[false_lit] = kept
+                        return clause
+                    self._enqueue(clause[0], clause)
+            watches[false_lit] = kept
+
+    def _analyze(self, conflict):
+        """
+        Derives a learnt clause from a conflict, with the asserting literal
+        first and a literal of the backjump level second.  Returns the clause
+        and the level to backjump to.
+        """
+        levels = self.levels
+        level = len(self.trail_lim)
+        seen = set()
+        learnt = [None]
+        counter = 0
+        lit = None
+        index = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for q in clause if lit is None else clause[1:]:
+                var = abs(q)
+                if var not in seen and levels[var] > 0:
+                    seen.add(var)
+                    self._bump(var)
+                    if levels[var] == level:
+                        counter += 1
+                    else:
+                        learnt.append(q)
+
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            lit = self.trail[index]
+            index -= 1
+            counter -= 1
+            if not counter:
+                break
+            clause = self.reasons[abs(lit)]
+
+        learnt[0] = -lit
+        backjump = 0
+        if len(learnt) > 1:
+            highest = 1
+            for i in xrange(2, len(learnt)):
+                if levels[abs(learnt[i])] > levels[abs(learnt[highest])]:
+                    highest = i
+            learnt[1], learnt[highest] = learnt[highest], learnt[1]
+            backjump = levels[abs(learnt[1])]
+        return learnt, backjump
+
+    def _bump(self, var):
+        self.activity[var] += self.var_inc
+        if self.activity[var] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.var_inc *= 1e-100
+
+    def _backtrack(self, level):
+        if len(self.trail_lim) <= level:
+            return
+        start = self.trail_lim[level]
+        for lit in self.trail[start:]:
+            var = abs(lit)
+            self.phases[var] = lit > 0
+            self.assigns[var] = None
+            self.reasons[var] = None
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.qhead = len(self.trail)
+
+    def _decide(self):
+        best = None
+        best_activity = -1.0
+        for var in xrange(1, self.nvars + 1):
+            if (self.assigns[var] is None and
+                    self.activity[var] > best_activity):
+                best = var
+                best_activity = self.activity[var]
+        return best
+
+    def solve(self):
+        """
+        Returns a satisfying assignment as a list of booleans indexed by
+        variable, or None if the problem is unsatisfiable.
+        """
+        if not self.ok:
+            return None
+        conflicts = 0
+        restart = 100
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                if not self.trail_lim:
+                    self.ok = False
+                    return None
+                conflicts += 1
+                learnt, backjump = self._analyze(conflict)
+                self._backtrack(backjump)
+                if len(learnt) == 1:
+                    self._enqueue(learnt[0], None)
+                else:
+                    self._watch(learnt)
+                    self._enqueue(learnt[0], learnt)
+                self.var_inc *= 1.05
+            elif conflicts >= restart:
+                conflicts = 0
+                restart = int(restart * 1.5)
+                self._backtrack(0)
+            else:
+                var = self._decide()
+                if var is None:
+                    model = list(self.assigns)
+                    self._backtrack(0)
+                    return model
+                self.trail_lim.append(len(self.trail))
+                self._enqueue(var if self.phases[var] else -var, None)
+
+
+class TseitinEncoder(object):
+    """
+    Encodes `_ASTExpression` trees as clauses of a `Solver`.  Each operator
+    node is given a fresh variable constrained to equal the value of the node,
+    so the encoding grows linearly with the size of the expression.
+    Propositions are identified by their source code, so expressions which
+    share propositions share variables.
+    """
+
+    def __init__(self, solver):
+        self.solver = solver
+        self.variables = {}
+        self.true = solver.new_var()
+        solver.add_clause([self.true])
+
+    def encode(self, expression):
+        """
+        Returns a literal which is true iff `expression` is true.
+        """
+        mapping = expression.propositions_mapping
+        solver = self.solver
+
+        def encode(node):
+            if isinstance(node, ast.BoolOp):
+                lits = [encode(value) for value in node.values]
+                lit = solver.new_var()
+                if isinstance(node.op, ast.And):
+                    for value in lits:
+                        solver.add_clause([-lit, value])
+                    solver.add_clause([lit] + [-value for value in lits])
+                else:
+                    for value in lits:
+                        solver.add_clause([lit, -value])
+                    solver.add_clause([-lit] + lits)
+                return lit
+            elif isinstance(node, ast.UnaryOp):
+                return -encode(node.operand)
+            elif (isinstance(node, ast.BinOp) and
+                  isinstance(node.op, ast.BitXor)):
+                # Exclusive or
+                a, b = encode(node.left), encode(node.right)
+                lit = solver.new_var()
+                solver.add_clause([-lit, a, b])
+                solver.add_clause([-lit, -a, -b])
+                solver.add_clause([lit, -a, b])
+                solver.add_clause([lit, a, -b])
+                return lit
+            return self.proposition(mapping[node])
+
+        return encode(expression.node)
+
+    def proposition(self, node):
+        source = codegen.to_source(node)
+        if source == 'True':
+            return self.true
+        elif source == 'False':
+            return -self.true
+        var = self.variables.get(source)
+        if var is None:
+            var = self.variables[source] = self.solver.new_var()
+        return var
+
+    def assignment(self, model):
+        """
+        Maps a model returned by `Solver.solve` back to the propositions.
+        """
+        return dict([(source, bool(model[var]))
+                     for source, var in self.variables.items()])
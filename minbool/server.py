@@ -0,0 +1,299 @@
+#
+# HTTP server minimizing expressions for local clients.
+#
+import BaseHTTPServer
+import collections
+import json
+import multiprocessing
+import SocketServer
+import threading
+import time
+
+import cache
+import tasks
+
+_METHODS = ('qm', 'bdd', 'consensus')
+_FORMS = ('sop', 'pos', 'best', 'esop')
+
+# Error of minimizations stopped by their deadline
+_TIMED_OUT = 'Deadline exceeded'
+
+
+class MinimizationServer(SocketServer.ThreadingMixIn,
+                         BaseHTTPServer.HTTPServer):
+    """
+    Serves minimization over HTTP with JSON bodies, so that several local
+    services can share one pool of worker processes and one result cache.
+
+    `POST /simplify` takes an object with an `expr` string and optionally
+    `method` and `form`, as for `minbool.simplify`.  `POST /synthesize` takes
+    `names`, a list of argument names, `minterms`, a list of the indexes of
+    truth table rows for which the function is true, and optionally
+    `dont_cares`, a list of row indexes for which it is don't care, and
+    `form`.  Row indexes have the first name as their most significant bit.
+    Both reply with an object holding the `result` as a string, or an
+    `error`.  At most `max_names` names are accepted.  A `deadline` in
+    seconds may be given with either request, overriding the server's
+    default, after which the reply is a 504 error.  The minimization is
+    cancelled once the deadline of the request which started it passes.
+
+    Identical requests in flight at the same time share a single
+    minimization.  At most `max_pending` distinct minimizations are queued
+    at a time, after which requests are refused with a 503 error.  `GET
+    /metrics` reports request counts and latencies.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, processes=None, cache_size=4096,
+                 max_pending=1024, deadline=30.0, max_names=24):
+        BaseHTTPServer.HTTPServer.__init__(self, address, RequestHandler)
+        self.pool = multiprocessing.Pool(processes)
+        self.cache = cache.LRUCache(cache_size)
+        self.max_pending = max_pending
+        self.deadline = deadline
+        self.max_names = max_names
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.metrics = Metrics()
+
+    def minimize(self, task, deadline=None):
+        """
+        Returns the result of a task, a tuple of the kind of request and its
+        arguments, as a pair of the result string and an error message, one
+        of which is None.  Raises `Busy` if too many tasks are pending and
+        `multiprocessing.TimeoutError` if the deadline passes first.
+        """
+        if deadline is None:
+            deadline = self.deadline
+        with self.lock:
+            result = self.cache.get(task)
+            if result is not None:
+                self.metrics.hits += 1
+                return result
+            pending = self.in_flight.get(task)
+            if pending is not None:
+                self.metrics.coalesced += 1
+            elif len(self.in_flight) >= self.max_pending:
+                raise Busy()
+            else:
+                pending = self.pool.apply_async(
+                    work, (task, time.time() + deadline),
+                    callback=lambda result: self._done(task, result))
+                self.in_flight[task] = pending
+        result = pending.get(max(deadline, 0))
+        if result[1] == _TIMED_OUT:
+            raise multiprocessing.TimeoutError()
+        return result
+
+    def _done(self, task, result):
+        # Called by the pool before the result is made available
+        with self.lock:
+            if result[1] != _TIMED_OUT:
+                self.cache.put(task, result)
+            del self.in_flight[task]
+
+    def server_close(self):
+        BaseHTTPServer.HTTPServer.server_close(self)
+        self.pool.terminate()
+        self.pool.join()
+
+
+def _rows(indexes):
+    return tuple(sorted(set([int(i) for i in indexes])))
+
+
+class Busy(Exception):
+    """
+    Raised when too many minimizations are pending.
+    """
+
+
+class RequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path == '/metrics':
+            with self.server.lock:
+                snapshot = self.server.metrics.snapshot(
+                    len(self.server.in_flight), len(self.server.cache))
+            self.respond(200, snapshot)
+        else:
+            self.respond(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        started = time.time()
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length))
+            form = request.get('form', 'sop')
+            if form not in _FORMS:
+                raise ValueError("'form' must be one of %s" %
+                                 ', '.join(_FORMS))
+            if self.path == '/simplify':
+                if not isinstance(request['expr'], basestring):
+                    raise ValueError("'expr' must be a string")
+                method = request.get('method', 'qm')
+                if method not in _METHODS:
+                    raise ValueError("'method' must be one of %s" %
+                                     ', '.join(_METHODS))
+                task = ('simplify', request['expr'], method, form)
+            elif self.path == '/synthesize':
+                names = request['names']
+                if (not isinstance(names, list) or not names or
+                    len(names) > self.server.max_names or
+                    [name for name in names
+                     if not isinstance(name, basestring)]):
+                    raise ValueError(
+                        "'names' must be a non-empty list of at most %d "
+                        "strings" % self.server.max_names)
+                task = ('synthesize', tuple(names),
+                        _rows(request['minterms']),
+                        _rows(request.get('dont_cares', ())), form)
+            else:
+                self.respond(404, {'error': 'Not found'})
+                return
+            deadline = request.get('deadline')
+            if deadline is not None:
+                deadline = float(deadline)
+        except (ValueError, KeyError, TypeError, AttributeError), e:
+            self.respond(400, {'error': 'Bad request: %s' % e})
+            return
+
+        try:
+            self.count('requests')
+            result, error = self.server.minimize(task, deadline)
+        except Busy:
+            self.count('rejected')
+            self.respond(503, {'error': 'Too many pending requests'})
+            return
+        except multiprocessing.TimeoutError:
+            self.count('timeouts')
+            self.respond(504, {'error': 'Deadline exceeded'})
+            return
+
+        self.server.metrics.latencies.append(time.time() - started)
+        if error is not None:
+            self.count('errors')
+            self.respond(400, {'error': error})
+        else:
+            self.respond(200, {'result': result})
+
+    def count(self, name):
+        with self.server.lock:
+            metrics = self.server.metrics
+            setattr(metrics, name, getattr(metrics, name) + 1)
+
+    def respond(self, status, body):
+        body = json.dumps(body, sort_keys=True)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Metrics(object):
+    """
+    Counts requests by outcome and keeps the latencies of recent requests.
+    """
+
+    def __init__(self, window=1000):
+        self.requests = self.hits = self.coalesced = self.errors = 0
+        self.timeouts = self.rejected = 0
+        self.latencies = collections.deque(maxlen=window)
+
+    def snapshot(self, in_flight, cached):
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1,
+                                 int(p * len(latencies)))] * 1000
+
+        return {
+            'requests': self.requests,
+            'cache_hits': self.hits,
+            'coalesced': self.coalesced,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'rejected': self.rejected,
+            'in_flight': in_flight,
+            'cached': cached,
+            'latency_ms': {'p50': percentile(0.5), 'p90': percentile(0.9),
+                           'p99': percentile(0.99), 'max': percentile(1.0)},
+        }
+
+
+def work(task, expires=None):
+    """
+    Performs a minimization task in a worker process.  Returns a pair of the
+    result string and an error message, one of which is None.  If `expires`
+    is given, as a `time.time` value, the minimization is cancelled once it
+    passes.
+    """
+    from minbool import simplify
+    from minbool import synthesize
+    cancel = None
+    if expires is not None:
+        cancel = _Deadline(expires)
+    try:
+        if task[0] == 'simplify':
+            _, expr, method, form = task
+            result = simplify(expr, method=method, form=form, cancel=cancel)
+        else:
+            _, names, minterms, dont_cares, form = task
+            result = synthesize(
+                _Function(len(names), minterms, dont_cares), form=form,
+                cancel=cancel, *[str(name) for name in names])
+        return str(result), None
+    except tasks.Timeout:
+        return None, _TIMED_OUT
+    except Exception, e:
+        return None, '%s: %s' % (type(e).__name__, e)
+
+
+class _Deadline(object):
+    # Cancels a minimization once the time `expires` passes
+
+    def __init__(self, expires):
+        self.expires = expires
+
+    def check(self):
+        if time.time() > self.expires:
+            raise tasks.Timeout()
+
+
+class _Function(object):
+    # The function described by lists of minterm and don't care row indexes
+
+    def __init__(self, N, minterms, dont_cares):
+        self.N = N
+        self.minterms = set(minterms)
+        self.dont_cares = set(dont_cares)
+
+    def __call__(self, *args):
+        i = 0
+        for arg in args:
+            i = (i << 1) | int(bool(arg))
+        if i in self.dont_cares:
+            return None
+        return i in self.minterms
+
+
+def serve(address, processes=None, cache_size=4096):
+    """
+    Runs a `MinimizationServer` on `address`, a `(host, port)` pair, until
+    interrupted.
+    """
+    server = MinimizationServer(address, processes, cache_size)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,152 @@
+#
+# Out of core generation of prime implicants.
+#
+import array
+import heapq
+import tempfile
+
+# Number of implicants read from a run at a time
+_CHUNK = 4096
+
+
+class ImplicantStore(object):
+    """
+    Holds one column of the Quine-McCluskey merge loop in compact form.
+    Implicants are pairs of integers, `value` and `mask`, where a bit set in
+    `mask` marks a don't care position and `value` holds the remaining bits.
+    Implicants are grouped by the number of ones in `value` and buffered in
+    arrays.  When the buffers outgrow `memory_limit` bytes, each group is
+    sorted and written to a temporary file as a run.  Reading a group merges
+    its runs back into a single sorted, duplicate free stream.
+    """
+
+    def __init__(self, N, memory_limit):
+        self.N = N
+        self.memory_limit = memory_limit
+        self.buffers = [array.array('L') for _ in xrange(N + 1)]
+        self.runs = [[] for _ in xrange(N + 1)]
+        self.file = None
+        self.size = 0
+
+    def add(self, value, mask):
+        buffer = self.buffers[_ones(value)]
+        buffer.append(value)
+        buffer.append(mask)
+        self.size += 2 * buffer.itemsize
+        if self.size > self.memory_limit:
+            self.spill()
+
+    def spill(self):
+        if self.file is None:
+            self.file = tempfile.TemporaryFile()
+        for group, buffer in enumerate(self.buffers):
+            if not buffer:
+                continue
+            run = array.array('L')
+            for value, mask in sorted(set(_pairs(buffer))):
+                run.append(value)
+                run.append(mask)
+            self.file.seek(0, 2)
+            self.runs[group].append((self.file.tell(), len(run)))
+            run.tofile(self.file)
+            self.buffers[group] = array.array('L')
+        self.size = 0
+
+    def __nonzero__(self):
+        return bool(self.size or [runs for runs in self.runs if runs])
+
+    def group(self, n):
+        """
+        Iterates over the implicants of group `n` in sorted order.
+        """
+        streams = [iter(sorted(set(_pairs(self.buffers[n]))))]
+        for offset, length in self.runs[n]:
+            streams.append(self._read_run(offset, length))
+        last = None
+        for implicant in heapq.merge(*streams):
+            if implicant != last:
+                yield implicant
+                last = implicant
+
+    def _read_run(self, offset, length):
+        while length:
+            chunk = array.array('L')
+            self.file.seek(offset)
+            count = min(length, 2 * _CHUNK)
+            chunk.fromfile(self.file, count)
+            offset = self.file.tell()
+            length -= count
+            for implicant in _pairs(chunk):
+                yield implicant
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+def prime_implicants(minterms, N, memory_limit=2**26):
+    """
+    Generates the prime implicants of a function, given an iterable of the
+    integer indexes of the minterms for which the function is true or don't
+    care.  Prime implicants are yielded as `(value, mask)` pairs as soon as
+    they are found.
+
+    Only the column being consumed and the column being produced are kept,
+    each in an `ImplicantStore`, and of the column being consumed only two
+    adjacent groups are held in memory at a time.  Each of those groups is
+    loaded whole, so `memory_limit` doesn't bound the size of a group.
+    """
+    column = ImplicantStore(N, memory_limit)
+    for minterm in minterms:
+        column.add(minterm, 0)
+
+    full = (1 << N) - 1
+    while column:
+        next_column = ImplicantStore(N, memory_limit)
+        this_group = list(column.group(0))
+        this_matched = set()
+        for n in xrange(N + 1):
+            if n < N:
+                next_group = set(column.group(n + 1))
+            else:
+                next_group = set()
+            next_matched = set()
+            for value, mask in this_group:
+                matched = (value, mask) in this_matched
+                free = full & ~(value | mask)
+                while free:
+                    bit = free & -free
+                    free ^= bit
+                    candidate = (value | bit, mask)
+                    if candidate in next_group:
+                        next_column.add(value, mask | bit)
+                        next_matched.add(candidate)
+                        matched = True
+                if not matched:
+                    yield value, mask
+            this_group = sorted(next_group)
+            this_matched = next_matched
+        column.close()
+        column = next_column
+
+
+def to_implicant(value, mask, N):
+    """
+    Converts a `(value, mask)` pair to a tuple of 1, 0 or None values.
+    """
+    implicant = []
+    for i in xrange(N - 1, -1, -1):
+        bit = 1 << i
+        if mask & bit:
+            implicant.append(None)
+        else:
+            implicant.append(int(bool(value & bit)))
+    return tuple(implicant)
+
+
+def _pairs(buffer):
+    return zip(buffer[::2], buffer[1::2])
+
+
+def _ones(value):
+    return bin(value).count('1')
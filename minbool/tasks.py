@@ -0,0 +1,121 @@
+#
+# Background minimization with cooperative cancellation.
+#
+import sys
+import threading
+
+
+class Cancelled(Exception):
+    """
+    Raised by a cancelled minimization, and by `Task.result` for a cancelled
+    task.
+    """
+
+
+class Timeout(Cancelled):
+    """
+    Raised instead of `Cancelled` when a task is cancelled by its timeout.
+    """
+
+
+class CancelToken(object):
+    """
+    Passed to minimization as its `cancel` option.  Long running loops call
+    `check` at checkpoints, which raises once `cancel` has been called, so
+    that a cancelled minimization stops promptly rather than running to
+    completion.
+    """
+    error = None
+
+    def cancel(self, error=Cancelled):
+        if self.error is None:
+            self.error = error
+
+    @property
+    def cancelled(self):
+        return self.error is not None
+
+    def check(self):
+        if self.error is not None:
+            raise self.error()
+
+
+class Task(object):
+    """
+    A minimization running in a background thread, like a future.  The
+    function is called with the extra `cancel` option set to a `CancelToken`.
+    If `timeout` is given, in seconds, the task is cancelled with `Timeout`
+    if it hasn't finished by then.
+    """
+    _result = _exc_info = None
+
+    def __init__(self, function, args=(), kwargs=None, timeout=None):
+        kwargs = dict(kwargs or {})
+        self.token = kwargs['cancel'] = CancelToken()
+        self._done = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._timer = None
+        if timeout is not None:
+            self._timer = threading.Timer(
+                timeout, self.token.cancel, (Timeout,))
+            self._timer.daemon = True
+            self._timer.start()
+        thread = threading.Thread(target=self._run,
+                                  args=(function, args, kwargs))
+        thread.daemon = True
+        thread.start()
+
+    def _run(self, function, args, kwargs):
+        try:
+            self._result = function(*args, **kwargs)
+        except Exception:
+            self._exc_info = sys.exc_info()
+        if self._timer is not None:
+            self._timer.cancel()
+        with self._lock:
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+    def cancel(self):
+        """
+        Asks the minimization to stop at its next checkpoint.  Returns False
+        if the task has already finished.
+        """
+        if self._done.is_set():
+            return False
+        self.token.cancel()
+        return True
+
+    def cancelled(self):
+        return self.done() and self._exc_info is not None and issubclass(
+            self._exc_info[0], Cancelled)
+
+    def done(self):
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        """
+        Waits up to `timeout` seconds, or indefinitely, for the task to finish
+        and returns its result, or raises its exception.  Raises `Timeout` if
+        the task is still running after `timeout`, leaving it running.
+        """
+        if not self._done.wait(timeout):
+            raise Timeout()
+        if self._exc_info is not None:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+        return self._result
+
+    def add_done_callback(self, callback):
+        """
+        Arranges for `callback` to be called with the task when it finishes,
+        in the task's thread, or immediately if it already has.  Event loops
+        can use this to be woken up by the task.
+        """
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
@@ -10,6 +10,7 @@ class TestSynthesize(unittest.TestCase):
     def test_all_possible(self, N=3):
         from minbool import _range_minterms
         from minbool import synthesize
+        from minbool import verify
 
         def gen_functions():
             n_rows = 2**N
@@ -41,6 +42,7 @@ class TestSynthesize(unittest.TestCase):
                 if expected is None:
                     continue
                 self.assertEqual(expected, solution(*args))
+            self.assertEqual(verify(solution, f), None)
 
 
 class TestSimplify(unittest.TestCase):
@@ -85,3 +87,1716 @@ class TestSimplify(unittest.TestCase):
                       "and C and F or G and H and B")
         self.assertEqual(str(result), '((A and B) or (B and G and H) or '
                          '(C and D) or (C and E and F))')
+
+
+class TestBDD(unittest.TestCase):
+
+    def call_fut(self, expr):
+        from minbool import simplify as fut
+        return fut(expr, method='bdd')
+
+    def test_it(self):
+        self.assertEqual(str(self.call_fut('A or B and A')), 'A')
+        self.assertEqual(str(self.call_fut('not(A or B and A)')), '(not A)')
+
+    def test_always_false(self):
+        self.assertEqual(str(self.call_fut('A and not A')), 'False')
+
+    def test_always_true(self):
+        self.assertEqual(str(self.call_fut('A or not A')), 'True')
+
+    def test_matches_quine_mccluskey(self):
+        from minbool import _range_minterms
+        expr = ("A and B or A and C and not C or D and C or E and C and F or "
+                "G and H and B")
+        result = self.call_fut(expr)
+        self.assertEqual(len(result.solution), 4)
+        names = [name.id for name in result.names]
+        for args in _range_minterms(len(names)):
+            expected = eval(expr, dict(zip(names, map(bool, args))))
+            self.assertEqual(bool(expected), result(*args))
+
+    def test_canonical(self):
+        from minbool.bdd import BDD
+        bdd = BDD(3)
+        a, b, c = bdd.var(0), bdd.var(1), bdd.var(2)
+        f = bdd.conjoin(a, bdd.disjoin(b, c))
+        g = bdd.disjoin(bdd.conjoin(a, b), bdd.conjoin(c, a))
+        self.assertEqual(f, g)
+        self.assertEqual(bdd.count(f), 3)
+
+    def test_small_cache(self):
+        from minbool.bdd import BDD
+        from minbool.bdd import FALSE
+        bdd = BDD(8, cache_size=1)
+        f = FALSE
+        for level in xrange(8):
+            f = bdd.disjoin(f, bdd.var(level))
+        self.assertEqual(bdd.count(f), 255)
+
+    def test_tautology(self):
+        from minbool import is_tautology
+        self.assertTrue(is_tautology('A or not A'))
+        self.assertTrue(is_tautology('not (A and B) or A'))
+        self.assertFalse(is_tautology('A or B'))
+        self.assertTrue(is_tautology('A or True'))
+        self.assertFalse(is_tautology('A or False'))
+
+    def test_contradiction(self):
+        from minbool import is_contradiction
+        self.assertTrue(is_contradiction('A and not (A or B)'))
+        self.assertFalse(is_contradiction('A and not B'))
+        self.assertTrue(is_contradiction('A and False'))
+        self.assertFalse(is_contradiction('A and True'))
+
+    def test_constants(self):
+        self.assertEqual(str(self.call_fut('True or A')), 'True')
+        self.assertEqual(str(self.call_fut('A and False')), 'False')
+        self.assertEqual(str(self.call_fut('A or not True')), 'A')
+
+    def test_frequency_order(self):
+        from minbool import _ASTExpression
+        from minbool.bdd import order_propositions
+        expression = _ASTExpression('A and B or B and C or B and not A')
+        order = order_propositions(expression, 'frequency')
+        self.assertEqual(str(order[0].id), 'B')
+        self.assertRaises(ValueError, order_propositions, expression, 'foo')
+
+
+class TestEquivalent(unittest.TestCase):
+
+    def call_fut(self, a, b):
+        from minbool import equivalent as fut
+        return fut(a, b)
+
+    def test_equivalent(self):
+        result = self.call_fut('A and B or A and C', 'A and (C or B)')
+        self.assertTrue(result)
+        self.assertEqual(result.counterexample, None)
+
+    def test_not_equivalent(self):
+        result = self.call_fut('A and B or C', 'A and (B or C)')
+        self.assertFalse(result)
+        values = result.counterexample
+        self.assertEqual(sorted(values), ['A', 'B', 'C'])
+        self.assertNotEqual(eval('A and B or C', dict(values)),
+                            eval('A and (B or C)', dict(values)))
+
+    def test_simplify_result(self):
+        from minbool import simplify
+        expr = ("A and B or A and C and not C or D and C or E and C and F or "
+                "G and H and B")
+        self.assertTrue(self.call_fut(simplify(expr), expr))
+        self.assertFalse(self.call_fut(simplify(expr), expr + ' or I'))
+
+    def test_constants(self):
+        from minbool import simplify
+        self.assertTrue(self.call_fut(simplify('A or not A'), 'B or not B'))
+        self.assertFalse(self.call_fut(simplify('A and not A'), 'A'))
+
+    def test_synthesize_result(self):
+        from minbool import synthesize
+        result = synthesize(lambda a, b: a != b, 'a', 'b')
+        self.assertTrue(self.call_fut(result, 'a and not b or b and not a'))
+
+    def test_many_propositions(self):
+        # Far too many propositions to enumerate a truth table
+        names = ['x%d' % i for i in xrange(40)]
+        a = ' and '.join('(%s or not %s)' % (x, y)
+                         for x, y in zip(names, names[1:]))
+        b = ' and '.join('(not %s or %s)' % (y, x)
+                         for x, y in zip(names, names[1:]))
+        self.assertTrue(self.call_fut(a, b))
+        result = self.call_fut(a, b + ' and x0')
+        self.assertFalse(result)
+        self.assertFalse(result.counterexample['x0'])
+
+
+class TestImplies(unittest.TestCase):
+
+    def call_fut(self, a, b):
+        from minbool import implies as fut
+        return fut(a, b)
+
+    def test_implies(self):
+        self.assertTrue(self.call_fut('A and B', 'A or C'))
+
+    def test_does_not_imply(self):
+        result = self.call_fut('A or B', 'A')
+        self.assertFalse(result)
+        self.assertEqual(result.counterexample, {'A': False, 'B': True})
+
+    def test_contradiction_implies_anything(self):
+        self.assertTrue(self.call_fut('A and not A', 'B'))
+
+
+class TestConsensus(unittest.TestCase):
+
+    def call_fut(self, expr):
+        from minbool import simplify as fut
+        return fut(expr, method='consensus')
+
+    def test_it(self):
+        self.assertEqual(str(self.call_fut('A or B and A')), 'A')
+        self.assertEqual(str(self.call_fut('not(A or B and A)')), '(not A)')
+
+    def test_always_false(self):
+        self.assertEqual(str(self.call_fut('A and not A')), 'False')
+
+    def test_always_true(self):
+        self.assertEqual(str(self.call_fut('A or not A')), 'True')
+
+    def test_edgecase(self):
+        from minbool import equivalent
+        expr = ("A and B or A and C and not C or D and C or E and C and F or "
+                "G and H and B")
+        result = self.call_fut(expr)
+        self.assertEqual(len(result.solution), 4)
+        self.assertTrue(equivalent(result, expr))
+
+    def test_constants(self):
+        self.assertEqual(str(self.call_fut('True or A')), 'True')
+        self.assertEqual(str(self.call_fut('A and False')), 'False')
+        self.assertEqual(str(self.call_fut('A or not True')), 'A')
+
+    def test_prime_implicants(self):
+        from minbool.consensus import prime_implicants
+        # x y' + y z yields the consensus term x z
+        primes = prime_implicants([(1, 0, None), (None, 1, 1)])
+        self.assertEqual(sorted(primes, key=repr),
+                         sorted([(1, 0, None), (None, 1, 1), (1, None, 1)],
+                                key=repr))
+
+    def test_many_propositions(self):
+        from minbool import equivalent
+        names = ['x%d' % i for i in xrange(20)]
+        expr = ' or '.join('%s and not (%s or not %s)' % (x, y, x)
+                           for x, y in zip(names, names[1:]))
+        result = self.call_fut(expr)
+        self.assertEqual(len(result.solution), 19)
+        self.assertTrue(equivalent(result, expr))
+
+
+class TestStreaming(unittest.TestCase):
+
+    def call_fut(self, f, *names, **options):
+        from minbool import synthesize as fut
+        return fut(f, streaming=True, *names, **options)
+
+    def test_it(self):
+        def f(A, B, C, D):
+            return A if B else C or D
+        result = self.call_fut(f, 'A', 'B', 'C', 'D')
+        self.assertEqual(sorted(result.solution),
+                         [(None, 0, None, 1), (None, 0, 1, None),
+                          (1, 1, None, None)])
+
+    def test_dont_care(self):
+        def f(A, B):
+            if A and B:
+                return None
+            return A or B
+        result = self.call_fut(f, 'A', 'B')
+        self.assertEqual(sorted(result.solution), [(None, 1), (1, None)])
+
+    def test_spill(self):
+        from minbool import _find_prime_implicants
+        from minbool import _range_minterms
+        from minbool.stream import prime_implicants
+        from minbool.stream import to_implicant
+
+        def f(*args):
+            ones = sum(args)
+            if ones == 3:
+                return None
+            return ones % 3 == 1 or args[0] and not args[5]
+
+        truthtable = dict([(args, f(*args)) for args in _range_minterms(7)])
+        minterms = [i for i, args in enumerate(_range_minterms(7))
+                    if truthtable[args] in (True, None)]
+        self.assertEqual(
+            set([to_implicant(value, mask, 7) for value, mask in
+                 prime_implicants(minterms, 7, memory_limit=64)]),
+            _find_prime_implicants(truthtable, 7))
+
+        names = ['x%d' % i for i in xrange(7)]
+        result = self.call_fut(f, memory_limit=64, *names)
+        for args in _range_minterms(7):
+            expected = f(*args)
+            if expected is not None:
+                self.assertEqual(bool(expected), result(*args))
+
+    def test_store(self):
+        from minbool.stream import ImplicantStore
+        store = ImplicantStore(4, 32)
+        for value in (3, 5, 3, 6, 9, 5):
+            store.add(value, 0)
+        self.assertTrue(store.runs[2])
+        self.assertEqual(list(store.group(2)),
+                         [(3, 0), (5, 0), (6, 0), (9, 0)])
+        store.close()
+
+    def test_unexpected_option(self):
+        from minbool import synthesize
+        self.assertRaises(TypeError, synthesize, lambda a: a, 'a', foo=True)
+
+
+class TestSynthesizeMultiple(unittest.TestCase):
+
+    def call_fut(self, f, *names):
+        from minbool import synthesize_multiple as fut
+        return fut(f, *names)
+
+    def test_shared_term(self):
+        from minbool import synthesize
+
+        def f(A, B, C):
+            return (not (A or B or C), C or not (A or B))
+
+        first, second = self.call_fut(f, 'A', 'B', 'C')
+        self.assertEqual(first.solution, [(0, 0, 0)])
+        self.assertEqual(sorted(second.solution), [(None, None, 1), (0, 0, 0)])
+        # Minimized separately the second output would not share a term
+        alone = synthesize(lambda *args: f(*args)[1], 'A', 'B', 'C')
+        self.assertEqual(sorted(alone.solution),
+                         [(None, None, 1), (0, 0, None)])
+
+    def test_all_rows(self):
+        from minbool import _range_minterms
+
+        def f(A, B, C, D):
+            return (A != B, (A or C) and D, None if A and D else B or C,
+                    False)
+
+        results = self.call_fut(f, 'A', 'B', 'C', 'D')
+        self.assertEqual(len(results), 4)
+        self.assertEqual(str(results[3]), 'False')
+        for args in _range_minterms(4):
+            for expected, result in zip(f(*args), results):
+                if expected is not None:
+                    self.assertEqual(bool(expected), result(*args))
+
+    def test_simplified_outputs(self):
+        from minbool import _range_minterms
+        from minbool import synthesize
+        from minbool import synthesize_multiple
+
+        def f(A, B, C):
+            return (A or B, A and C)
+
+        results = synthesize_multiple(f, 'A', 'B', 'C')
+        self.assertEqual(str(results[0]), str(synthesize(
+            lambda *args: f(*args)[0], 'A', 'B', 'C')))
+        self.assertEqual(str(results[1]), '(A and C)')
+
+
+class TestCosts(unittest.TestCase):
+
+    expr = ("not x and not y and z or not x and y and not z or "
+            "w and not x and not z")
+
+    def call_fut(self, expr, costs, method='qm'):
+        from minbool import simplify as fut
+        return fut(expr, method, costs)
+
+    def test_avoids_expensive(self):
+        from minbool import equivalent
+        for method in ('qm', 'bdd', 'consensus'):
+            result = self.call_fut(self.expr, {'z': 20}, method)
+            self.assertTrue(equivalent(result, self.expr))
+            self.assertEqual(str(result).count('z'), 2)
+
+    def test_estimated(self):
+        from minbool import equivalent
+        expr = self.expr.replace('z', 'z()')
+        result = self.call_fut(expr, {})
+        self.assertTrue(equivalent(result, expr))
+        self.assertEqual(str(result).count('z()'), 2)
+
+    def test_estimate_cost(self):
+        import ast
+        from minbool import _estimate_cost
+        def cost(source):
+            return _estimate_cost(ast.parse(source).body[0].value)
+        self.assertTrue(cost('a') < cost('a.b') < cost('a.b < 1') <
+                        cost('f(a)'))
+
+    def test_synthesize(self):
+        from minbool import synthesize
+
+        def f(A, B):
+            if A != B:
+                return None
+            return A
+
+        self.assertEqual(str(synthesize(f, 'A', 'B', costs=[5, 1])), '(B)')
+        self.assertEqual(str(synthesize(f, 'A', 'B', costs=[1, 5])), '(A)')
+
+    def test_compare_proposition(self):
+        self.assertEqual(str(self.call_fut('a < b and c or a < b', None)),
+                         '(a < b)')
+
+    def test_never_dearer(self):
+        import random
+        from minbool import _find_cover
+        from minbool import _find_prime_implicants
+        from minbool import _implicant_cost
+        from minbool import _range_minterms
+        rng = random.Random(1)
+        for _ in xrange(300):
+            costs = [rng.randint(1, 10) for _ in xrange(4)]
+            truthtable = dict([(minterm, rng.random() < 0.5)
+                               for minterm in _range_minterms(4)])
+            implicants = _find_prime_implicants(truthtable, 4)
+            def cost(solution):
+                return sum([_implicant_cost(implicant, costs)
+                            for implicant in solution])
+            self.assertTrue(
+                cost(_find_cover(implicants, truthtable, costs)) <=
+                cost(_find_cover(implicants, truthtable)))
+
+
+class TestOrdered(unittest.TestCase):
+
+    def test_literals(self):
+        from minbool import synthesize
+        result = synthesize(lambda A, B, C: A and B and not C, 'A', 'B', 'C')
+        ordered = result.ordered([0.9, 0.1, 0.5])
+        self.assertEqual(str(ordered), '(B and not(C) and A)')
+        self.assertEqual(ordered.solution, result.solution)
+
+    def test_terms(self):
+        from minbool import equivalent
+        from minbool import simplify
+        result = simplify('a and b or c')
+        likely = result.ordered({'c': 0.9})
+        self.assertTrue(str(likely).startswith('(c or '))
+        self.assertTrue(equivalent(likely, 'a and b or c'))
+        unlikely = result.ordered({'c': 0.1})
+        self.assertTrue(str(unlikely).endswith(' or c)'))
+        self.assertTrue(equivalent(unlikely, 'a and b or c'))
+
+    def test_costs(self):
+        from minbool import simplify
+        result = simplify('a and b')
+        self.assertEqual(str(result.ordered(costs={'a': 5})), '(b and a)')
+        self.assertEqual(str(result.ordered({'a': 0.1, 'b': 0.9},
+                                            costs={'a': 5})), '(a and b)')
+
+    def test_samples(self):
+        from minbool import _range_minterms
+        from minbool import synthesize
+
+        def f(A, B, C):
+            return A and not B or C
+
+        samples = [(1, 1, 0), (1, 1, 1), (0, 1, 0), (1, 1, 0)]
+        result = synthesize(f, 'A', 'B', 'C').ordered(samples=samples)
+        # B is always true in the samples, so the first term never is
+        self.assertEqual(str(result), '(C) or (not(B) and A)')
+        for args in _range_minterms(3):
+            self.assertEqual(bool(f(*args)), result(*args))
+
+
+class TestFactor(unittest.TestCase):
+
+    def call_fut(self, expr):
+        from minbool import simplify
+        return simplify(expr).factor()
+
+    def assertFactored(self, expr, literals):
+        import ast
+        from minbool import equivalent
+        result = self.call_fut(expr)
+        self.assertTrue(equivalent(result, expr))
+        names = [node for node in ast.walk(ast.parse(str(result)))
+                 if isinstance(node, ast.Name)]
+        self.assertEqual(len(names), literals)
+        return str(result)
+
+    def test_common_literal(self):
+        result = self.assertFactored('a and b or a and c or a and d', 4)
+        self.assertTrue(result.startswith('(a and ('))
+
+    def test_kernel(self):
+        self.assertFactored(
+            'a and c or a and d or b and c or b and d or e', 5)
+
+    def test_nothing_to_factor(self):
+        self.assertFactored('a and b or c', 3)
+
+    def test_constants(self):
+        self.assertEqual(str(self.call_fut('a or not a')), 'True')
+        self.assertEqual(str(self.call_fut('a and not a')), 'False')
+
+    def test_fewer_literals(self):
+        from minbool import equivalent
+        from minbool import simplify
+        from minbool.factor import count_literals
+        from minbool.factor import factor
+        from minbool.factor import from_solution
+        expr = ("A and B or A and C and not C or D and C or E and C and F or "
+                "G and H and B")
+        result = simplify(expr)
+        self.assertTrue(equivalent(result.factor(), expr))
+        self.assertEqual(
+            count_literals(factor(from_solution(result.solution))), 8)
+
+    def test_divide(self):
+        from minbool.factor import divide
+        a, b, c, d = [frozenset([(i, 1)]) for i in xrange(4)]
+        quotient, remainder = divide([a | c, a | d, b | c, b | d, c],
+                                     [a, b])
+        self.assertEqual(sorted(quotient), sorted([c, d]))
+        self.assertEqual(remainder, [c])
+
+
+class TestDecisionTree(unittest.TestCase):
+
+    def test_source(self):
+        from minbool import synthesize
+        result = synthesize(lambda a, b: a and b, 'a', 'b')
+        tree = result.decision_tree([0.1, 0.9])
+        self.assertEqual(tree.source, '\n'.join([
+            'def decide(*args):',
+            '    if (len(args) != 2):',
+            "        raise ValueError('Wrong number of arguments')",
+            '    (a, b) = args',
+            '    if a:',
+            '        if b:',
+            '            return True',
+            '        else:',
+            '            return False',
+            '    else:',
+            '        return False']))
+
+    def test_all_rows(self):
+        from minbool import _range_minterms
+        from minbool import synthesize
+
+        def f(A, B, C, D):
+            return A if B else C or D
+
+        result = synthesize(f, 'A', 'B', 'C', 'D')
+        tree = result.decision_tree()
+        for args in _range_minterms(4):
+            self.assertEqual(result(*args), tree(*args))
+        self.assertRaises(ValueError, tree, True)
+
+    def test_probabilities(self):
+        from minbool import simplify
+        from minbool import synthesize
+        result = simplify('a and b')
+        self.assertTrue('    if b:\n        if a' in
+                        result.decision_tree({'b': 0.1}).source)
+        result = synthesize(lambda a, b: a and b, 'a', 'b')
+        self.assertTrue('    if b:\n        if a' in
+                        result.decision_tree(samples=[(1, 0), (0, 0), (1, 1),
+                                                      (1, 0)]).source)
+
+    def test_propositions(self):
+        from minbool import simplify
+        result = simplify('x.y and f(z) or not x.y')
+        tree = result.decision_tree()
+        self.assertEqual(tree.size, 2)
+        self.assertTrue('(_0, _1) = args' in tree.source)
+
+    def test_constant(self):
+        from minbool import simplify
+        tree = simplify('a or not a').decision_tree()
+        self.assertTrue(tree(False))
+        self.assertEqual(tree.size, 0)
+
+    def test_shared(self):
+        from minbool import BooleanExpression
+        from minbool import _range_minterms
+        # a0 and b0 or a1 and b1 or ..., where every false branch shares
+        # the sub-tree of the remaining pairs
+        lines = []
+        for n in (2, 4, 8, 12):
+            names = []
+            solution = []
+            for i in xrange(n):
+                names.extend(['a%d' % i, 'b%d' % i])
+                implicant = [None] * (2 * n)
+                implicant[2 * i] = implicant[2 * i + 1] = 1
+                solution.append(tuple(implicant))
+            tree = BooleanExpression(names, solution).decision_tree()
+            lines.append(len(tree.source.splitlines()))
+            if n == 2:
+                for args in _range_minterms(4):
+                    self.assertEqual(tree(*args),
+                                     bool(args[0] and args[1] or
+                                          args[2] and args[3]))
+        self.assertEqual(lines[3] - lines[2], lines[2] - lines[1])
+        self.assertEqual(lines[2] - lines[1], 2 * (lines[1] - lines[0]))
+
+
+class TestCompileRules(unittest.TestCase):
+
+    def call_fut(self, expressions):
+        from minbool import compile_rules as fut
+        return fut(expressions)
+
+    def test_it(self):
+        rules = self.call_fut({
+            'admin': 'user.is_admin or user.is_staff and user.is_admin',
+            'staff': 'user.is_staff and not user.is_admin',
+            'either': 'user.is_staff or user.is_admin',
+            'never': 'user.is_staff and not user.is_staff',
+        })
+        self.assertEqual(rules.names, ['user'])
+
+        class User(object):
+            def __init__(self, is_admin, is_staff):
+                self.is_admin = is_admin
+                self.is_staff = is_staff
+
+        self.assertEqual(rules(User(True, False)), set(['admin', 'either']))
+        self.assertEqual(rules(User(False, True)), set(['staff', 'either']))
+        self.assertEqual(rules(user=User(False, False)), set())
+
+    def test_evaluates_once(self):
+        calls = []
+
+        def check(name):
+            calls.append(name)
+            return name == 'b'
+
+        rules = self.call_fut(['check("a") and check("b")',
+                               'check("b") or check("c")',
+                               'check("a") or check("b")'])
+        self.assertEqual(rules.names, ['check'])
+        self.assertEqual(rules(check), set([1, 2]))
+        self.assertEqual(sorted(set(calls)), sorted(calls))
+        self.assertTrue('b' in calls)
+
+    def test_synthesized(self):
+        from minbool import synthesize
+        rules = self.call_fut({
+            'xor': synthesize(lambda a, b: a != b, 'a', 'b'),
+            'always': synthesize(lambda a: True, 'a'),
+        })
+        self.assertEqual(rules.names, ['a', 'b'])
+        self.assertEqual(rules(True, False), set(['xor', 'always']))
+        self.assertEqual(rules(True, True), set(['always']))
+
+    def test_bound_names(self):
+        rules = self.call_fut(['any(x > 0 for x in items) and user',
+                               'all([y for y in items]) or (lambda *z: z)'])
+        self.assertEqual(rules.names, ['items', 'user'])
+        self.assertEqual(rules([0, 1], True), set([0, 1]))
+        self.assertEqual(rules([0], True), set([1]))
+
+    def test_builtin_names(self):
+        from minbool import compile_rules
+        rules = compile_rules(['id > 3 and user.ok'])
+        self.assertEqual(rules.names, ['user'])
+        rules = compile_rules(['id > 3 and user.ok'], names=['id', 'user'])
+        self.assertEqual(rules.names, ['id', 'user'])
+
+        class User(object):
+            ok = True
+
+        self.assertEqual(rules(id=1, user=User()), set())
+        self.assertEqual(rules(4, User()), set([0]))
+        self.assertRaises(ValueError, compile_rules, ['a and b'], ['a'])
+
+    def test_source(self):
+        rules = self.call_fut(['a and not b'])
+        self.assertEqual(rules.source.count(' = a\n'), 1)
+        self.assertEqual(rules.source.count(' = b\n'), 1)
+        self.assertTrue('if (not _p' in rules.source)
+
+
+class TestBitwise(unittest.TestCase):
+
+    def test_synthesized(self):
+        from minbool import synthesize
+        result = synthesize(lambda A, B, C: A and B or not C, 'A', 'B', 'C')
+        self.assertEqual(sorted(result.bitwise()[1:-1].split(' | ')),
+                         ['(A & B)', '(~C)'])
+
+    def test_propositions(self):
+        from minbool import simplify
+        result = simplify('x > 1 and not y.z or x > 1 and w + 1 > 2')
+        source = result.bitwise()
+        self.assertEqual(source.count('(x > 1)'), 2)
+        self.assertTrue('(~y.z)' in source)
+        self.assertTrue('(w + 1 > 2)' in source)
+        self.assertEqual(source.count(' | '), 1)
+
+    def test_evaluates_elementwise(self):
+        from minbool import _range_minterms
+        from minbool import simplify
+
+        class Column(object):
+            # Minimal stand in for an array of booleans
+            def __init__(self, values):
+                self.values = values
+
+            def __and__(self, other):
+                return Column([a and b for a, b in
+                               zip(self.values, other.values)])
+
+            def __or__(self, other):
+                return Column([a or b for a, b in
+                               zip(self.values, other.values)])
+
+            def __invert__(self):
+                return Column([not a for a in self.values])
+
+        expr = 'a and not b or c and b or not a and not c'
+        rows = list(_range_minterms(3))
+        columns = dict([(name, Column([bool(row[i]) for row in rows]))
+                        for i, name in enumerate('abc')])
+        result = eval(simplify(expr).bitwise(), columns)
+        self.assertEqual(result.values, [
+            bool(eval(expr, dict(zip('abc', row)))) for row in rows])
+
+    def test_constant(self):
+        from minbool import simplify
+        self.assertEqual(simplify('a or not a').bitwise(), 'True')
+
+
+class TestProductOfSums(unittest.TestCase):
+
+    def call_fut(self, f, *names, **options):
+        from minbool import synthesize
+        return synthesize(f, *names, **options)
+
+    def _check(self, expr, f, N):
+        from minbool import _range_minterms
+        for args in _range_minterms(N):
+            self.assertEqual(expr(*args), bool(f(*args)))
+            self.assertEqual(
+                eval(str(expr), dict(zip('ABCD', args))), bool(f(*args)))
+
+    def test_pos(self):
+        f = lambda A, B, C, D: (A or B) and (C or D)
+        expr = self.call_fut(f, 'A', 'B', 'C', 'D', form='pos')
+        self.assertEqual(expr.form, 'pos')
+        self.assertEqual(sorted(str(expr).split(' and ')),
+                         ['(A or B)', '(C or D)'])
+        self._check(expr, f, 4)
+
+    def test_best(self):
+        f = lambda A, B, C, D: (A or B) and (C or D)
+        self.assertEqual(self.call_fut(f, 'A', 'B', 'C', 'D').form, 'sop')
+        self.assertEqual(
+            self.call_fut(f, 'A', 'B', 'C', 'D', form='best').form, 'pos')
+        f = lambda A, B, C, D: A and B or C and D
+        self.assertEqual(
+            self.call_fut(f, 'A', 'B', 'C', 'D', form='best').form, 'sop')
+
+    def test_streaming(self):
+        f = lambda A, B, C, D: None if A and B and C and D else (
+            (A or not B) and (C or D))
+        expr = self.call_fut(f, 'A', 'B', 'C', 'D', form='pos',
+                             streaming=True)
+        from minbool import _range_minterms
+        for args in _range_minterms(4):
+            if f(*args) is not None:
+                self.assertEqual(expr(*args), bool(f(*args)))
+
+    def test_constants(self):
+        expr = self.call_fut(lambda A, B: True, 'A', 'B', form='pos')
+        self.assertEqual(str(expr), 'True')
+        self.assertEqual(expr(0, 0), True)
+        expr = self.call_fut(lambda A, B: False, 'A', 'B', form='pos')
+        self.assertEqual(str(expr), 'False')
+        self.assertEqual(expr(1, 1), False)
+
+    def test_unknown_form(self):
+        self.assertRaises(ValueError, self.call_fut, lambda A: A, 'A',
+                          form='cnf')
+
+    def test_simplify(self):
+        from minbool import equivalent
+        from minbool import simplify
+        expr = '(a or b) and (c or d.e) and not f'
+        for method in ('qm', 'bdd', 'consensus'):
+            result = simplify(expr, method=method, form='best')
+            self.assertEqual(result.form, 'pos')
+            self.assertEqual(str(result).count(' and '), 2)
+            self.assertTrue(equivalent(result, expr))
+
+    def test_derived(self):
+        from minbool import _range_minterms
+        from minbool import compile_rules
+        from minbool import equivalent
+        from minbool import simplify
+        f = lambda A, B, C, D: (A or B) and (C or D)
+        expr = self.call_fut(f, 'A', 'B', 'C', 'D', form='pos')
+        tree = expr.decision_tree()
+        ordered = expr.ordered(probabilities=[0.9, 0.1, 0.5, 0.2])
+        self.assertEqual(ordered.form, 'pos')
+        factored = simplify('(a or b) and (a or c)', form='pos').factor()
+        self.assertTrue(str(factored).startswith('(a or ('))
+        self.assertTrue(equivalent(factored, '(a or b) and (a or c)'))
+        rule_set = compile_rules({'pos': simplify(
+            '(A or B) and (C or D)', form='pos')})
+        for args in _range_minterms(4):
+            self.assertEqual(tree(*args), f(*args))
+            self.assertEqual(ordered(*args), f(*args))
+            self.assertEqual('pos' in rule_set(*args), f(*args))
+
+
+class TestESOP(unittest.TestCase):
+
+    def call_fut(self, f, *names):
+        from minbool import synthesize
+        return synthesize(f, form='esop', *names)
+
+    def test_parity(self):
+        names = ['x%d' % i for i in xrange(12)]
+        expr = self.call_fut(lambda *args: sum(args) % 2 == 1, *names)
+        self.assertEqual(len(expr.solution), 12)
+        self.assertEqual(str(expr), ' ^ '.join(
+            ['bool(%s)' % name for name in names]))
+        self.assertEqual(expr(*([1] * 5 + [0] * 7)), True)
+        self.assertEqual(expr(*([1] * 6 + [0] * 6)), False)
+
+    def test_all_possible(self):
+        from minbool import _range_minterms
+        minterms = list(_range_minterms(3))
+        for i in xrange(2**8):
+            outputs = dict([(minterm, bool(i & (1 << n)))
+                            for n, minterm in enumerate(minterms)])
+            expr = self.call_fut(lambda *args: outputs[args], 'A', 'B', 'C')
+            self.assertTrue(len(expr.solution) <= 4)
+            for minterm in minterms:
+                self.assertEqual(expr(*minterm), outputs[minterm])
+                self.assertEqual(
+                    eval(str(expr), dict(zip('ABC', minterm))),
+                    outputs[minterm])
+
+    def test_merge(self):
+        from minbool.esop import merge
+        self.assertEqual(merge([(1, 1), (0, 1)]), [(None, 1)])
+        self.assertEqual(merge([(1, 1), (None, 1)]), [(0, 1)])
+        self.assertEqual(merge([(1, 0), (1, 0), (0, 0)]), [(0, 0)])
+
+    def test_simplify(self):
+        from minbool import equivalent
+        from minbool import simplify
+        expr = 'x.y ^ (z > 1) ^ w and v'
+        result = simplify(expr, form='esop')
+        self.assertEqual(result.form, 'esop')
+        self.assertEqual(len(result.solution), 3)
+        self.assertTrue(equivalent(result, expr))
+        self.assertFalse(equivalent(result, 'x.y ^ (z > 1)'))
+        self.assertTrue(equivalent(simplify(str(result)), expr))
+        self.assertTrue(equivalent(
+            simplify(expr, method='bdd'), simplify(expr, method='consensus')))
+        self.assertRaises(ValueError, simplify, expr, method='bdd',
+                          form='esop')
+
+    def test_other_operators(self):
+        from minbool import _ASTExpression
+        from minbool import equivalent
+        from minbool import implies
+        from minbool import is_tautology
+        from minbool import simplify
+        from minbool import simplify_iter
+        from minbool.packed import TableCache
+        # Operators other than ^ are part of propositions
+        for expr in ('a + b or c and not (a + b)', 'a | b or c and not a | b',
+                     'flags & MASK ^ c'):
+            self.assertEqual(len(_ASTExpression(expr).propositions), 2)
+            for method in ('qm', 'bdd', 'consensus'):
+                result = simplify(expr, method=method)
+                self.assertEqual(len(result.names), 2)
+                self.assertTrue(equivalent(result, expr))
+            self.assertTrue(equivalent(
+                simplify(expr, table_cache=TableCache()), expr))
+            self.assertTrue(equivalent(list(simplify_iter(expr))[-1], expr))
+            self.assertTrue(implies(expr, expr))
+            self.assertFalse(is_tautology(expr))
+            self.assertFalse(_ASTExpression(expr)(False, False))
+
+    def test_derived(self):
+        from minbool import _range_minterms
+        from minbool import compile_rules
+        from minbool import simplify
+        f = lambda A, B, C, D: (A and B) != (C or D)
+        expr = self.call_fut(f, 'A', 'B', 'C', 'D')
+        tree = expr.decision_tree()
+        ordered = expr.ordered(probabilities=[0.9, 0.1, 0.5, 0.2])
+        rule_set = compile_rules({'esop': simplify(
+            'bool(A and B) ^ bool(C or D)', form='esop')})
+        bitwise = expr.bitwise()
+        for args in _range_minterms(4):
+            self.assertEqual(tree(*args), f(*args))
+            self.assertEqual(ordered(*args), f(*args))
+            self.assertEqual('esop' in rule_set(*args), f(*args))
+            self.assertEqual(
+                eval(bitwise, dict(zip('ABCD', args))) & 1, f(*args))
+
+
+class TestInvariants(unittest.TestCase):
+
+    def test_synthesize(self):
+        from minbool import synthesize
+        calls = []
+
+        def f(is_guest, is_admin, is_owner):
+            calls.append((is_guest, is_admin, is_owner))
+            return not is_guest and (is_admin or is_owner)
+
+        names = ('is_guest', 'is_admin', 'is_owner')
+        self.assertEqual(
+            sorted(str(synthesize(f, *names)).split(' or ')),
+            ['(not(is_guest) and is_admin)', '(not(is_guest) and is_owner)'])
+        del calls[:]
+        invariants = ['not (is_guest and is_admin)',
+                      'not (is_guest and is_owner)']
+        result = synthesize(f, invariants=invariants, *names)
+        self.assertEqual(sorted(str(result).split(' or ')),
+                         ['(is_admin)', '(is_owner)'])
+        self.assertEqual(len(calls), 5)
+
+    def test_simplify(self):
+        from minbool import implies
+        from minbool import simplify
+        expr = 'not user.is_guest and (user.is_admin or user.is_owner())'
+        invariants = ['user.is_guest ^ (user.is_admin or user.is_owner())']
+        for method in ('qm', 'bdd', 'consensus'):
+            result = simplify(expr, method=method, invariants=invariants)
+            self.assertEqual(len(result.solution), 1)
+            self.assertEqual(result.solution[0].count(None), 2)
+            self.assertTrue(implies(result, 'not user.is_guest'))
+
+    def test_contradiction(self):
+        from minbool import simplify
+        self.assertEqual(
+            str(simplify('a or b', invariants=['not a', 'not b'])), 'False')
+
+    def test_unknown_proposition(self):
+        from minbool import simplify
+        from minbool import synthesize
+        self.assertRaises(ValueError, synthesize, lambda a: a, 'a',
+                          invariants=['a or b'])
+        for method in ('qm', 'bdd', 'consensus'):
+            self.assertRaises(ValueError, simplify, 'a', method=method,
+                              invariants=['a or b'])
+
+    def test_packed(self):
+        from minbool import _ASTExpression
+        from minbool import _range_minterms
+        from minbool.packed import evaluate
+        from minbool.packed import rows
+        expr = 'a and not (b or c) or (c ^ a) and True'
+        table = rows(evaluate(_ASTExpression(expr),
+                              {'a': 0, 'b': 1, 'c': 2}, 3), 3)
+        for i, (a, b, c) in enumerate(_range_minterms(3)):
+            self.assertEqual(table[i], str(int(bool(eval(expr)))))
+
+
+class TestAnytime(unittest.TestCase):
+
+    def call_fut(self, f, *names, **options):
+        from minbool import synthesize_iter
+        return list(synthesize_iter(f, *names, **options))
+
+    def test_improving(self):
+        from minbool import _range_minterms
+        from minbool import synthesize
+        f = lambda A, B, C, D: A and not B or C and D or not A and B
+        results = self.call_fut(f, 'A', 'B', 'C', 'D')
+        self.assertTrue(len(results) > 1)
+        self.assertEqual(len(results[0].solution), 10)
+        sizes = [str(result).count('(') for result in results]
+        self.assertEqual(sizes, sorted(sizes, reverse=True))
+        self.assertEqual(len(set(sizes)), len(sizes))
+        self.assertEqual(sorted(results[-1].solution),
+                         sorted(synthesize(f, 'A', 'B', 'C', 'D').solution))
+        for result in results:
+            for args in _range_minterms(4):
+                self.assertEqual(result(*args), bool(f(*args)))
+
+    def test_never_worse(self):
+        import random
+        from minbool import _cheapest
+        from minbool import synthesize
+        rng = random.Random(1)
+        names = ['A', 'B', 'C', 'D']
+        for _ in xrange(50):
+            rows = [rng.choice([True, False, None]) for _ in xrange(16)]
+            f = lambda A, B, C, D: rows[8 * A + 4 * B + 2 * C + D]
+            form = rng.choice(['sop', 'pos', 'best'])
+            last = self.call_fut(f, form=form, *names)[-1]
+            result = synthesize(f, form=form, *names)
+            self.assertTrue(_cheapest([(last.solution, last.form),
+                                       (result.solution, result.form)])[0]
+                            is last.solution)
+
+    def test_stop_early(self):
+        from minbool import synthesize_iter
+        names = ['x%d' % i for i in xrange(6)]
+        results = synthesize_iter(lambda *args: sum(args) > 3, *names)
+        first = results.next()
+        self.assertEqual(len(first.solution), 22)
+        self.assertTrue(first(1, 1, 1, 1, 0, 0))
+
+    def test_best(self):
+        f = lambda A, B, C, D: (A or B) and (C or D)
+        results = self.call_fut(f, 'A', 'B', 'C', 'D', form='best')
+        self.assertEqual(results[-1].form, 'pos')
+
+    def test_esop(self):
+        self.assertRaises(ValueError, self.call_fut, lambda A: A, 'A',
+                          form='esop')
+
+    def test_simplify(self):
+        from minbool import equivalent
+        from minbool import simplify_iter
+        expr = 'a and b or a and not b or c.d and not a'
+        results = list(simplify_iter(expr))
+        self.assertTrue(str(results[-1]) in ('(a or c.d)', '(c.d or a)'))
+        for result in results:
+            self.assertTrue(equivalent(result, expr))
+
+
+class TestBatch(unittest.TestCase):
+
+    def call_fut(self, lines, *args):
+        from minbool import main
+        from StringIO import StringIO
+        out, err = StringIO(), StringIO()
+        status = main(['simplify'] + list(args), out=out,
+                      inp=StringIO(''.join([line + '\n' for line in lines])),
+                      err=err)
+        return status, out.getvalue().splitlines(), err.getvalue()
+
+    def test_ordered(self):
+        status, out, err = self.call_fut(
+            ['A or B and A', '', 'a and not a', 'A or B and A', 'a and ('],
+            '--batch')
+        self.assertEqual(status, 1)
+        self.assertEqual(out[:3], ['A', 'False', 'A'])
+        self.assertTrue(out[3].startswith('!error SyntaxError'))
+        self.assertTrue(err.startswith('4 lines, 1 errors, 1 cache hits'))
+        self.assertTrue('latency ms: p50' in err)
+
+    def test_cache(self):
+        lines = ['A or B and A'] * 200
+        status, out, err = self.call_fut(lines, '-b')
+        self.assertEqual(status, 0)
+        self.assertEqual(out, ['A'] * 200)
+        self.assertTrue(err.startswith('200 lines, 0 errors, 199 cache hits'))
+
+    def test_json_unordered(self):
+        import json
+        status, out, err = self.call_fut(
+            ['{"expr": "x.y or not x.y", "id": 7}', '"a and (b or a)"',
+             'not json'], '-b', '--json', '--unordered')
+        records = sorted([json.loads(line) for line in out],
+                         key=lambda record: record['line'])
+        self.assertEqual(records, [
+            {'line': 1, 'id': 7, 'expr': 'x.y or not x.y', 'result': 'True'},
+            {'line': 2, 'expr': 'a and (b or a)', 'result': 'a'},
+            {'line': 3, 'expr': 'not json', 'error': 'Invalid JSON'}])
+
+    def test_json_not_string(self):
+        import json
+        status, out, err = self.call_fut(
+            ['{"expr": ["a"]}', '42', '"a or a"'], '-b', '--json')
+        self.assertEqual(status, 1)
+        self.assertTrue(err.startswith('3 lines, 2 errors'))
+        self.assertEqual([json.loads(line) for line in out], [
+            {'line': 1, 'expr': ['a'],
+             'error': 'Expression must be a string'},
+            {'line': 2, 'expr': 42, 'error': 'Expression must be a string'},
+            {'line': 3, 'expr': 'a or a', 'result': 'a'}])
+
+    def test_pool(self):
+        lines = ['a%d and b or a%d and not b' % (i, i) for i in xrange(20)]
+        status, out, err = self.call_fut(lines, '-b', '-j', '2',
+                                         '--unordered')
+        self.assertEqual(sorted(out), sorted(
+            ['%d\ta%d' % (i + 1, i) for i in xrange(20)]))
+
+    def test_file(self):
+        import os
+        import tempfile
+        fd, path = tempfile.mkstemp()
+        try:
+            os.write(fd, 'A or B and A\n')
+            os.close(fd)
+            status, out, err = self.call_fut([], '-f', path, '--form', 'pos')
+        finally:
+            os.remove(path)
+        self.assertEqual(out, ['A'])
+
+
+class TestServer(unittest.TestCase):
+
+    def setUp(self):
+        import threading
+        from minbool.server import MinimizationServer
+        self.server = MinimizationServer(('127.0.0.1', 0), processes=2)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def request(self, path, body=None):
+        import json
+        import urllib2
+        url = 'http://127.0.0.1:%d%s' % (self.server.server_address[1], path)
+        if body is not None:
+            body = json.dumps(body)
+        try:
+            response = urllib2.urlopen(url, body)
+        except urllib2.HTTPError, response:
+            pass
+        return response.code, json.loads(response.read())
+
+    def test_simplify(self):
+        self.assertEqual(self.request('/simplify', {'expr': 'a or b and a'}),
+                         (200, {'result': 'a'}))
+        self.assertEqual(self.request('/simplify', {'expr': 'a or b and a'}),
+                         (200, {'result': 'a'}))
+        status, body = self.request('/simplify', {'expr': 'a and ('})
+        self.assertEqual(status, 400)
+        self.assertTrue(body['error'].startswith('SyntaxError'))
+        status, metrics = self.request('/metrics')
+        self.assertEqual(metrics['requests'], 3)
+        self.assertEqual(metrics['cache_hits'], 1)
+        self.assertEqual(metrics['errors'], 1)
+        self.assertEqual(metrics['in_flight'], 0)
+
+    def test_synthesize(self):
+        status, body = self.request('/synthesize', {
+            'names': ['A', 'B', 'C'], 'minterms': [6, 7],
+            'dont_cares': [5], 'form': 'pos'})
+        self.assertEqual(status, 200)
+        self.assertTrue(body['result'] in ('(A) and (B)', '(B) and (A)'))
+
+    def test_bad_request(self):
+        self.assertEqual(self.request('/simplify', {'exp': 'a'})[0], 400)
+        self.assertEqual(self.request('/minimize', {'expr': 'a'})[0], 404)
+        self.assertEqual(self.request('/simplify', {'expr': 'a',
+                                                    'deadline': 'x'})[0], 400)
+        self.assertEqual(self.request('/simplify', {'expr': ['a']}), (400, {
+            'error': "Bad request: 'expr' must be a string"}))
+        for names in ([], 'AB', ['A', 1], ['x%d' % i for i in xrange(40)]):
+            status, body = self.request('/synthesize', {
+                'names': names, 'minterms': [0]})
+            self.assertEqual(status, 400)
+            self.assertEqual(body['error'], "Bad request: 'names' must be "
+                             "a non-empty list of at most 24 strings")
+        for key, value in (('form', [1]), ('form', 'foo'),
+                           ('method', 'foo'), ('method', {})):
+            status, body = self.request('/simplify', {'expr': 'A or B',
+                                                      key: value})
+            self.assertEqual(status, 400)
+            self.assertTrue(body['error'].startswith(
+                "Bad request: '%s' must be one of" % key))
+        self.assertEqual(self.request('/metrics')[1]['requests'], 0)
+
+    def test_coalesce_and_deadline(self):
+        import threading
+        import time
+        names = ['x%d' % i for i in xrange(12)]
+        request = {'names': names, 'minterms': range(0, 2**12, 3),
+                   'deadline': 0.5}
+        results = []
+
+        def post():
+            results.append(self.request('/synthesize', request))
+
+        threads = [threading.Thread(target=post) for _ in xrange(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([status for status, _ in results], [504] * 3)
+        status, metrics = self.request('/metrics')
+        self.assertEqual(metrics['timeouts'], 3)
+        self.assertEqual(metrics['coalesced'], 2)
+
+        # The minimization is cancelled rather than left running, and its
+        # timeout isn't cached
+        for _ in xrange(10):
+            if not self.request('/metrics')[1]['in_flight']:
+                break
+            time.sleep(0.1)
+        status, metrics = self.request('/metrics')
+        self.assertEqual(metrics['in_flight'], 0)
+        self.assertEqual(metrics['cached'], 0)
+
+
+class TestAsync(unittest.TestCase):
+    names = ['x%d' % i for i in xrange(12)]
+
+    def slow(self, **options):
+        from minbool import synthesize_async
+        return synthesize_async(lambda *args: sum(args) % 3 == 0,
+                                *self.names, **options)
+
+    def test_result(self):
+        from minbool import simplify_async
+        task = simplify_async('a or b and a', form='pos')
+        self.assertEqual(str(task.result(10)), 'a')
+        self.assertTrue(task.done())
+        self.assertFalse(task.cancelled())
+        self.assertFalse(task.cancel())
+        done = []
+        task.add_done_callback(done.append)
+        self.assertEqual(done, [task])
+
+    def test_error(self):
+        from minbool import simplify_async
+        task = simplify_async('a and (')
+        self.assertRaises(SyntaxError, task.result, 10)
+
+    def test_cancel(self):
+        import threading
+        from minbool.tasks import Cancelled
+        from minbool.tasks import Timeout
+        task = self.slow()
+        self.assertRaises(Timeout, task.result, 0.05)
+        finished = threading.Event()
+        task.add_done_callback(lambda task: finished.set())
+        self.assertTrue(task.cancel())
+        finished.wait(1)
+        self.assertTrue(task.done())
+        self.assertTrue(task.cancelled())
+        self.assertRaises(Cancelled, task.result)
+
+    def test_timeout(self):
+        from minbool.tasks import Timeout
+        task = self.slow(timeout=0.05)
+        self.assertRaises(Timeout, task.result, 2)
+        self.assertTrue(task.cancelled())
+
+    def test_token(self):
+        from minbool import synthesize
+        from minbool.tasks import CancelToken
+        from minbool.tasks import Cancelled
+        token = CancelToken()
+        token.cancel()
+        self.assertRaises(Cancelled, synthesize, lambda a: a, 'a',
+                          cancel=token)
+
+
+class TestMinimizer(unittest.TestCase):
+
+    def _check(self, minimizer, outputs):
+        from minbool import _find_prime_implicants
+        from minbool import _make_minterm
+        from minbool.incremental import from_implicant
+        N = minimizer.N
+        truthtable = {}
+        for i in xrange(2**N):
+            truthtable[_make_minterm(i, N)] = outputs.get(i, False)
+        self.assertEqual(minimizer.primes, set([
+            from_implicant(implicant) for implicant in
+            _find_prime_implicants(truthtable, N)]))
+        expression = minimizer.expression
+        for minterm, value in truthtable.items():
+            if value is not None:
+                self.assertEqual(expression(*minterm), value)
+        # Irredundant
+        for cube in minimizer.solution:
+            self.assertTrue([i for i, count in minimizer.coverage.items()
+                             if count == 1 and
+                             i & ~cube[1] == cube[0]])
+
+    def test_from_function(self):
+        from minbool import Minimizer
+        minimizer = Minimizer(('A', 'B', 'C'), lambda A, B, C: A and B)
+        self.assertEqual(str(minimizer.expression), '(A and B)')
+        minimizer.add_minterm((1, 0, 1))
+        minimizer.add_minterm((1, 0, 0))
+        self.assertEqual(str(minimizer.expression), '(A)')
+        minimizer.set_dont_care((1, 1, 0))
+        minimizer.remove_minterm((1, 0, 0))
+        self.assertEqual(str(minimizer.expression), '(A and C)')
+        self.assertEqual(minimizer.expression(1, 1, 0), False)
+
+    def test_empty(self):
+        from minbool import Minimizer
+        minimizer = Minimizer(('A', 'B'))
+        self.assertEqual(str(minimizer.expression), 'False')
+        for i in xrange(4):
+            minimizer.add_minterm(i)
+        self.assertEqual(str(minimizer.expression), 'True')
+        minimizer.remove_minterm(3)
+        self.assertEqual(sorted(str(minimizer.expression).split(' or ')),
+                         ['(not(A))', '(not(B))'])
+
+    def test_random_changes(self):
+        import random
+        from minbool import Minimizer
+        rng = random.Random(42)
+        N = 6
+        outputs = {}
+        minimizer = Minimizer(['x%d' % i for i in xrange(N)])
+        for step in xrange(300):
+            i = rng.randrange(2**N)
+            value = rng.choice([True, True, False, None])
+            outputs[i] = value
+            if value:
+                minimizer.add_minterm(i)
+            elif value is None:
+                minimizer.set_dont_care(i)
+            else:
+                minimizer.remove_minterm(i)
+            if not step % 25:
+                self._check(minimizer, outputs)
+        self._check(minimizer, outputs)
+        size = len(minimizer.solution)
+        minimizer.resolve()
+        self._check(minimizer, outputs)
+        self.assertTrue(len(minimizer.solution) <= size + 1)
+
+
+class TestTableCache(unittest.TestCase):
+
+    def test_edit(self):
+        from minbool import equivalent
+        from minbool import simplify
+        from minbool.packed import TableCache
+        cache = TableCache()
+        expr = '(a and b) or (c and d) or not e'
+        result = simplify(expr, table_cache=cache)
+        self.assertEqual(len(result.solution), 3)
+        self.assertTrue(equivalent(result, expr))
+        self.assertEqual((cache.hits, cache.misses), (0, 4))
+
+        expr = '(a and b) or (c and d) or e'
+        result = simplify(expr, table_cache=cache)
+        self.assertEqual(len(result.solution), 3)
+        self.assertTrue(equivalent(result, expr))
+        self.assertEqual((cache.hits, cache.misses), (2, 5))
+
+        result = simplify('(a and b) or (c and d) or e', table_cache=cache)
+        self.assertEqual((cache.hits, cache.misses), (3, 5))
+
+    def test_new_proposition(self):
+        from minbool import equivalent
+        from minbool import simplify
+        from minbool.packed import TableCache
+        cache = TableCache()
+        simplify('(a and b) or (c and not d)', table_cache=cache)
+        self.assertEqual((cache.hits, cache.misses), (0, 4))
+        expr = '(a and b) or (c and not d) or (e and not a)'
+        result = simplify(expr, table_cache=cache)
+        self.assertTrue(equivalent(result, expr))
+        self.assertEqual((cache.hits, cache.misses), (2, 7))
+
+    def test_insert(self):
+        from minbool import packed
+        # a xor b, gaining a variable before, between and after them
+        table = packed.variable(0, 2) ^ packed.variable(1, 2)
+        for positions in [(1, 2), (0, 2), (0, 1)]:
+            self.assertEqual(packed.expand(table, positions, 3),
+                             packed.variable(positions[0], 3) ^
+                             packed.variable(positions[1], 3))
+
+    def test_eviction(self):
+        from minbool import simplify
+        from minbool.packed import TableCache
+        cache = TableCache(max_bytes=200)
+        expr = ' or '.join(['(x%d and not x%d)' % (i, i + 1)
+                            for i in xrange(4)])
+        self.assertEqual(str(simplify(expr, table_cache=cache)),
+                         str(simplify(expr)))
+        self.assertTrue(cache.size <= 200)
+        self.assertTrue(0 < len(cache) < 9)
+
+    def test_weighted_lru(self):
+        from minbool.cache import LRUCache
+        cache = LRUCache(10, len)
+        cache.put('a', 'xxxx')
+        cache.put('b', 'xxxx')
+        cache.get('a')
+        cache.put('c', 'xxxx')
+        self.assertEqual(sorted(cache.entries), ['a', 'c'])
+        self.assertEqual(cache.size, 8)
+        cache.put('a', 'x')
+        self.assertEqual(cache.size, 5)
+
+
+class TestCompact(unittest.TestCase):
+
+    def _check(self, expression, data=None):
+        import itertools
+        from minbool.compact import dumps
+        from minbool.compact import loads
+        if data is None:
+            data = dumps(expression)
+        loaded = loads(data)
+        result = loaded.expand()
+        self.assertEqual(type(result), type(expression))
+        self.assertEqual(result.solution, expression.solution)
+        self.assertEqual(result.form, expression.form)
+        self.assertEqual(result.order, expression.order)
+        self.assertEqual(result.error, expression.error)
+        self.assertEqual(str(result), str(expression))
+        for args in itertools.product((0, 1), repeat=len(expression.names)):
+            self.assertEqual(loaded(*args), expression(*args))
+
+    def test_round_trip(self):
+        from minbool import simplify
+        from minbool import synthesize
+        self._check(simplify('a and not b or c'))
+        self._check(simplify('a and not b or c', form='pos'))
+        self._check(simplify('(a and b) or (a and c)').factor())
+        self._check(simplify('x.y or f(z) and not q').ordered(
+            [0.1, 0.9, 0.5]))
+        self._check(synthesize(lambda a, b: a != b, 'a', 'b', form='esop'))
+        self._check(synthesize(lambda a, b: False, 'a', 'b'))
+        self._check(synthesize(lambda a, b, c: a and b or a and c or b and c,
+                               'a', 'b', 'c', error_budget=1))
+
+    def test_wide(self):
+        from minbool import BooleanExpression
+        from minbool.compact import dumps
+        from minbool.compact import loads
+        names = ['x%d' % i for i in xrange(40)]
+        solution = [(1,) + (None,) * 38 + (0,), (None,) * 39 + (1,)]
+        expression = BooleanExpression(names, solution)
+        result = loads(dumps(expression))
+        self.assertEqual(list(result.cubes),
+                         [(2**39, 2**39 - 2), (1, 2**40 - 2)])
+        self.assertEqual(result.expand().solution, solution)
+
+    def test_buffers(self):
+        import mmap
+        import pickle
+        import tempfile
+        from minbool import simplify
+        from minbool.compact import dumps
+        from minbool.compact import loads
+        expression = simplify('a and not b or c')
+        compact = expression.compact()
+        data = dumps(compact)
+        self.assertEqual(data, dumps(expression))
+        self._check(expression, memoryview(data))
+        self._check(expression, buffer(data))
+        self.assertEqual(str(pickle.loads(pickle.dumps(compact, 2))),
+                         str(expression))
+
+        with tempfile.TemporaryFile() as f:
+            f.write('header' + data)
+            f.flush()
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            loaded = loads(mapped, 6)
+            self.assertTrue(loaded.cubes.data is mapped)
+            self.assertEqual(str(loaded), str(expression))
+            mapped.close()
+
+    def test_invalid(self):
+        from minbool import simplify
+        from minbool.compact import dumps
+        from minbool.compact import loads
+        data = dumps(simplify('a and not b or c'))
+        self.assertRaises(ValueError, loads, data[:-1])
+        self.assertRaises(ValueError, loads, data[:10])
+        self.assertRaises(ValueError, loads, 'XYZ' + data[3:])
+        self.assertRaises(ValueError, loads, data[:3] + '\x09' + data[4:])
+
+
+class TestLibrary(unittest.TestCase):
+
+    def setUp(self):
+        import tempfile
+        from minbool.library import Library
+        from minbool.library import generate
+        self.tmp = tempfile.NamedTemporaryFile()
+        generate(self.tmp.name, max_N=3)
+        self.library = Library(self.tmp.name)
+
+    def tearDown(self):
+        self.library.close()
+        self.tmp.close()
+
+    def test_all_possible(self):
+        from minbool import _range_minterms
+        from minbool import synthesize
+        minterms = list(_range_minterms(3))
+        for table in xrange(2**8):
+            outputs = dict([(minterm, bool(table & (1 << i)))
+                            for i, minterm in enumerate(minterms)])
+            f = lambda *args: outputs[args]
+            expected = synthesize(f, 'A', 'B', 'C', form='best')
+            expr = synthesize(f, 'A', 'B', 'C', form='best',
+                              library=self.library)
+            self.assertTrue(len(expr.solution) <= len(expected.solution))
+            for minterm in minterms:
+                self.assertEqual(expr(*minterm), outputs[minterm])
+
+    def test_smaller(self):
+        from minbool import synthesize
+        f = lambda a, b, c: (a and not b) or (b and not c) or (c and not a)
+        self.assertEqual(len(synthesize(f, 'a', 'b', 'c').solution), 4)
+        expr = synthesize(f, 'a', 'b', 'c', library=self.library)
+        self.assertEqual(str(expr), '(not(a) and b) or (not(b) and c) or '
+                         '(a and not(c))')
+
+    def test_fallback(self):
+        from minbool import synthesize
+        self.assertEqual(self.library.lookup(0, 4), None)
+        f = lambda a, b, c, d: a and b or c and d
+        self.assertEqual(
+            str(synthesize(f, 'a', 'b', 'c', 'd', library=self.library)),
+            str(synthesize(f, 'a', 'b', 'c', 'd')))
+        f = lambda a, b: None if a else b
+        self.assertEqual(str(synthesize(f, 'a', 'b', library=self.library)),
+                         '(b)')
+
+    def test_invalid(self):
+        import tempfile
+        from minbool.library import Library
+        from minbool.library import generate
+        self.assertRaises(ValueError, generate, self.tmp.name, 5)
+        with tempfile.NamedTemporaryFile() as f:
+            f.write('MBX\x01\x03')
+            f.flush()
+            self.assertRaises(ValueError, Library, f.name)
+
+
+class TestNPN(unittest.TestCase):
+
+    def test_classes(self):
+        from minbool.npn import canonical
+        from minbool.npn import transform_table
+        classes = set()
+        for table in xrange(2**8):
+            result, (perm, flips, negate) = canonical(table, 3)
+            self.assertEqual(transform_table(table, 3, perm, flips, negate),
+                             result)
+            classes.add(result)
+        self.assertEqual(len(classes), 14)
+
+    def test_equivalent(self):
+        import random
+        from minbool.npn import canonical
+        from minbool.npn import permutations
+        from minbool.npn import transform_table
+        rng = random.Random(42)
+        perms = permutations(5)
+        for _ in xrange(50):
+            table = rng.getrandbits(32)
+            result = canonical(table, 5)[0]
+            for _ in xrange(3):
+                transformed = transform_table(
+                    table, 5, rng.choice(perms), rng.randrange(32),
+                    rng.randrange(2))
+                self.assertEqual(canonical(transformed, 5)[0], result)
+
+        # Symmetric functions
+        parity = 0x6996966996696996
+        self.assertEqual(canonical(parity, 6)[0], parity)
+        self.assertEqual(canonical(2**63, 6),
+                         (1, ((0, 1, 2, 3, 4, 5), 63, 0)))
+
+    def test_cubes(self):
+        from minbool.npn import inverse_cube
+        from minbool.npn import transform_cube
+        cube = (0b1000, 0b0101)
+        transformed = transform_cube(cube, 4, (2, 0, 3, 1), 0b1010)
+        self.assertEqual(transformed, (0b0001, 0b1100))
+        self.assertEqual(inverse_cube(transformed, 4, (2, 0, 3, 1), 0b1010),
+                         cube)
+
+    def test_cache(self):
+        from minbool import simplify
+        from minbool import synthesize
+        from minbool.cache import LRUCache
+        from minbool import equivalent
+        cache = LRUCache()
+        expr = 'a and (b or not c)'
+        result = simplify(expr, npn_cache=cache)
+        self.assertEqual(len(result.solution), 2)
+        self.assertTrue(equivalent(result, expr))
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        expr = 'not q and (not p or r)'
+        result = simplify(expr, npn_cache=cache)
+        self.assertEqual(len(result.solution), 2)
+        self.assertTrue(equivalent(result, expr))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        f = lambda a, b, c: not (a or (b and not c))
+        result = synthesize(f, 'a', 'b', 'c', form='best', npn_cache=cache)
+        self.assertEqual(result.form, 'pos')
+        self.assertEqual(len(result.solution), 2)
+        self.assertTrue(equivalent(result, 'not (a or (b and not c))'))
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+    def test_limit(self):
+        from minbool import _range_minterms
+        from minbool import synthesize
+        from minbool.cache import LRUCache
+        from minbool.npn import canonical
+        # The five unused inputs have equal counts, so would be tried in
+        # every order
+        N = 8
+        f = lambda *x: bool((x[0] ^ x[1] ^ x[2]) and x[3]) ^ bool(x[7])
+        table = 0
+        for i, minterm in enumerate(_range_minterms(N)):
+            if f(*minterm):
+                table |= 1 << i
+        self.assertEqual(canonical(table, N, limit=64), None)
+        cache = LRUCache()
+        names = ['x%d' % k for k in xrange(N)]
+        result = synthesize(f, npn_cache=cache, *names)
+        self.assertEqual(len(cache), 0)
+        for minterm in _range_minterms(N):
+            self.assertEqual(result(*minterm), f(*minterm))
+
+    def test_all_possible(self):
+        from minbool import _range_minterms
+        from minbool import synthesize
+        from minbool.cache import LRUCache
+        cache = LRUCache()
+        minterms = list(_range_minterms(3))
+        for table in xrange(2**8):
+            outputs = dict([(minterm, bool(table & (1 << i)))
+                            for i, minterm in enumerate(minterms)])
+            expr = synthesize(lambda *args: outputs[args], 'A', 'B', 'C',
+                              npn_cache=cache)
+            for minterm in minterms:
+                self.assertEqual(expr(*minterm), outputs[minterm])
+        # Parity functions, whose inputs all have equal counts, are
+        # minimized without the cache
+        self.assertEqual(cache.misses, 20)
+
+
+class TestApproximate(unittest.TestCase):
+
+    def call_fut(self, f, *names, **options):
+        from minbool import synthesize
+        return synthesize(f, *names, **options)
+
+    def _errors(self, expr, f, weights=None):
+        import itertools
+        errors = 0
+        for args in itertools.product((0, 1), repeat=len(expr.names)):
+            expected = f(*args)
+            if expected is not None and expr(*args) != bool(expected):
+                errors += weights is None and 1 or weights(*args)
+        return errors
+
+    def _literals(self, expr):
+        return sum([len(implicant) - implicant.count(None)
+                    for implicant in expr.solution])
+
+    def test_budget(self):
+        import random
+        rng = random.Random(1)
+        onset = set(rng.sample(range(32), 12))
+        f = lambda *args: int(''.join([str(arg) for arg in args]), 2) in onset
+        exact = self.call_fut(f, *'abcde')
+        self.assertEqual(exact.error, 0)
+        self.assertEqual(
+            str(self.call_fut(f, error_budget=0, *'abcde')), str(exact))
+        literals = self._literals(exact)
+        for budget in (1, 2, 4, 8):
+            for form in ('sop', 'pos', 'best'):
+                expr = self.call_fut(f, error_budget=budget, form=form,
+                                     *'abcde')
+                self.assertEqual(expr.error, self._errors(expr, f))
+                self.assertTrue(expr.error <= budget)
+            self.assertTrue(self._literals(expr) < literals)
+            literals = self._literals(expr)
+
+    def test_drop_term(self):
+        f = lambda a, b, c: (a and b) or (not a and not b and not c)
+        expr = self.call_fut(f, 'a', 'b', 'c', error_budget=1)
+        self.assertEqual(str(expr), '(a and b)')
+        self.assertEqual(expr.error, 1)
+        self.assertEqual(expr.ordered().error, 1)
+
+    def test_weights(self):
+        f = lambda a, b, c: (a and b) or (not a and not b and not c)
+        weights = lambda a, b, c: 5 if (a, b, c) == (0, 0, 0) else 1
+        expr = self.call_fut(f, 'a', 'b', 'c', error_budget=2,
+                             weights=weights)
+        self.assertEqual(expr.error, self._errors(expr, f, weights))
+        self.assertTrue(expr(0, 0, 0))
+        self.assertEqual(expr.error, 2)
+        self.assertEqual(str(expr), '(not(a) and not(b) and not(c))')
+
+    def test_dont_cares(self):
+        f = lambda a, b: None if b else a
+        self.assertEqual(str(self.call_fut(f, 'a', 'b')), '(a)')
+        expr = self.call_fut(f, 'a', 'b', error_budget=1)
+        self.assertEqual(str(expr), 'False')
+        self.assertEqual(expr.error, 1)
+
+    def test_unavailable(self):
+        f = lambda a, b: a != b
+        self.assertRaises(ValueError, self.call_fut, f, 'a', 'b',
+                          error_budget=1, form='esop')
+        self.assertRaises(ValueError, self.call_fut, f, 'a', 'b',
+                          error_budget=1, streaming=True)
+
+    def test_reduce(self):
+        from minbool.approx import reduce
+        # a.b.c + a.b.not(c) + not(a).b.c over a, b, c
+        cover = [(0b111, 0), (0b110, 0), (0b011, 0)]
+        cover, error = reduce(cover, set([7, 6, 3]), set([0, 1, 2, 4, 5]),
+                              3, 0)
+        self.assertEqual(sorted(cover), [(0b011, 0b100), (0b110, 0b001)])
+        self.assertEqual(error, 0)
+        cover = [(0b111, 0), (0b110, 0), (0b011, 0)]
+        self.assertEqual(reduce(cover, set([7, 6, 3]), set([0, 1, 2, 4, 5]),
+                                3, 1, costs=[1, 1, 1]),
+                         ([(0b010, 0b101)], 1))
+
+
+class TestVerify(unittest.TestCase):
+
+    def call_fut(self, expression, spec):
+        from minbool import verify
+        return verify(expression, spec)
+
+    def test_forms(self):
+        from minbool import synthesize
+        f = lambda a, b, c: (a and not b) or c
+        for form in ('sop', 'pos', 'esop'):
+            expr = synthesize(f, 'a', 'b', 'c', form=form)
+            self.assertEqual(self.call_fut(expr, f), None)
+            self.assertEqual(self.call_fut(expr, lambda a, b, c: c),
+                             (1, 0, 0))
+
+    def test_specs(self):
+        from minbool import simplify
+        from minbool import synthesize
+        expr = synthesize(lambda x, y: x and not y, 'x', 'y')
+        rows = [False, False, True, False]
+        self.assertEqual(self.call_fut(expr, rows), None)
+        rows[0] = True
+        self.assertEqual(self.call_fut(expr, rows), (0, 0))
+        rows[0] = None
+        self.assertEqual(self.call_fut(expr, rows), None)
+        self.assertEqual(self.call_fut(expr, {(0, 0): True}), (0, 0))
+        self.assertEqual(self.call_fut(expr, {(1, 1): False}), None)
+        self.assertRaises(ValueError, self.call_fut, expr, rows[:3])
+        self.assertEqual(self.call_fut(simplify('x.y or z'),
+                                       [False] + [True] * 3), None)
+
+    def test_random(self):
+        import random
+        from minbool import synthesize
+        rng = random.Random(42)
+        for _ in xrange(20):
+            rows = [rng.choice([True, False, None]) for _ in xrange(2**6)]
+            f = lambda *args: rows[int(''.join([str(arg) for arg in args]),
+                                       2)]
+            expr = synthesize(f, *'abcdef')
+            self.assertEqual(self.call_fut(expr, rows), None)
+            wrong = [not value if value is not None else None
+                     for value in rows]
+            first = min([i for i, value in enumerate(rows)
+                         if value is not None])
+            self.assertEqual(self.call_fut(expr, wrong), tuple(
+                [int(bit) for bit in bin(first)[2:].zfill(6)]))